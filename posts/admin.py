@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Comment, Follow, Group, Post
+from .search import filter_matching
 
 
 class CommentsAdmin(admin.ModelAdmin):
@@ -23,6 +24,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по индексу поиска вместо LIKE '%...%' по всей таблице."""
+        found = filter_matching(queryset, search_term)
+        if found is None:
+            return queryset, False
+        return found, False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ("pk", "description", "title", "slug",)
@@ -0,0 +1,193 @@
+"""JSON API только для чтения: ленты, группы, профили и комментарии.
+
+Вью повторяют HTML-страницы и используют те же querysets, но строки
+читаются через values(): только нужные поля, без создания моделей.
+Списки листаются keyset-курсором (?cursor=, ?limit=), а с ?format=ndjson
+отдаются целиком построчным JSON через StreamingHttpResponse, который
+читает базу порциями по API_EXPORT_CHUNK_SIZE.
+"""
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from .feeds import feed_queryset, follow_feed_queryset
+from .models import Comment, Group
+from .pagination import CURSOR_PARAM, CursorPaginator
+
+User = get_user_model()
+
+POST_FIELDS = (
+    "id", "text", "pub_date", "author__username", "group__slug", "image",
+    "comment_count",
+)
+COMMENT_FIELDS = ("id", "post_id", "author__username", "text", "created")
+AUTHOR_FIELDS = (
+    "username", "counters__posts_count", "counters__followers_count",
+    "counters__following_count",
+)
+JSON_PARAMS = {"ensure_ascii": False, "separators": (",", ":")}
+NDJSON = "application/x-ndjson"
+
+
+def serialize_post(row):
+    return {
+        "id": row["id"],
+        "text": row["text"],
+        "pub_date": row["pub_date"],
+        "author": row["author__username"],
+        "group": row["group__slug"],
+        "image": settings.MEDIA_URL + row["image"] if row["image"] else None,
+        "comment_count": row["comment_count"],
+    }
+
+
+def serialize_comment(row):
+    return {
+        "id": row["id"],
+        "post": row["post_id"],
+        "author": row["author__username"],
+        "text": row["text"],
+        "created": row["created"],
+    }
+
+
+def serialize_author(row):
+    return {
+        "username": row["username"],
+        "posts_count": row["counters__posts_count"] or 0,
+        "followers_count": row["counters__followers_count"] or 0,
+        "following_count": row["counters__following_count"] or 0,
+    }
+
+
+def api_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def error(status, detail):
+    return api_response({"detail": detail}, status=status)
+
+
+def ndjson_response(rows, serialize):
+    """Потоковая выгрузка: по строке JSON на запись."""
+    lines = (
+        json.dumps(serialize(row), cls=DjangoJSONEncoder, **JSON_PARAMS)
+        + "\n"
+        for row in rows.iterator(chunk_size=settings.API_EXPORT_CHUNK_SIZE)
+    )
+    return StreamingHttpResponse(lines, content_type=NDJSON)
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get("limit", settings.PER_PAGE))
+    except ValueError:
+        limit = settings.PER_PAGE
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query[CURSOR_PARAM] = cursor
+    return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+
+def list_response(request, rows, serialize, date_field="pub_date",
+                  descending=True, extra=None):
+    """Страница списка по курсору или вся выгрузка при ?format=ndjson."""
+    if request.GET.get("format") == "ndjson":
+        return ndjson_response(rows, serialize)
+    paginator = CursorPaginator(
+        rows, _limit(request), date_field=date_field, descending=descending,
+    )
+    page = paginator.page(request.GET.get(CURSOR_PARAM))
+    data = dict(extra or {})
+    data.update({
+        "results": [serialize(row) for row in page],
+        "next": _page_url(request, page.next_cursor),
+        "previous": _page_url(request, page.previous_cursor),
+    })
+    return api_response(data)
+
+
+def _author(username):
+    return User.objects.filter(username=username).values(
+        "id", *AUTHOR_FIELDS
+    ).first()
+
+
+def posts(request):
+    return list_response(
+        request, feed_queryset().values(*POST_FIELDS), serialize_post
+    )
+
+
+def groups(request):
+    rows = Group.objects.order_by("title").values(
+        "slug", "title", "description"
+    )
+    return api_response({"results": list(rows)})
+
+
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).values(
+        "id", "slug", "title", "description"
+    ).first()
+    if group is None:
+        return error(404, "Группа не найдена")
+    rows = feed_queryset(group_id=group.pop("id")).values(*POST_FIELDS)
+    return list_response(
+        request, rows, serialize_post, extra={"group": group}
+    )
+
+
+def profile(request, username):
+    author = _author(username)
+    if author is None:
+        return error(404, "Пользователь не найден")
+    rows = feed_queryset(author_id=author["id"]).values(*POST_FIELDS)
+    return list_response(
+        request, rows, serialize_post,
+        extra={"author": serialize_author(author)},
+    )
+
+
+def post_detail(request, post_id):
+    # Счётчики автора читаются тем же запросом, через JOIN.
+    author_fields = [f"author__{field}" for field in AUTHOR_FIELDS[1:]]
+    row = feed_queryset(id=post_id).values(
+        *POST_FIELDS, *author_fields
+    ).first()
+    if row is None:
+        return error(404, "Пост не найден")
+    author = {field: row[f"author__{field}"] for field in AUTHOR_FIELDS}
+    return api_response({
+        "post": serialize_post(row),
+        "author": serialize_author(author),
+        "comments": request.build_absolute_uri(
+            reverse("api:post_comments", args=[post_id])
+        ),
+    })
+
+
+def post_comments(request, post_id):
+    if not feed_queryset(id=post_id).exists():
+        return error(404, "Пост не найден")
+    rows = Comment.objects.filter(post_id=post_id).values(*COMMENT_FIELDS)
+    return list_response(
+        request, rows, serialize_comment,
+        date_field="created", descending=False,
+    )
+
+
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return error(401, "Требуется авторизация")
+    rows = follow_feed_queryset(request.user).values(*POST_FIELDS)
+    return list_response(request, rows, serialize_post)
@@ -0,0 +1,430 @@
+"""Нагрузочный замер всех маршрутов posts и users.
+
+Набор данных создаёт генератор posts.dataset с префиксом BENCH_PREFIX.
+Каждый маршрут запрашивается анонимом и автором постов через тестовый
+клиент Django (в одном процессе) или через локальный WSGI-сервер;
+отчёт с перцентилями задержки, числом SQL-запросов и пропускной
+способностью сохраняется в JSON с отсортированными ключами, чтобы его
+можно было сравнивать между коммитами через diff.
+
+run_concurrent запускает параллельных писателей и читателей в потоках,
+каждый со своим соединением, и считает ошибки "database is locked", а
+run_connection_modes сравнивает задержку маршрута без повторного
+использования соединений, с пулом и с постоянными соединениями.
+"""
+import math
+import platform
+import threading
+import time
+from http.cookiejar import Cookie, CookieJar
+from urllib.error import HTTPError
+from urllib.request import (HTTPCookieProcessor, HTTPRedirectHandler,
+                            build_opener)
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+import django
+from django.core.wsgi import get_wsgi_application
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from posts import urls as posts_urls
+from users import urls as users_urls
+from yatube.sqlite import is_locked
+from yatube.sqlite.pool import all_stats
+
+from . import dataset
+from .models import Group, Post, User
+
+PERCENTILES = (50, 95, 99)
+BENCH_PREFIX = "bench_"
+
+
+def seed(users=50, groups=5, posts=1000, comments=2000, follows=200,
+         random_seed=0, batch_size=1000):
+    """Создаёт набор данных и возвращает значения для URL маршрутов."""
+    dataset.generate(
+        users=users, groups=groups, posts=posts, comments=comments,
+        follows=follows, prefix=BENCH_PREFIX, random_seed=random_seed,
+        batch_size=batch_size,
+    )
+    post = Post.objects.filter(
+        author__username__startswith=BENCH_PREFIX
+    ).order_by("-comment_count", "id").select_related("author").first()
+    return {
+        "username": post.author.username,
+        "post_id": post.id,
+        "slug": Group.objects.filter(
+            slug__startswith=BENCH_PREFIX
+        ).values_list("slug", flat=True).first() or "",
+    }
+
+
+def iter_routes(sample):
+    """Пары (имя маршрута, URL) для всех маршрутов posts и users."""
+    for module in (posts_urls, users_urls):
+        for pattern in module.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            kwargs = {
+                name: sample[name]
+                for name in pattern.pattern.converters
+            }
+            yield pattern.name, reverse(pattern.name, kwargs=kwargs)
+
+
+def percentile(samples, rank):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(samples)
+    index = max(math.ceil(rank / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def summarize(url, statuses, latencies, queries):
+    seconds = sum(latencies)
+    summary = {
+        "url": url,
+        "status": sorted(set(statuses)),
+        "requests": len(latencies),
+        "mean_ms": round(seconds / len(latencies) * 1000, 3),
+        "rps": round(len(latencies) / seconds, 1) if seconds else None,
+        "queries": max(queries) if None not in queries else None,
+    }
+    for rank in PERCENTILES:
+        summary[f"p{rank}_ms"] = round(percentile(latencies, rank) * 1000, 3)
+    return summary
+
+
+class ClientDriver:
+    """Запросы через тестовый клиент Django в текущем процессе."""
+
+    mode = "client"
+
+    def __init__(self, user=None):
+        self.client = Client()
+        if user is not None:
+            self.client.force_login(user)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = self.client.get(url)
+            elapsed = time.perf_counter() - started
+        return response.status_code, elapsed, len(captured)
+
+    def close(self):
+        pass
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _counting(application):
+    """Оборачивает WSGI-приложение: число SQL-запросов в заголовке."""
+
+    def wrapper(environ, start_response):
+        executed = []
+
+        def count(execute, sql, params, many, context):
+            executed.append(sql)
+            return execute(sql, params, many, context)
+
+        def start(status, headers, exc_info=None):
+            headers.append(("X-Bench-Queries", str(len(executed))))
+            return start_response(status, headers, exc_info)
+
+        with connection.execute_wrapper(count):
+            response = application(environ, start)
+            try:
+                return list(response)
+            finally:
+                response.close()
+
+    return wrapper
+
+
+class WSGIDriver:
+    """Запросы по HTTP к локальному WSGI-серверу в отдельном потоке.
+
+    Сервер работает с той же базой, поэтому набор данных должен быть
+    закоммичен, а не жить во временной транзакции.
+    """
+
+    mode = "wsgi"
+
+    def __init__(self, user=None, server=None):
+        self.server = server or self.start_server()
+        self.owns_server = server is None
+        host, port = self.server.server_address[:2]
+        self.base = f"http://{host}:{port}"
+        jar = CookieJar()
+        if user is not None:
+            session = Client()
+            session.force_login(user)
+            for morsel in session.cookies.values():
+                jar.set_cookie(Cookie(
+                    0, morsel.key, morsel.value, None, False, host, False,
+                    False, "/", True, False, None, False, None, None, {},
+                ))
+        self.opener = build_opener(HTTPCookieProcessor(jar), _NoRedirect)
+
+    @staticmethod
+    def start_server():
+        server = make_server(
+            "127.0.0.1", 0, _counting(get_wsgi_application()),
+            handler_class=_QuietHandler,
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def get(self, url):
+        started = time.perf_counter()
+        try:
+            response = self.opener.open(self.base + url)
+        except HTTPError as error:
+            response = error
+        response.read()
+        elapsed = time.perf_counter() - started
+        queries = response.headers.get("X-Bench-Queries")
+        return response.status, elapsed, int(queries) if queries else None
+
+    def close(self):
+        if self.owns_server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def run(sample, drivers, requests=20, warmup=2, log=None):
+    """Прогоняет все маршруты и возвращает отчёт для JSON."""
+    routes = {}
+    total, busy = 0, 0.0
+    for name, url in iter_routes(sample):
+        for label, driver in drivers.items():
+            for _ in range(warmup):
+                driver.get(url)
+            statuses, latencies, queries = [], [], []
+            for _ in range(requests):
+                status, elapsed, count = driver.get(url)
+                statuses.append(status)
+                latencies.append(elapsed)
+                queries.append(count)
+            key = f"{name} [{label}]"
+            routes[key] = summarize(url, statuses, latencies, queries)
+            total += requests
+            busy += sum(latencies)
+            if log is not None:
+                log(key, routes[key])
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "mode": next(iter(drivers.values())).mode,
+        },
+        "routes": routes,
+        "total": {
+            "requests": total,
+            "seconds": round(busy, 3),
+            "rps": round(total / busy, 1) if busy else None,
+        },
+    }
+
+
+class ThreadClient(Client):
+    """Тестовый клиент для потоков нагрузки.
+
+    Клиент Django 2.2 ловит исключения через общий сигнал
+    got_request_exception и выбрасывает исключения запросов чужих
+    потоков; этот принимает только исключения своего потока.
+    """
+
+    def request(self, **request):
+        self.thread = threading.get_ident()
+        return super().request(**request)
+
+    def store_exc_info(self, **kwargs):
+        if threading.get_ident() == self.thread:
+            super().store_exc_info(**kwargs)
+
+
+def _worker(client, actions, requests, barrier, results):
+    """Поток нагрузки: requests запросов, по очереди из actions."""
+    statuses, latencies = [], []
+    lock_errors = errors = 0
+    barrier.wait()
+    try:
+        for number in range(requests):
+            method, url, data = actions[number % len(actions)]
+            started = time.perf_counter()
+            try:
+                response = getattr(client, method)(url, data)
+            except Exception as error:
+                if isinstance(error, OperationalError) and is_locked(error):
+                    lock_errors += 1
+                else:
+                    errors += 1
+                status = 500
+            else:
+                status = response.status_code
+            latencies.append(time.perf_counter() - started)
+            statuses.append(status)
+    finally:
+        connection.close()
+    results.append((statuses, latencies, lock_errors, errors))
+
+
+def run_concurrent(sample, writers=8, readers=8, requests=30):
+    """Параллельные писатели и читатели на одной базе.
+
+    Писатели комментируют пост sample и публикуют посты, читатели
+    открывают главную, пост и ленту подписок от имени своих
+    пользователей (мимо кеша страниц анонимов). Возвращает отчёт с
+    пропускной способностью и числом ошибок "database is locked".
+    """
+    users = list(User.objects.filter(
+        username__startswith=BENCH_PREFIX
+    ).order_by("id")[:writers + readers])
+    if len(users) < writers + readers:
+        raise ValueError("пользователей меньше, чем потоков нагрузки")
+    post_url = reverse("post", args=[sample["username"], sample["post_id"]])
+    comment_url = reverse(
+        "add_comment", args=[sample["username"], sample["post_id"]]
+    )
+    roles = {
+        "writers": [
+            ("post", comment_url, {"text": "Комментарий под нагрузкой"}),
+            ("post", comment_url, {"text": "Ещё комментарий"}),
+            ("post", reverse("new_post"), {"text": "Пост под нагрузкой"}),
+        ],
+        "readers": [
+            ("get", reverse("index"), None),
+            ("get", post_url, None),
+            ("get", reverse("follow_index"), None),
+        ],
+    }
+    barrier = threading.Barrier(writers + readers)
+    results = {role: [] for role in roles}
+    threads = []
+    for role, count in (("writers", writers), ("readers", readers)):
+        for _ in range(count):
+            client = ThreadClient()
+            client.force_login(users.pop())
+            threads.append(threading.Thread(
+                target=_worker,
+                args=(client, roles[role], requests, barrier, results[role]),
+            ))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        journal_mode = cursor.fetchone()[0]
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "journal_mode": journal_mode,
+        },
+    }
+    total = {"requests": 0, "lock_errors": 0, "errors": 0}
+    for role, role_results in results.items():
+        statuses, latencies = [], []
+        lock_errors = errors = 0
+        for result in role_results:
+            statuses += result[0]
+            latencies += result[1]
+            lock_errors += result[2]
+            errors += result[3]
+        summary = summarize(
+            role, statuses, latencies, [None] * len(latencies)
+        )
+        del summary["url"], summary["queries"]
+        summary.update(
+            threads=len(role_results), lock_errors=lock_errors,
+            errors=errors, throughput=round(len(latencies) / wall, 1),
+        )
+        report[role] = summary
+        total["requests"] += len(latencies)
+        total["lock_errors"] += lock_errors
+        total["errors"] += errors
+    total.update(
+        seconds=round(wall, 3), rps=round(total["requests"] / wall, 1)
+    )
+    report["total"] = total
+    return report
+
+
+# Режимы соединений для run_connection_modes: CONN_MAX_AGE и POOL алиаса.
+CONNECTION_MODES = {
+    "close": {"CONN_MAX_AGE": 0, "POOL": {}},
+    "pool": {"CONN_MAX_AGE": 0, "POOL": {"MAX_SIZE": 4, "TIMEOUT": 10}},
+    "persistent": {"CONN_MAX_AGE": 600, "POOL": {}},
+}
+
+
+def _pool_totals():
+    stats = all_stats().values()
+    return (sum(pool["checkouts"] for pool in stats),
+            sum(pool["created"] for pool in stats))
+
+
+def run_connection_modes(driver, url, requests=200, warmup=10):
+    """Замер одного маршрута при разных режимах соединений с базой.
+
+    Нужен WSGIDriver: тестовый клиент не закрывает соединения в конце
+    запроса. Настройки алиаса меняются на месте, поэтому новый режим
+    подхватывается при следующем подключении потока сервера.
+    """
+    opened = []
+
+    def count(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    settings_dict = connection.settings_dict
+    saved = {
+        name: settings_dict.get(name) for name in ("CONN_MAX_AGE", "POOL")
+    }
+    modes = {}
+    connection_created.connect(count)
+    try:
+        for mode, options in CONNECTION_MODES.items():
+            settings_dict.update(options)
+            for _ in range(warmup):
+                driver.get(url)
+            opened.clear()
+            before = _pool_totals()
+            statuses, latencies, queries = [], [], []
+            for _ in range(requests):
+                status, elapsed, executed = driver.get(url)
+                statuses.append(status)
+                latencies.append(elapsed)
+                queries.append(executed)
+            modes[mode] = summarize(url, statuses, latencies, queries)
+            # Выдача из пула — тоже connect() Django, но без нового
+            # соединения с SQLite.
+            checkouts, created = (
+                after - was for after, was in zip(_pool_totals(), before)
+            )
+            modes[mode]["connections_opened"] = (
+                len(opened) - checkouts + created
+            )
+    finally:
+        connection_created.disconnect(count)
+        settings_dict.update(saved)
+    baseline = modes["close"]["mean_ms"]
+    for summary in modes.values():
+        summary["saved_ms"] = round(baseline - summary["mean_ms"], 3)
+    return {"url": url, "modes": modes, "pools": all_stats()}
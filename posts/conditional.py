@@ -0,0 +1,140 @@
+"""Условные GET (ETag / Last-Modified) для лент и страницы поста.
+
+Валидатор страницы считается не более чем одним запросом по индексам,
+без отрисовки: дата самого нового поста или комментария, счётчики
+автора, подписка читателя и время расчёта его рекомендаций. Правки
+постов, комментарии и изменения групп дат не меняют, их учитывает токен
+поколения кеша лент (feed_cache.generation): он входит в ETag. Если
+страница не изменилась, браузер или прокси получают 304 Not Modified.
+
+Время смены поколения служит Last-Modified только для главной и групп.
+Подписки и счётчики поколение не меняют, а профиль и страница поста от
+них зависят, поэтому эти страницы проверяются только по ETag.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Subquery
+from django.views.decorators.http import condition
+
+from .feed_cache import generation, generation_time
+from .models import Comment, Follow, FollowSuggestion, Group, Post, UserCounter
+
+User = get_user_model()
+
+VALIDATOR_ATTR = "_page_validator"
+
+
+def _newest(queryset, field="pub_date"):
+    return Subquery(
+        queryset.order_by(f"-{field}", "-id").values(field)[:1]
+    )
+
+
+def _first(queryset):
+    rows = list(queryset[:1])
+    return rows[0] if rows else None
+
+
+def index_state(request):
+    # Главная зависит только от постов, комментариев и групп, а любое их
+    # изменение уже меняет токен поколения: база не нужна вовсе.
+    return ()
+
+
+def group_state(request, slug):
+    rows = Group.objects.filter(slug=slug).annotate(
+        newest=_newest(Post.objects.filter(group=OuterRef("pk"))),
+    ).values_list("id", "newest")
+    return _first(rows)
+
+
+def profile_state(request, username):
+    authors = User.objects.filter(username=username).annotate(
+        newest=_newest(Post.objects.filter(author=OuterRef("pk"))),
+    )
+    fields = [
+        "id", "newest", "counters__posts_count",
+        "counters__followers_count", "counters__following_count",
+    ]
+    if request.user.is_authenticated:
+        # Рекомендации зависят от пересчёта и от подписок самого читателя.
+        authors = authors.annotate(
+            is_following=Exists(Follow.objects.filter(
+                user=request.user, author=OuterRef("pk"),
+            )),
+            viewer_following=Subquery(
+                UserCounter.objects.filter(user=request.user)
+                .values("following_count")[:1]
+            ),
+            # У всех строк читателя одно время расчёта: берём первую по
+            # индексу.
+            suggestions_computed=Subquery(
+                FollowSuggestion.objects.filter(user=request.user)
+                .order_by("-score", "author").values("computed")[:1]
+            ),
+        )
+        fields += ["is_following", "viewer_following", "suggestions_computed"]
+    return _first(authors.values_list(*fields))
+
+
+def post_state(request, username, post_id):
+    rows = Post.objects.filter(
+        id=post_id, author__username=username,
+    ).annotate(
+        newest_comment=_newest(
+            Comment.objects.filter(post=OuterRef("pk")), "created"
+        ),
+    ).values_list(
+        "pub_date", "comment_count", "newest_comment",
+        "author__counters__posts_count",
+        "author__counters__followers_count",
+        "author__counters__following_count",
+    ).order_by()
+    return _first(rows)
+
+
+def page_validator(request, state, *args, **kwargs):
+    """(ETag, Last-Modified) страницы или None, если проверять нечего.
+
+    Считается один раз на запрос: condition() спрашивает ETag и
+    Last-Modified по отдельности.
+    """
+    if not hasattr(request, VALIDATOR_ATTR):
+        validator = None
+        row = None
+        if settings.CONDITIONAL_PAGES:
+            row = state(request, *args, **kwargs)
+        if row is not None:
+            token = generation()
+            parts = (
+                state.__name__, request.get_full_path(), request.user.pk,
+                token, *row,
+            )
+            etag = hashlib.md5(
+                "\x1f".join(str(part) for part in parts).encode()
+            ).hexdigest()
+            validator = etag, generation_time(token)
+        setattr(request, VALIDATOR_ATTR, validator)
+    return getattr(request, VALIDATOR_ATTR)
+
+
+def conditional_page(state, last_modified=True):
+    """Декоратор вью: 304 Not Modified по валидатору из state().
+
+    last_modified=False отключает Last-Modified для страниц, которые
+    меняются без смены поколения кеша лент.
+    """
+
+    def etag(request, *args, **kwargs):
+        validator = page_validator(request, state, *args, **kwargs)
+        return validator[0] if validator else None
+
+    def modified(request, *args, **kwargs):
+        validator = page_validator(request, state, *args, **kwargs)
+        return validator[1] if validator else None
+
+    return condition(
+        etag_func=etag, last_modified_func=modified if last_modified else None
+    )
@@ -0,0 +1,86 @@
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from yatube.sqlite import bulk_insert
+
+from .models import Post, UserCounter
+
+
+def change_counter(user_id, field, delta):
+    """Атомарно сдвигает счётчик пользователя на delta."""
+    if user_id is None:
+        return
+    counters = UserCounter.objects.filter(user_id=user_id)
+    if delta > 0:
+        UserCounter.objects.get_or_create(user_id=user_id)
+    else:
+        # Строку при уменьшении не создаём: пользователь может удаляться
+        # каскадом вместе со своими постами и подписками.
+        counters = counters.filter(**{f"{field}__gte": -delta})
+    counters.update(**{field: F(field) + delta})
+
+
+def change_comment_count(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(comment_count=F("comment_count") + delta)
+
+
+def _count(queryset, field):
+    """Коррелированный подзапрос COUNT(*) с группировкой по field."""
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(field)
+            .annotate(total=Count("pk")).values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def recount_counters(apps=global_apps, batch_size=1000, users=None):
+    """Пересчитывает все счётчики по исходным таблицам.
+
+    С users (queryset пользователей) пересчитываются только их счётчики
+    и счётчики комментариев их постов.
+    Возвращает пару (число созданных строк UserCounter, число постов).
+    Принимает реестр приложений, чтобы работать и из миграций.
+    """
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    Follow = apps.get_model("posts", "Follow")
+    UserCounter = apps.get_model("posts", "UserCounter")
+
+    counters, posts = UserCounter.objects.all(), Post.objects.all()
+    if users is None:
+        users = User.objects.all()
+    else:
+        counters = counters.filter(user__in=users)
+        posts = posts.filter(author__in=users)
+    missing = users.filter(counters__isnull=True).values_list(
+        "pk", flat=True
+    )
+    created = bulk_insert(UserCounter, (
+        UserCounter(user_id=pk) for pk in missing.iterator()
+    ), batch_size)
+    counters.update(
+        posts_count=_count(
+            Post.objects.filter(author=OuterRef("user")), "author"
+        ),
+        followers_count=_count(
+            Follow.objects.filter(author=OuterRef("user")), "author"
+        ),
+        following_count=_count(
+            Follow.objects.filter(user=OuterRef("user")), "user"
+        ),
+    )
+    posts = posts.update(
+        comment_count=_count(
+            Comment.objects.filter(post=OuterRef("pk")), "post"
+        ),
+    )
+    return created, posts
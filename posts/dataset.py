@@ -0,0 +1,180 @@
+"""Синтетический набор данных для замеров на объёме, близком к боевому.
+
+Число постов у авторов и число подписчиков распределены по степенному
+закону: несколько авторов пишут большую часть постов и собирают
+большую часть подписок, как в живой ленте. Даты публикации разнесены
+на заданное число дней назад, комментарии появляются после поста.
+Записи вставляются bulk_create пачками, каждая пачка в своей
+транзакции, так что объём ограничен только диском; при одинаковом
+seed набор получается одним и тем же.
+
+bulk_create не отправляет сигналы, поэтому в конце счётчики, поиск,
+очки рейтинга и материализованные ленты пересчитываются
+(refresh_derived) — только для созданных пользователей и их постов:
+сгенерированные комментарии и подписки не выходят за пределы набора.
+"""
+import io
+import random
+from array import array
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image
+
+from yatube.sqlite import bulk_insert
+
+from .models import Comment, Follow, Group, Post, User
+from .transfer import preserved_dates, refresh_derived
+
+PREFIX = "gen_"
+IMAGE_SIZE = (640, 480)
+WORDS = (
+    "кот собака парк город море утро вечер книга музыка фото дорога "
+    "друг работа лето зима погода новости кофе горы река"
+).split()
+
+
+def power_law_weights(count, exponent):
+    """Накопленные веса Ципфа 1/rank**exponent для random.choices."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def _insert(model, objs, batch_size):
+    """bulk_insert с датами из объектов, а не auto_now_add."""
+    with preserved_dates(model):
+        return bulk_insert(model, objs, batch_size)
+
+
+def placeholder_images(count, prefix=PREFIX, rng=random):
+    """Сохраняет count однотонных PNG в хранилище и возвращает их имена."""
+    names = []
+    for number in range(count):
+        color = tuple(rng.randrange(256) for _ in range(3))
+        buffer = io.BytesIO()
+        Image.new("RGB", IMAGE_SIZE, color).save(buffer, "PNG")
+        names.append(default_storage.save(
+            f"posts/{prefix}placeholder_{number}.png",
+            ContentFile(buffer.getvalue()),
+        ))
+    return names
+
+
+def clear(prefix=PREFIX):
+    """Удаляет ранее сгенерированных пользователей и группы с их данными."""
+    Post.objects.filter(author__username__startswith=prefix).delete()
+    User.objects.filter(username__startswith=prefix).delete()
+    Group.objects.filter(slug__startswith=prefix).delete()
+
+
+def generate(users=1000, groups=20, posts=20000, comments=40000,
+             follows=20000, days=365, exponent=1.1, images=0,
+             image_ratio=0.2, password=None, prefix=PREFIX, random_seed=0,
+             batch_size=1000):
+    """Создаёт набор данных и возвращает сводку с числом записей.
+
+    В сводке также есть самый активный автор и самый подписанный читатель —
+    на их профиле и ленте подписок нагрузка наибольшая.
+    """
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    summary = {}
+
+    hashed = make_password(password)
+    summary["users"] = _insert(User, (
+        User(username=f"{prefix}{number}", password=hashed,
+             date_joined=now - timedelta(days=days))
+        for number in range(users)
+    ), batch_size)
+    user_ids = list(User.objects.filter(
+        username__startswith=prefix
+    ).order_by("id").values_list("id", flat=True))
+    # Ранг популярности не совпадает с порядком регистрации.
+    ranked = user_ids[:]
+    rng.shuffle(ranked)
+    weights = power_law_weights(len(ranked), exponent)
+
+    summary["groups"] = _insert(Group, (
+        Group(
+            title=f"Группа {number}", slug=f"{prefix}group_{number}",
+            description=f"Описание группы {number}",
+        )
+        for number in range(groups)
+    ), batch_size)
+    group_ids = [None] + list(Group.objects.filter(
+        slug__startswith=prefix
+    ).order_by("id").values_list("id", flat=True))
+
+    image_names = placeholder_images(images, prefix, rng)
+
+    def text(size):
+        return " ".join(rng.choice(WORDS) for _ in range(size))
+
+    def post_objects():
+        # Отсортированные даты: порядок id совпадает с порядком публикации.
+        span = days * 86400
+        offsets = sorted(rng.random() * span for _ in range(posts))
+        authors = rng.choices(ranked, cum_weights=weights, k=posts)
+        for offset, author in zip(reversed(offsets), authors):
+            image = None
+            if image_names and rng.random() < image_ratio:
+                image = rng.choice(image_names)
+            yield Post(
+                text=text(rng.randint(5, 40)), author_id=author,
+                group_id=rng.choice(group_ids), image=image,
+                pub_date=now - timedelta(seconds=offset),
+            )
+
+    summary["posts"] = _insert(Post, post_objects() if user_ids else (),
+                               batch_size)
+
+    # id и даты постов в компактных массивах, а не в списке объектов.
+    post_ids, post_times = array("q"), array("d")
+    for post_id, pub_date in Post.objects.filter(
+        author__username__startswith=prefix
+    ).order_by("id").values_list("id", "pub_date").iterator():
+        post_ids.append(post_id)
+        post_times.append(pub_date.timestamp())
+
+    def comment_objects():
+        current = now.timestamp()
+        for _ in range(comments if post_ids else 0):
+            index = rng.randrange(len(post_ids))
+            created = post_times[index] + rng.random() * (
+                current - post_times[index]
+            )
+            yield Comment(
+                post_id=post_ids[index], text=text(rng.randint(3, 15)),
+                author_id=rng.choices(ranked, cum_weights=weights)[0],
+                created=datetime.fromtimestamp(
+                    created, tz=now.tzinfo
+                ),
+            )
+
+    summary["comments"] = _insert(Comment, comment_objects(), batch_size)
+
+    def follow_objects():
+        # Читатель выбирается равномерно, автор — по популярности;
+        # повторы и подписки на себя отбрасываются.
+        seen = set()
+        for _ in range(follows if len(user_ids) > 1 else 0):
+            user = rng.choice(user_ids)
+            author = rng.choices(ranked, cum_weights=weights)[0]
+            if user != author and (user, author) not in seen:
+                seen.add((user, author))
+                yield Follow(user_id=user, author_id=author)
+
+    summary["follows"] = _insert(Follow, follow_objects(), batch_size)
+
+    generated = User.objects.filter(username__startswith=prefix)
+    refresh_derived(batch_size=batch_size, users=generated)
+    author = generated.order_by("-counters__posts_count", "id").first()
+    reader = generated.order_by("-counters__following_count", "id").first()
+    summary["top_author"] = author.username if author else None
+    summary["top_reader"] = reader.username if reader else None
+    return summary
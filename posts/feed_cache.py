@@ -0,0 +1,172 @@
+"""Кеш страниц лент с инвалидацией по поколению.
+
+Каждое значение хранится вместе с токеном поколения, в котором оно было
+посчитано. Любое изменение постов или комментариев меняет токен
+(bump_generation), и все закешированные страницы становятся устаревшими.
+Пересчёт устаревшей страницы выполняет только один процесс (single
+flight), остальные в это время получают предыдущую версию.
+"""
+import hashlib
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import Page, Paginator
+from django.dispatch import Signal
+from django.utils import timezone
+
+from yatube.replicas import may_lag
+
+from .pagination import (CURSOR_PARAM, CursorPaginator, UncountedPage,
+                         UncountedPaginator, paginate)
+
+GENERATION_KEY = "feed:generation"
+STATS_KEY = "feed:stats:%s"
+OUTCOMES = ("hit", "stale", "miss")
+# Сколько секунд ждать значение, которое считает другой процесс.
+WAIT_TIMEOUT = 1.0
+
+# Отправляется при каждом обращении к кешу; outcome — одно из OUTCOMES.
+feed_cache_accessed = Signal(providing_args=["key", "outcome"])
+
+
+def _cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def _new_token():
+    # Время смены поколения в начале токена служит Last-Modified страниц.
+    return f"{time.time():.6f}:{uuid.uuid4().hex}"
+
+
+def generation():
+    """Текущий токен поколения лент."""
+    cache = _cache()
+    token = cache.get(GENERATION_KEY)
+    if token is None:
+        cache.add(GENERATION_KEY, _new_token(), None)
+        token = cache.get(GENERATION_KEY)
+    return token
+
+
+def generation_time(token=None):
+    """Момент смены поколения или None для токена без времени."""
+    token = token or generation()
+    try:
+        timestamp = float(token.split(":", 1)[0])
+    except (AttributeError, ValueError):
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def bump_generation():
+    """Делает устаревшими все закешированные страницы лент.
+
+    Новый токен случайный, а не увеличенный счётчик: так инвалидация
+    не теряется даже при одновременных вызовах на бэкендах без
+    атомарного incr.
+    """
+    _cache().set(GENERATION_KEY, _new_token(), None)
+
+
+def _record(key, outcome):
+    cache = _cache()
+    stats_key = STATS_KEY % outcome
+    cache.add(stats_key, 0, None)
+    try:
+        cache.incr(stats_key)
+    except ValueError:
+        cache.set(stats_key, 1, None)
+    feed_cache_accessed.send(sender=None, key=key, outcome=outcome)
+
+
+def stats():
+    """Счётчики попаданий и промахов для мониторинга."""
+    keys = [STATS_KEY % outcome for outcome in OUTCOMES]
+    values = _cache().get_many(keys)
+    return {
+        outcome: values.get(STATS_KEY % outcome, 0) for outcome in OUTCOMES
+    }
+
+
+def make_key(*parts):
+    digest = hashlib.md5(
+        "\x1f".join(str(part) for part in parts).encode()
+    ).hexdigest()
+    return f"feed:page:{digest}"
+
+
+def get_or_compute(key, compute, timeout=None):
+    """Возвращает значение текущего поколения, пересчитывая его один раз."""
+    cache = _cache()
+    timeout = timeout or settings.FEED_CACHE_TIMEOUT
+    current = generation()
+    stored = cache.get(key)
+    if stored is not None and stored[0] == current:
+        _record(key, "hit")
+        return stored[1]
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, current, settings.FEED_CACHE_LOCK_TIMEOUT):
+        try:
+            value = compute()
+            if not may_lag():
+                cache.set(key, (current, value), timeout)
+        finally:
+            cache.delete(lock_key)
+        _record(key, "miss")
+        return value
+    if stored is not None:
+        _record(key, "stale")
+        return stored[1]
+    # Значения ещё нет вовсе: недолго ждём соседний процесс, который уже
+    # его считает, и только потом идём в базу сами.
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        stored = cache.get(key)
+        if stored is not None:
+            _record(key, "hit" if stored[0] == current else "stale")
+            return stored[1]
+    _record(key, "miss")
+    return compute()
+
+
+def cached_paginate(request, queryset, name, per_page=None):
+    """То же, что paginate(), но страница ленты берётся из кеша.
+
+    В кеш попадают только объекты страницы и общее число записей (или
+    признак следующей страницы без COUNT),
+    сам queryset при этом не вычисляется.
+    """
+    per_page = per_page or settings.PER_PAGE
+    key = make_key(
+        name, per_page, request.GET.get("page"),
+        request.GET.get(CURSOR_PARAM), settings.CURSOR_PAGINATION,
+        settings.PAGINATION_COUNT,
+    )
+
+    def compute():
+        paginator, page = paginate(request, queryset, per_page)
+        if isinstance(paginator, CursorPaginator):
+            return page
+        if isinstance(paginator, UncountedPaginator):
+            return (None, page.number, list(page.object_list),
+                    page.has_next())
+        return paginator.count, page.number, list(page.object_list)
+
+    snapshot = get_or_compute(key, compute)
+    if not isinstance(snapshot, tuple):
+        return CursorPaginator(queryset, per_page), snapshot
+    if snapshot[0] is None:
+        _, number, object_list, has_next = snapshot
+        paginator = UncountedPaginator(queryset, per_page)
+        return paginator, UncountedPage(
+            object_list, number, paginator, has_next
+        )
+    count, number, object_list = snapshot
+    paginator = Paginator(queryset, per_page)
+    # count — cached_property, подставляем посчитанное значение.
+    paginator.count = count
+    return paginator, Page(object_list, number, paginator)
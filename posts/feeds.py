@@ -0,0 +1,158 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import FilteredRelation, Q
+
+from tasks.queue import task
+from yatube.sqlite import bulk_insert
+
+from .models import FeedEntry, Follow, FollowSuggestion, Post, UserCounter
+
+# Записи лент подписчиков автора дальше length-й по порядку ленты.
+# Нумеруются только ленты длиннее length: их отбирает подсчёт по индексу
+# (user, pub_date, post) без чтения таблицы, а остальные ленты окно и
+# DELETE не трогают.
+TRIM_FOLLOWERS_SQL = f"""
+    DELETE FROM {FeedEntry._meta.db_table} WHERE id IN (
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC
+            ) AS position
+            FROM {FeedEntry._meta.db_table}
+            WHERE user_id IN (
+                SELECT user_id FROM {FeedEntry._meta.db_table}
+                WHERE user_id IN (
+                    SELECT user_id FROM {Follow._meta.db_table}
+                    WHERE author_id = %s
+                )
+                GROUP BY user_id HAVING COUNT(*) > %s
+            )
+        ) WHERE position > %s
+    )
+"""
+
+
+def feed_queryset(**filters):
+    """Общий queryset для лент и карточек постов.
+
+    Автор и группа подтягиваются одним JOIN, а число комментариев хранится
+    в самом посте, поэтому includes/post_item.html не делает
+    дополнительных запросов на каждую карточку.
+    """
+    return Post.objects.filter(**filters).select_related("author", "group")
+
+
+def _fans_out(author_id):
+    """Раскладываются ли посты автора по лентам подписчиков."""
+    followers = UserCounter.objects.filter(user_id=author_id).values_list(
+        "followers_count", flat=True
+    ).first() or 0
+    return followers <= settings.FOLLOW_FEED_FANOUT_LIMIT
+
+
+def follow_feed_queryset(user):
+    """Лента постов авторов, на которых подписан user.
+
+    В материализованном режиме посты берутся из FeedEntry, а посты
+    популярных авторов, которые не раскладываются по лентам, читаются
+    напрямую (гибридная схема).
+    """
+    if not settings.FOLLOW_FEED_MATERIALIZED:
+        return feed_queryset(author__following__user=user)
+    popular = list(Follow.objects.filter(
+        user=user,
+        author__counters__followers_count__gt=(
+            settings.FOLLOW_FEED_FANOUT_LIMIT
+        ),
+    ).values_list("author_id", flat=True))
+    if not popular:
+        # Только входящие: читаем по индексу FeedEntry (user, pub_date)
+        # без сортировки, поэтому и порядок задаём по его колонкам.
+        return feed_queryset().annotate(inbox=FilteredRelation(
+            "feed_entries", condition=Q(feed_entries__user=user),
+        )).filter(inbox__user=user).order_by(
+            "-inbox__pub_date", "-inbox__post__id"
+        )
+    inbox = FeedEntry.objects.filter(user=user).values("post_id")
+    return feed_queryset().filter(
+        Q(id__in=inbox) | Q(author_id__in=popular)
+    )
+
+
+def fan_out_post(post, batch_size=1000):
+    """Кладёт новый пост в ленты всех подписчиков автора.
+
+    Ленты подписчиков сразу обрезаются до FOLLOW_FEED_LENGTH.
+    """
+    if not _fans_out(post.author_id):
+        return 0
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        "user_id", flat=True
+    )
+    added = bulk_insert(FeedEntry, (
+        FeedEntry(user_id=user_id, post_id=post.id, pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    ), batch_size, ignore_conflicts=True)
+    trim_followers_feeds(post.author_id)
+    return added
+
+
+@task(priority=5)
+def fan_out(post_id):
+    """Раскладка поста по лентам в фоне; удалённый пост пропускается."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return 0
+    return fan_out_post(post)
+
+
+def backfill_feed(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    if not _fans_out(author_id):
+        return 0
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        "-pub_date", "-id"
+    ).values_list("id", "pub_date")[:settings.FOLLOW_FEED_LENGTH]
+    entries = [
+        FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts
+    ]
+    FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    return len(entries)
+
+
+def prune_feed(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    return FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()[0]
+
+
+def trim_feed(user_id, length=None):
+    """Оставляет в ленте только length самых новых записей."""
+    length = length or settings.FOLLOW_FEED_LENGTH
+    stale = list(
+        FeedEntry.objects.filter(user_id=user_id)
+        .order_by("-pub_date", "-post_id")
+        .values_list("pk", flat=True)[length:]
+    )
+    return FeedEntry.objects.filter(pk__in=stale).delete()[0]
+
+
+def trim_followers_feeds(author_id, length=None):
+    """trim_feed для подписчиков автора, чьи ленты длиннее length."""
+    length = length or settings.FOLLOW_FEED_LENGTH
+    with connection.cursor() as cursor:
+        cursor.execute(TRIM_FOLLOWERS_SQL, [author_id, length, length])
+        return cursor.rowcount
+
+
+def suggested_authors(user, limit=None):
+    """Рекомендации «Кого почитать», рассчитанные recommend_follows.
+
+    Авторы, на которых читатель подписался после расчёта, отсеиваются
+    при чтении.
+    """
+    limit = limit or settings.FOLLOW_SUGGESTIONS_SHOWN
+    return FollowSuggestion.objects.filter(user=user).exclude(
+        author__following__user=user
+    ).select_related("author").order_by("-score", "author_id")[:limit]
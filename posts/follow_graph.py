@@ -0,0 +1,157 @@
+"""Рекомендации подписок, рассчитываемые пакетно по графу Follow.
+
+Граф целиком загружается в массивы NumPy: id пользователей сжимаются в
+индексы 0..n-1, а подписки становятся разреженной матрицей A (n x n,
+A[u, a] = 1, если u подписан на a). Для пачки читателей B = A[rows]:
+
+* друзья друзей — B @ A: на сколько авторов из подписок u сами
+  подписаны на x;
+* совместные подписки — S @ A, где S — косинусное сходство читателей по
+  общим авторам (B @ A.T, нормированное на число подписок). Авторы, у
+  которых подписчиков больше hub_limit, в сходстве не участвуют: общая
+  подписка на них мало говорит о вкусах, а строки S стали бы плотными.
+
+Оценка — взвешенная сумма обеих частей. Сам читатель и авторы, на
+которых он уже подписан, отбрасываются, а top лучших сохраняются в
+FollowSuggestion — по пачке в транзакции. Страницы читают готовые
+строки и сами ничего не считают.
+"""
+import time
+from itertools import chain
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from scipy import sparse
+
+from .models import Follow, FollowSuggestion
+
+INSERT_SQL = (
+    f"INSERT INTO {FollowSuggestion._meta.db_table} "
+    "(user_id, author_id, score, mutual, computed) "
+    "VALUES (%s, %s, %s, %s, %s)"
+)
+
+
+def load_graph(chunk_size=100000):
+    """Пара (ids, A): отсортированные id пользователей и матрица подписок."""
+    edges = Follow.objects.filter(author__isnull=False).values_list(
+        "user_id", "author_id"
+    )
+    pairs = np.fromiter(
+        chain.from_iterable(edges.iterator(chunk_size=chunk_size)),
+        dtype=np.int64,
+    )
+    ids, compact = np.unique(pairs, return_inverse=True)
+    users, authors = compact.reshape(-1, 2).T
+    graph = sparse.csr_matrix(
+        (np.ones(len(users), dtype=np.float32), (users, authors)),
+        shape=(len(ids), len(ids)),
+    )
+    return ids, graph
+
+
+def _top(scores, friends, followed, row, top):
+    """Индексы и оценки лучших авторов для одной строки пачки."""
+    start, end = scores.indptr[row], scores.indptr[row + 1]
+    columns, values = scores.indices[start:end], scores.data[start:end]
+    start, end = followed.indptr[row], followed.indptr[row + 1]
+    keep = (values > 0) & ~np.isin(columns, followed.indices[start:end])
+    columns, values = columns[keep], values[keep]
+    if len(columns) > top:
+        best = np.argpartition(-values, top)[:top]
+        columns, values = columns[best], values[best]
+    # При равных оценках выше автор с меньшим id: результат стабилен.
+    order = np.lexsort((columns, -values))
+    columns, values = columns[order], values[order]
+    start, end = friends.indptr[row], friends.indptr[row + 1]
+    known = friends.indices[start:end]
+    found = np.searchsorted(known, columns)
+    mutual = np.zeros(len(columns), dtype=np.int64)
+    hit = found < len(known)
+    hit[hit] = known[found[hit]] == columns[hit]
+    mutual[hit] = friends.data[start:end][found[hit]]
+    return columns, values, mutual
+
+
+def _store(ids, start, stop, rows):
+    """Заменяет рекомендации пользователей с id от ids[start] до ids[stop].
+
+    Границы диапазона доходят до соседних пачек, так что заодно
+    удаляются рекомендации тех, кто выпал из графа. Строки вставляются
+    одним executemany: подготовка значений в bulk_create занимала
+    больше времени, чем весь расчёт.
+    """
+    stale = FollowSuggestion.objects.all()
+    if start > 0:
+        stale = stale.filter(user_id__gte=int(ids[start]))
+    if stop < len(ids):
+        stale = stale.filter(user_id__lt=int(ids[stop]))
+    with transaction.atomic():
+        stale.delete()
+        with connection.cursor() as cursor:
+            cursor.executemany(INSERT_SQL, rows)
+
+
+def recommend(top=None, batch_size=500, weights=None, hub_limit=None):
+    """Пересчитывает рекомендации всех читателей; возвращает статистику."""
+    top = top or settings.FOLLOW_SUGGESTIONS_STORED
+    weights = weights or settings.FOLLOW_SUGGESTION_WEIGHTS
+    if hub_limit is None:
+        hub_limit = settings.FOLLOW_SUGGESTION_HUB_LIMIT
+    started = time.perf_counter()
+    computed = connection.ops.adapt_datetimefield_value(timezone.now())
+    ids, graph = load_graph()
+    stats = {"users": len(ids), "follows": graph.nnz, "suggestions": 0}
+    if not len(ids):
+        FollowSuggestion.objects.all().delete()
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        return stats
+
+    followers = np.asarray(graph.sum(axis=0)).ravel()
+    similar_graph = graph @ sparse.diags(
+        (followers <= hub_limit).astype(np.float32)
+    )
+    degree = np.asarray(similar_graph.sum(axis=1)).ravel()
+    norm = np.zeros_like(degree)
+    np.divide(1, np.sqrt(degree), out=norm, where=degree > 0)
+    similar_graph_t = similar_graph.T.tocsr()
+
+    for start in range(0, len(ids), batch_size):
+        stop = min(start + batch_size, len(ids))
+        batch = graph[start:stop]
+        friends = (batch @ graph).tocsr()
+        similarity = (
+            sparse.diags(norm[start:stop]) @ (
+                similar_graph[start:stop] @ similar_graph_t
+            ) @ sparse.diags(norm)
+        )
+        scores = (
+            weights["friends"] * friends
+            + weights["cofollow"] * (similarity @ graph)
+        ).tocsr()
+        # Сам читатель — не рекомендация.
+        batch_self = sparse.csr_matrix(
+            (np.ones(stop - start, dtype=np.float32),
+             (np.arange(stop - start), np.arange(start, stop))),
+            shape=batch.shape,
+        )
+        followed = (batch + batch_self).tocsr()
+        friends.sort_indices()
+        rows = []
+        for row in range(stop - start):
+            columns, values, mutual = _top(
+                scores, friends, followed, row, top
+            )
+            user_id = int(ids[start + row])
+            rows.extend(
+                (user_id, author_id, value, common, computed)
+                for author_id, value, common in zip(
+                    ids[columns].tolist(), values.tolist(), mutual.tolist()
+                )
+            )
+        _store(ids, start, stop, rows)
+        stats["suggestions"] += len(rows)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_databases,
+                               setup_test_environment, teardown_databases,
+                               teardown_test_environment)
+from django.urls import reverse
+
+from posts import benchmark
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Задержка главной страницы для авторизованного читателя через "
+        "локальный WSGI-сервер при трёх режимах соединений с базой: новое "
+        "соединение на каждый запрос, пул и постоянные соединения "
+        "(CONN_MAX_AGE). Данные создаются во временном файле SQLite; "
+        "отчёт с экономией на запрос — в JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--posts", type=int, default=200)
+        parser.add_argument("--output", default="bench_connections.json")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Замер рассчитан на SQLite")
+        loggers = [
+            logging.getLogger(name)
+            for name in ("django.request", "yatube.timing")
+        ]
+        levels = [logger.level for logger in loggers]
+        setup_test_environment()
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(
+            tempfile.mkdtemp(), "bench_connections.sqlite3"
+        )
+        # Без кеша страниц каждый запрос доходит до базы; сессия и
+        # пользователь читаются из неё при каждом запросе.
+        with override_settings(PAGE_CACHE=False):
+            old_config = setup_databases(verbosity=0, interactive=False)
+            driver = None
+            try:
+                sample = benchmark.seed(posts=options["posts"])
+                driver = benchmark.WSGIDriver(
+                    User.objects.get(username=sample["username"])
+                )
+                for logger in loggers:
+                    logger.setLevel(logging.CRITICAL)
+                report = benchmark.run_connection_modes(
+                    driver, reverse("index"), options["requests"],
+                    options["warmup"],
+                )
+            finally:
+                for logger, level in zip(loggers, levels):
+                    logger.setLevel(level)
+                if driver is not None:
+                    driver.close()
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+        with open(options["output"], "w", encoding="utf-8") as output:
+            json.dump(report, output, ensure_ascii=False, indent=2,
+                      sort_keys=True)
+            output.write("\n")
+        for mode, summary in report["modes"].items():
+            self.stdout.write(
+                f"{mode:<12} mean {summary['mean_ms']:>8.3f} ms  "
+                f"p95 {summary['p95_ms']:>8.3f} ms  "
+                f"новых соединений {summary['connections_opened']:>5}  "
+                f"экономия {summary['saved_ms']:>7.3f} ms/запрос"
+            )
+        self.stdout.write(f"Отчёт: {options['output']}")
@@ -0,0 +1,89 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+
+from posts import dataset
+from posts.models import Post
+from posts.pagination import CursorPaginator
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает задержку OFFSET- и keyset-паджинации главной ленты "
+        "на разных глубинах. Данные создаются во временной транзакции "
+        "и откатываются после замера."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=50000)
+        parser.add_argument("--per-page", type=int, default=10)
+        parser.add_argument(
+            "--depths", type=int, nargs="+",
+            default=[1, 10, 100, 1000, 4000],
+            help="Номера страниц, на которых выполняется замер",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options["posts"], options["batch_size"])
+                self.measure(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, total, batch_size):
+        dataset.generate(
+            users=1, groups=0, posts=total, comments=0, follows=0,
+            prefix="bench_pagination_", batch_size=batch_size,
+        )
+        self.stdout.write(f"Создано постов: {total}")
+
+    def measure(self, options):
+        per_page = options["per_page"]
+        queryset = Post.objects.select_related("group")
+        total_pages = Paginator(queryset, per_page).num_pages
+        header = f"{'page':>8} {'offset, ms':>12} {'cursor, ms':>12}"
+        self.stdout.write(header)
+        for depth in options["depths"]:
+            if depth > total_pages:
+                continue
+            cursor = self.cursor_for(queryset, per_page, depth)
+            offset_ms = self.timeit(
+                lambda: list(Paginator(queryset, per_page).page(depth)),
+                options["repeat"],
+            )
+            cursor_ms = self.timeit(
+                lambda: list(CursorPaginator(queryset, per_page).page(cursor)),
+                options["repeat"],
+            )
+            self.stdout.write(
+                f"{depth:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f}"
+            )
+
+    def cursor_for(self, queryset, per_page, depth):
+        """Токен страницы depth, полученный без прохода по всей ленте."""
+        if depth == 1:
+            return None
+        boundary = queryset.order_by("-pub_date", "-id")[
+            (depth - 1) * per_page - 1
+        ]
+        return CursorPaginator(queryset, per_page).make_cursor(boundary)
+
+    @staticmethod
+    def timeit(func, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
@@ -0,0 +1,102 @@
+import json
+import logging
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (setup_databases, setup_test_environment,
+                               teardown_databases, teardown_test_environment)
+
+from posts import benchmark
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный замер всех маршрутов posts и users: p50/p95/p99 "
+        "задержки, SQL-запросы на запрос и пропускная способность. Данные "
+        "создаются в отдельной тестовой базе, которая удаляется после "
+        "замера; отчёт пишется в JSON для сравнения между коммитами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--groups", type=int, default=5)
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--comments", type=int, default=2000)
+        parser.add_argument("--follows", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--requests", type=int, default=20,
+            help="Число замеряемых запросов на маршрут",
+        )
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument(
+            "--mode", choices=("client", "wsgi"), default="client",
+            help="Тестовый клиент Django или HTTP к локальному WSGI-серверу",
+        )
+        parser.add_argument("--output", default="bench_routes.json")
+
+    def handle(self, *args, **options):
+        request_logger = logging.getLogger("django.request")
+        log_level = request_logger.level
+        setup_test_environment()
+        if options["mode"] == "wsgi" and connection.vendor == "sqlite":
+            # Потоку сервера нужна та же база, а не своя копия в памяти.
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                tempfile.mkdtemp(), "bench_routes.sqlite3"
+            )
+        old_config = setup_databases(verbosity=0, interactive=False)
+        drivers = {}
+        try:
+            dataset = {
+                name: options[name]
+                for name in ("users", "groups", "posts", "comments",
+                             "follows", "seed")
+            }
+            sample = benchmark.seed(
+                options["users"], options["groups"], options["posts"],
+                options["comments"], options["follows"], options["seed"],
+            )
+            author = User.objects.get(username=sample["username"])
+            if options["mode"] == "wsgi":
+                server = benchmark.WSGIDriver.start_server()
+                drivers["anonymous"] = benchmark.WSGIDriver(server=server)
+                drivers["author"] = benchmark.WSGIDriver(author, server)
+            else:
+                drivers["anonymous"] = benchmark.ClientDriver()
+                drivers["author"] = benchmark.ClientDriver(author)
+            # Страницы 404 и 500 входят в замер, их предупреждения не
+            # нужны. Уровень задаём после get_wsgi_application(): она
+            # заново применяет настройки логирования.
+            request_logger.setLevel(logging.CRITICAL)
+            report = benchmark.run(
+                sample, drivers, options["requests"], options["warmup"],
+                log=self.log,
+            )
+            report["dataset"] = dataset
+        finally:
+            if options["mode"] == "wsgi" and drivers:
+                drivers["anonymous"].server.shutdown()
+                drivers["anonymous"].server.server_close()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            request_logger.setLevel(log_level)
+        with open(options["output"], "w", encoding="utf-8") as output:
+            json.dump(report, output, ensure_ascii=False, indent=2,
+                      sort_keys=True)
+            output.write("\n")
+        total = report["total"]
+        self.stdout.write(
+            f"Запросов: {total['requests']}, {total['rps']} в секунду; "
+            f"отчёт: {options['output']}"
+        )
+
+    def log(self, key, summary):
+        self.stdout.write(
+            f"{key:<40} p50 {summary['p50_ms']:>8.2f} "
+            f"p95 {summary['p95_ms']:>8.2f} p99 {summary['p99_ms']:>8.2f} "
+            f"ms  queries {summary['queries']!s:>4}  "
+            f"status {','.join(map(str, summary['status']))}"
+        )
@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_databases,
+                               setup_test_environment, teardown_databases,
+                               teardown_test_environment)
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Параллельные писатели и читатели на временном файле SQLite: "
+        "пропускная способность и число ошибок \"database is locked\". "
+        "С --no-tuning PRAGMA, BEGIN IMMEDIATE и повторы записи "
+        "отключаются, чтобы сравнить с настройками по умолчанию."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument(
+            "--requests", type=int, default=30,
+            help="Число запросов каждого потока",
+        )
+        parser.add_argument("--posts", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--no-tuning", action="store_true")
+        parser.add_argument("--output", default="bench_sqlite.json")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Замер рассчитан на SQLite")
+        overrides = {"PAGE_CACHE": False}
+        if options["no_tuning"]:
+            overrides.update(
+                SQLITE_PRAGMAS={}, SQLITE_IMMEDIATE_TRANSACTIONS=False,
+                SQLITE_WRITE_RETRIES=0,
+            )
+        loggers = [
+            logging.getLogger(name)
+            for name in ("django.request", "yatube.timing")
+        ]
+        levels = [logger.level for logger in loggers]
+        setup_test_environment()
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(
+            tempfile.mkdtemp(), "bench_sqlite.sqlite3"
+        )
+        with override_settings(**overrides):
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                threads = options["writers"] + options["readers"]
+                sample = benchmark.seed(
+                    users=max(threads, 10), posts=options["posts"],
+                    comments=options["posts"], follows=threads * 5,
+                    random_seed=options["seed"],
+                )
+                # Ошибки блокировки считаются в отчёте, а время запросов
+                # под нагрузкой заведомо выходит за бюджеты.
+                for logger in loggers:
+                    logger.setLevel(logging.CRITICAL)
+                report = benchmark.run_concurrent(
+                    sample, options["writers"], options["readers"],
+                    options["requests"],
+                )
+            finally:
+                for logger, level in zip(loggers, levels):
+                    logger.setLevel(level)
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+        report["tuning"] = not options["no_tuning"]
+        with open(options["output"], "w", encoding="utf-8") as output:
+            json.dump(report, output, ensure_ascii=False, indent=2,
+                      sort_keys=True)
+            output.write("\n")
+        for role in ("writers", "readers"):
+            summary = report[role]
+            self.stdout.write(
+                f"{role:<8} {summary['throughput']:>8} запросов/с  "
+                f"p95 {summary['p95_ms']:>8.2f} ms  "
+                f"блокировок {summary['lock_errors']}  "
+                f"ошибок {summary['errors']}"
+            )
+        total = report["total"]
+        self.stdout.write(
+            f"Запросов: {total['requests']}, {total['rps']} в секунду, "
+            f"блокировок: {total['lock_errors']}; отчёт: {options['output']}"
+        )
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.page_cache import purge
+from posts.trending import decay, rebuild_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Затухание очков рейтинга «В тренде». Запускается раз в "
+        "TRENDING_DECAY_INTERVAL секунд (cron); --rebuild пересчитывает "
+        "очки по датам комментариев."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seconds", type=float,
+            default=settings.TRENDING_DECAY_INTERVAL,
+            help="За сколько секунд затухают очки",
+        )
+        parser.add_argument("--rebuild", action="store_true")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options["rebuild"]:
+                posts = rebuild_scores()
+            else:
+                posts = decay(options["seconds"])
+        purge("trending")
+        self.stdout.write(f"Постов в рейтинге обновлено: {posts}")
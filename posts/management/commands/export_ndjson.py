@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import MODELS, export_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает пользователей, группы, посты, комментарии и подписки "
+        "в NDJSON (по строке на запись) с постоянным расходом памяти. "
+        "Скорость выгрузки выводится в stderr."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default="-",
+            help="Файл для выгрузки; по умолчанию stdout",
+        )
+        parser.add_argument(
+            "--models", default=",".join(MODELS),
+            help="Таблицы через запятую в порядке выгрузки",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        labels = [label.strip() for label in options["models"].split(",")]
+        if options["output"] == "-":
+            output = self.stdout
+        else:
+            output = open(options["output"], "w", encoding="utf-8")
+        started = time.perf_counter()
+        rows = 0
+        try:
+            for line in export_rows(labels, options["chunk_size"]):
+                output.write(line)
+                rows += 1
+        finally:
+            if output is not self.stdout:
+                output.close()
+        seconds = time.perf_counter() - started
+        self.stderr.write(
+            f"Выгружено строк: {rows} за {seconds:.2f} с, "
+            f"{round(rows / seconds) if seconds else 0} строк/с"
+        )
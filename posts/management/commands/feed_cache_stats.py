@@ -0,0 +1,12 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts import feed_cache
+
+
+class Command(BaseCommand):
+    help = "Выводит счётчики попаданий и промахов кеша лент в JSON."
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(feed_cache.stats()))
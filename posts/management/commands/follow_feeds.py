@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.feeds import backfill_feed, trim_feed
+from posts.models import FeedEntry, Follow
+
+
+class Command(BaseCommand):
+    help = (
+        "Обслуживает материализованные ленты подписок: обрезает их до "
+        "FOLLOW_FEED_LENGTH, а с --rebuild заново заполняет по таблице "
+        "подписок (например, после включения FOLLOW_FEED_MATERIALIZED "
+        "или смены FOLLOW_FEED_FANOUT_LIMIT)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true")
+        parser.add_argument("--length", type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            with transaction.atomic():
+                FeedEntry.objects.all().delete()
+                follows = Follow.objects.values_list("user_id", "author_id")
+                added = sum(
+                    backfill_feed(user_id, author_id)
+                    for user_id, author_id in follows.iterator()
+                )
+            self.stdout.write(f"Добавлено записей в ленты: {added}")
+        readers = FeedEntry.objects.values_list(
+            "user_id", flat=True
+        ).distinct()
+        removed = sum(
+            trim_feed(user_id, options["length"])
+            for user_id in list(readers)
+        )
+        self.stdout.write(f"Удалено устаревших записей: {removed}")
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import dataset
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет текущую базу синтетическими пользователями, группами, "
+        "постами, комментариями и подписками заданного объёма. Авторы и "
+        "подписки распределены по степенному закону, результат "
+        "определяется --seed. Для замеров ленты, профиля и follow_index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=20000)
+        parser.add_argument("--comments", type=int, default=40000)
+        parser.add_argument("--follows", type=int, default=20000)
+        parser.add_argument(
+            "--days", type=int, default=365,
+            help="На сколько дней назад разнесены даты публикации",
+        )
+        parser.add_argument(
+            "--exponent", type=float, default=1.1,
+            help="Показатель степенного закона активности авторов",
+        )
+        parser.add_argument(
+            "--images", type=int, default=0,
+            help="Число картинок-заглушек в MEDIA_ROOT",
+        )
+        parser.add_argument(
+            "--image-ratio", type=float, default=0.2,
+            help="Доля постов с картинкой, если --images больше нуля",
+        )
+        parser.add_argument(
+            "--password",
+            help="Пароль всех пользователей; по умолчанию вход невозможен",
+        )
+        parser.add_argument("--prefix", default=dataset.PREFIX)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--replace", action="store_true",
+            help="Сначала удалить данные, созданные с тем же префиксом",
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if options["replace"]:
+            dataset.clear(prefix)
+        elif User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f"Пользователи с префиксом {prefix!r} уже есть; "
+                "укажите --replace или другой --prefix"
+            )
+        started = time.perf_counter()
+        summary = dataset.generate(
+            users=options["users"], groups=options["groups"],
+            posts=options["posts"], comments=options["comments"],
+            follows=options["follows"], days=options["days"],
+            exponent=options["exponent"], images=options["images"],
+            image_ratio=options["image_ratio"],
+            password=options["password"], prefix=prefix,
+            random_seed=options["seed"], batch_size=options["batch_size"],
+        )
+        seconds = time.perf_counter() - started
+        rows = sum(
+            summary[name]
+            for name in ("users", "groups", "posts", "comments", "follows")
+        )
+        for name, value in summary.items():
+            self.stdout.write(f"{name:<12} {value}")
+        self.stdout.write(
+            f"Создано строк: {rows} за {seconds:.2f} с, "
+            f"{round(rows / seconds) if seconds else 0} строк/с"
+        )
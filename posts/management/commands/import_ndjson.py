@@ -0,0 +1,56 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import Importer, rate, refresh_derived
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает NDJSON, выгруженный export_ndjson, пачками bulk_create "
+        "с сохранением id и дат, затем пересчитывает счётчики, поисковый "
+        "индекс и ленты. Рассчитана на пустую базу; с "
+        "--ignore-conflicts уже существующие записи пропускаются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "input", nargs="?", default="-",
+            help="Файл NDJSON; по умолчанию stdin",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--ignore-conflicts", action="store_true")
+        parser.add_argument(
+            "--skip-refresh", action="store_true",
+            help="Не пересчитывать счётчики, индекс поиска и ленты",
+        )
+
+    def handle(self, *args, **options):
+        importer = Importer(
+            batch_size=options["batch_size"],
+            ignore_conflicts=options["ignore_conflicts"],
+        )
+        if options["input"] == "-":
+            source = sys.stdin
+        else:
+            source = open(options["input"], encoding="utf-8")
+        started = time.perf_counter()
+        try:
+            stats = importer.load(source)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        for label, table in stats.items():
+            self.stdout.write(
+                f"{label:<14} {table['rows']:>10} строк "
+                f"{rate(table):>10} строк/с"
+            )
+        if not options["skip_refresh"]:
+            refresh_derived(batch_size=options["batch_size"])
+        seconds = time.perf_counter() - started
+        rows = sum(table["rows"] for table in stats.values())
+        self.stdout.write(
+            f"Загружено строк: {rows} за {seconds:.2f} с, "
+            f"{round(rows / seconds) if seconds else 0} строк/с"
+        )
@@ -0,0 +1,48 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import generate
+
+
+def generate_thumbnails(image_name):
+    # Пул передаёт функцию в процессы по имени, а generate — задача
+    # очереди, подменившая одноимённую функцию модуля.
+    return generate.func(image_name)
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт миниатюры всех размеров POST_THUMBNAIL_SIZES для "
+        "картинок существующих постов в нескольких процессах."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes", type=int, default=multiprocessing.cpu_count()
+        )
+        parser.add_argument("--chunk-size", type=int, default=20)
+
+    def handle(self, *args, **options):
+        images = list(
+            Post.objects.exclude(image="").exclude(image__isnull=True)
+            .values_list("image", flat=True).distinct()
+        )
+        # Дочерние процессы не должны унаследовать открытые соединения.
+        connections.close_all()
+        started = time.monotonic()
+        with multiprocessing.Pool(options["processes"]) as pool:
+            done = 0
+            for _ in pool.imap_unordered(
+                generate_thumbnails, images, options["chunk_size"]
+            ):
+                done += 1
+                if done % 100 == 0:
+                    self.stdout.write(f"Обработано картинок: {done}")
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Обработано картинок: {len(images)} за {elapsed:.1f} с"
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Заново строит индекс полнотекстового поиска по всем постам и "
+        "комментариям (например, после смены SEARCH_BACKEND)."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            posts = rebuild_index()
+        backend = "FTS5" if fts_enabled() else "SearchTerm"
+        self.stdout.write(f"Проиндексировано постов: {posts} ({backend})")
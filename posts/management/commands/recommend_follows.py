@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.follow_graph import recommend
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает рекомендации «Кого почитать»: загружает граф "
+        "подписок в разреженную матрицу и по пачкам читателей считает "
+        "оценки «друзей друзей» и совместных подписок."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top", type=int, default=settings.FOLLOW_SUGGESTIONS_STORED,
+            help="Сколько рекомендаций хранить на читателя",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Читателей в пачке: строк матриц в памяти и транзакции",
+        )
+        parser.add_argument(
+            "--hub-limit", type=int,
+            default=settings.FOLLOW_SUGGESTION_HUB_LIMIT,
+        )
+
+    def handle(self, *args, **options):
+        stats = recommend(
+            top=options["top"], batch_size=options["batch_size"],
+            hub_limit=options["hub_limit"],
+        )
+        self.stdout.write(
+            "Пользователей в графе: {users}, подписок: {follows}, "
+            "сохранено рекомендаций: {suggestions} за {seconds} с".format(
+                **stats
+            )
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import recount_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает денормализованные счётчики постов, подписчиков, "
+        "подписок и комментариев по исходным таблицам."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            created, posts = recount_counters(
+                batch_size=options["batch_size"]
+            )
+        self.stdout.write(
+            f"Создано строк счётчиков: {created}; "
+            f"пересчитано постов: {posts}"
+        )
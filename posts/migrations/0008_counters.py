@@ -0,0 +1,90 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(field)
+            .annotate(total=Count("pk")).values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    # Копия posts.counters.recount_counters на момент миграции: миграция
+    # не должна зависеть от кода приложения, который потом изменится.
+    alias = schema_editor.connection.alias
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    Follow = apps.get_model("posts", "Follow")
+    UserCounter = apps.get_model("posts", "UserCounter")
+
+    UserCounter.objects.using(alias).bulk_create(
+        UserCounter(user_id=pk)
+        for pk in User.objects.using(alias).values_list("pk", flat=True)
+    )
+    UserCounter.objects.using(alias).update(
+        posts_count=_count(
+            Post.objects.filter(author=OuterRef("user")), "author"
+        ),
+        followers_count=_count(
+            Follow.objects.filter(author=OuterRef("user")), "author"
+        ),
+        following_count=_count(
+            Follow.objects.filter(user=OuterRef("user")), "user"
+        ),
+    )
+    Post.objects.using(alias).update(
+        comment_count=_count(
+            Comment.objects.filter(post=OuterRef("pk")), "post"
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0007_auto_20210121_1115'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.AlterField(
+            model_name='follow',
+            name='author',
+            field=models.ForeignKey(help_text='Автор интересного поста', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='following', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='follow',
+            name='user',
+            field=models.ForeignKey(help_text='Подписчик на автора поста', on_delete=django.db.models.deletion.CASCADE, related_name='follower', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('author', 'user'), name='unique_object'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
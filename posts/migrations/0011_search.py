@@ -0,0 +1,141 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:50
+
+import re
+from collections import Counter
+from itertools import groupby
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import OperationalError, migrations, models, transaction
+
+# Ниже — копия разбора текста и перестройки индекса из posts.search на
+# момент миграции: миграция не должна зависеть от кода приложения,
+# который потом изменится.
+FTS_TABLE = "posts_search"
+TOKEN_RE = re.compile(r"\w+")
+POST_WEIGHT = 2
+MIN_STEM = 3
+MAX_TERM = 64
+ENDINGS = sorted({
+    "иями", "ями", "ами", "ией", "иям", "ием", "иях",
+    "ого", "его", "ому", "ему", "ими", "ыми",
+    "ешь", "ете", "ишь", "ите", "ала", "ила", "ыла", "ена",
+    "ев", "ов", "ие", "ье", "ии", "ей", "ой", "ий", "ый", "ые", "ое",
+    "ее", "ая", "яя", "ую", "юю", "ою", "ею", "ям", "ем", "ам", "ом",
+    "им", "ым", "их", "ых", "ах", "ях", "ию", "ью", "ия", "ья",
+    "ть", "ет", "ит", "ут", "ют", "ат", "ят", "ал", "ил", "ло", "ли",
+    "ла", "ны", "но",
+    "а", "е", "и", "й", "о", "у", "ы", "ь", "ю", "я",
+    "ing", "ed", "es", "s",
+}, key=len, reverse=True)
+REFLEXIVE = ("ся", "сь")
+
+
+def stem(word):
+    word = word.lower().replace("ё", "е")
+    for suffix in REFLEXIVE:
+        if word.endswith(suffix) and len(word) - 2 >= MIN_STEM:
+            word = word[:-2]
+            break
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text):
+    return [
+        stem(word)[:MAX_TERM] for word in TOKEN_RE.findall(text or "")
+        if len(word) > 1 or word.isdigit()
+    ]
+
+
+def fts_enabled(connection):
+    if (getattr(settings, "SEARCH_BACKEND", "auto") == "python"
+            or connection.vendor != "sqlite"):
+        return False
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    try:
+        # Точка сохранения: без модуля fts5 остаёмся на обратном индексе.
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "text, comments, tokenize='unicode61')"
+            )
+    except OperationalError:
+        pass
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def fill_index(apps, schema_editor):
+    connection = schema_editor.connection
+    alias = connection.alias
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    SearchTerm = apps.get_model("posts", "SearchTerm")
+    use_fts = fts_enabled(connection)
+    comments = groupby(
+        Comment.objects.using(alias).filter(post__isnull=False)
+        .order_by("post_id").values_list("post_id", "text").iterator(),
+        key=lambda row: row[0],
+    )
+    pending = next(comments, None)
+    rows = Post.objects.using(alias).order_by("id").values_list("id", "text")
+    for post_id, text in rows.iterator():
+        while pending is not None and pending[0] < post_id:
+            pending = next(comments, None)
+        texts = []
+        if pending is not None and pending[0] == post_id:
+            texts = [comment_text for _, comment_text in pending[1]]
+            pending = next(comments, None)
+        post_terms = tokenize(text)
+        comment_terms = tokenize(" ".join(texts))
+        if use_fts:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, text, comments) "
+                    "VALUES (%s, %s, %s)",
+                    [post_id, " ".join(post_terms), " ".join(comment_terms)],
+                )
+            continue
+        weights = Counter(comment_terms)
+        for term in post_terms:
+            weights[term] += POST_WEIGHT
+        SearchTerm.objects.using(alias).bulk_create(
+            SearchTerm(term=term, post_id=post_id, weight=weight)
+            for term, weight in weights.items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('weight', models.PositiveIntegerField(verbose_name='Вес')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Пост')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_term'),
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.6 on 2026-10-18 22:36
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_scores(apps, schema_editor):
+    # Копия posts.trending.rebuild_scores на момент миграции: миграция
+    # не должна зависеть от кода приложения, который потом изменится.
+    alias = schema_editor.connection.alias
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    now = timezone.now()
+    weight = getattr(settings, "TRENDING_WEIGHTS", {}).get("comment", 1.0)
+    half_life = getattr(settings, "TRENDING_HALF_LIFE", 6 * 3600)
+    min_score = getattr(settings, "TRENDING_MIN_SCORE", 0.01)
+    horizon = half_life * max(math.log2(weight / min_score), 0)
+    comments = Comment.objects.using(alias).filter(
+        post__isnull=False, created__gt=now - timedelta(seconds=horizon)
+    ).values_list("post_id", "created")
+    scores = {}
+    for post_id, created in comments.iterator():
+        age = (now - created).total_seconds()
+        scores[post_id] = (
+            scores.get(post_id, 0) + weight * 0.5 ** (age / half_life)
+        )
+    Post.objects.using(alias).bulk_update([
+        Post(pk=pk, trending_score=score) for pk, score in scores.items()
+        if score >= min_score
+    ], ["trending_score"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Очки тренда'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-trending_score', '-id'], name='post_trending_idx'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
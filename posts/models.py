@@ -36,15 +36,54 @@ class Post(models.Model):
         help_text="Выберите группу",
     )
     image = models.ImageField(upload_to="posts/", blank=True, null=True)
+    comment_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Комментариев",
+    )
+    # Очки рейтинга «В тренде» (posts/trending.py)
+    trending_score = models.FloatField(
+        default=0, editable=False, verbose_name="Очки тренда",
+    )
 
     class Meta:
         """сортировка всех записей по заданному полю 'pub_date' """
 
-        ordering = ("-pub_date",)
+        ordering = ("-pub_date", "-id")
+        # Индексы повторяют порядок лент: главная, группа, профиль и
+        # подписки читают посты по убыванию (pub_date, id).
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_pub_date_idx"
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_pub_date_idx",
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_pub_date_idx",
+            ),
+            models.Index(
+                fields=["-trending_score", "-id"], name="post_trending_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # Счётчик комментариев и очки тренда ведут сигналы, поэтому при
+        # редактировании поста не перезаписываем их значениями из
+        # загруженного объекта. Новый объект с явным pk сохраняется
+        # обычным UPDATE-или-INSERT.
+        if not self._state.adding and not (kwargs.get("update_fields")
+                                           or kwargs.get("force_insert")):
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ("comment_count", "trending_score")
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -66,6 +105,15 @@ class Comment(models.Model):
         "date commenting", auto_now_add=True
     )
 
+    class Meta:
+        ordering = ("created", "id")
+        indexes = [
+            models.Index(
+                fields=["post", "created", "id"],
+                name="comment_post_created_idx",
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -89,3 +137,103 @@ class Follow(models.Model):
             fields=["author", "user"],
             name="unique_object"
         )]
+
+
+class FollowSuggestion(models.Model):
+    """Рекомендация подписки, рассчитанная командой recommend_follows."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="follow_suggestions",
+        verbose_name="Читатель",
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="suggested_to",
+        verbose_name="Рекомендуемый автор",
+    )
+    score = models.FloatField(verbose_name="Оценка")
+    # Сколько авторов из подписок читателя подписаны на рекомендуемого
+    mutual = models.PositiveIntegerField(
+        default=0, verbose_name="Общих подписок",
+    )
+    computed = models.DateTimeField(verbose_name="Рассчитана")
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=["user", "author"],
+            name="unique_follow_suggestion"
+        )]
+        indexes = [
+            models.Index(
+                fields=["user", "-score", "author"],
+                name="suggestion_user_score_idx",
+            ),
+        ]
+
+
+class UserCounter(models.Model):
+    """Денормализованные счётчики пользователя для профиля и карточки."""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="counters",
+        primary_key=True, verbose_name="Пользователь",
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0, verbose_name="Записей"
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, verbose_name="Подписчиков"
+    )
+    following_count = models.PositiveIntegerField(
+        default=0, verbose_name="Подписок"
+    )
+
+    @classmethod
+    def of(cls, user):
+        """Счётчики пользователя; нулевые, если строки ещё нет."""
+        try:
+            return user.counters
+        except cls.DoesNotExist:
+            return cls(user=user)
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок (fan-out on write)."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="feed_entries",
+        verbose_name="Читатель",
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="feed_entries",
+        verbose_name="Пост",
+    )
+    # Копия Post.pub_date: лента читается по индексу без сортировки
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=["user", "post"],
+            name="unique_feed_entry"
+        )]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="feed_entry_user_pub_date_idx",
+            ),
+        ]
+
+
+class SearchTerm(models.Model):
+    """Строка обратного индекса поиска: основа слова и её вес в посте.
+
+    Используется, когда база не поддерживает FTS5 (см. posts/search.py).
+    """
+    term = models.CharField(max_length=64, verbose_name="Основа слова")
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="search_terms",
+        verbose_name="Пост",
+    )
+    weight = models.PositiveIntegerField(verbose_name="Вес")
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=["term", "post"],
+            name="unique_search_term"
+        )]
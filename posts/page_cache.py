@@ -0,0 +1,127 @@
+"""Кеш готовых страниц для анонимных читателей.
+
+Страница хранится целиком (статус, заголовки, тело) под ключом из пути
+с параметрами и версий её областей: "index", "group:<slug>",
+"profile:<username>", "post:<id>" и общей "*", входящей в каждый ключ.
+Сигналы при изменении постов, комментариев, групп и подписок меняют
+версии затронутых областей (purge), и старые записи просто перестают
+находиться. Авторизованные пользователи и запросы кроме GET/HEAD кеш не
+используют; ответы с cookies в него не попадают.
+
+Анонимные ответы получают Cache-Control: public с коротким max-age и
+Vary: Cookie, поэтому их может держать и обратный прокси; страницы
+авторизованных помечаются private.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.dispatch import Signal
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from yatube.replicas import may_lag
+
+SCOPE_KEY = "page:scope:%s"
+ALL_PAGES = "*"
+
+# Отправляется при каждом запросе к закешированной вью; outcome — одно
+# из "hit", "miss" и "bypass".
+page_cache_accessed = Signal(providing_args=["key", "outcome"])
+
+
+def _cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def purge(*scopes):
+    """Делает устаревшими все страницы перечисленных областей."""
+    _cache().set_many(
+        {SCOPE_KEY % scope: uuid.uuid4().hex for scope in scopes}, None
+    )
+
+
+def purge_all():
+    purge(ALL_PAGES)
+
+
+def _versions(scopes):
+    cache = _cache()
+    keys = [SCOPE_KEY % scope for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, None)
+        versions.update(cache.get_many(list(missing)))
+    return [versions.get(key, "") for key in keys]
+
+
+def page_key(request, scopes):
+    parts = [request.get_full_path(), *_versions((ALL_PAGES, *scopes))]
+    digest = hashlib.md5("\x1f".join(parts).encode()).hexdigest()
+    return f"page:{digest}"
+
+
+def _send(key, outcome):
+    page_cache_accessed.send(sender=None, key=key, outcome=outcome)
+
+
+def _cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+    )
+
+
+def cache_anonymous_page(*scopes):
+    """Декоратор вью: кеш страницы для анонимных GET-запросов.
+
+    scopes — шаблоны областей, подставляются аргументы вью, например
+    "group:{slug}".
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (not settings.PAGE_CACHE
+                    or request.method not in ("GET", "HEAD")
+                    or request.user.is_authenticated):
+                _send(None, "bypass")
+                response = view(request, *args, **kwargs)
+                patch_cache_control(response, private=True)
+                return response
+            key = page_key(
+                request, [scope.format(**kwargs) for scope in scopes]
+            )
+            stored = _cache().get(key)
+            if stored is not None:
+                _send(key, "hit")
+                status, headers, content = stored
+                response = HttpResponse(content, status=status)
+                for header, value in headers:
+                    response[header] = value
+            else:
+                _send(key, "miss")
+                response = view(request, *args, **kwargs)
+                if _cacheable(response) and not may_lag():
+                    _cache().set(
+                        key,
+                        (response.status_code, list(response.items()),
+                         response.content),
+                        settings.PAGE_CACHE_TIMEOUT,
+                    )
+            if _cacheable(response):
+                patch_cache_control(
+                    response, public=True,
+                    max_age=settings.PAGE_CACHE_MAX_AGE,
+                )
+            patch_vary_headers(response, ("Cookie",))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,265 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_PARAM = "cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """Упаковывает значения ключа в непрозрачный токен для URL."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Распаковывает токен, выданный encode_cursor."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError) as error:
+        raise InvalidCursor(token) from error
+
+
+class CursorPage:
+    """Страница ленты, полученная по ключу (pub_date, id) без COUNT."""
+
+    is_cursor = True
+    number = None
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return "<CursorPage of %s items>" % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-паджинатор: стоимость страницы не зависит от её глубины.
+
+    Записи упорядочены по убыванию (pub_date, id); токен хранит ключ
+    последней (или первой) записи страницы и направление перехода.
+    Если queryset явно упорядочен по двум другим полям (например, по
+    денормализованной копии даты в связанной таблице), сортировка и
+    фильтрация идут по ним, а значения ключа по-прежнему берутся из
+    атрибутов date_field и id записи.
+
+    Ключом может быть и не дата (например, релевантность в поиске):
+    тогда parse_key восстанавливает его значение из токена. С
+    descending=False записи идут от старых к новым, как комментарии.
+    """
+
+    def __init__(self, object_list, per_page, date_field="pub_date",
+                 parse_key=parse_datetime, descending=True):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.date_field = date_field
+        self.parse_key = parse_key
+        self.descending = descending
+        ordering = getattr(object_list, "query", None)
+        ordering = ordering.order_by if ordering is not None else ()
+        if len(ordering) == 2:
+            self.order_fields = tuple(
+                field.lstrip("-") for field in ordering
+            )
+        else:
+            self.order_fields = (date_field, "id")
+        if any("__" in field for field in self.order_fields):
+            # Повторный filter() по многозначной связи добавил бы в запрос
+            # второй JOIN; аннотация переиспользует уже существующий.
+            self.object_list = object_list.annotate(
+                cursor_date=F(self.order_fields[0]),
+                cursor_id=F(self.order_fields[1]),
+            )
+            self.order_fields = ("cursor_date", "cursor_id")
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            return obj[self.date_field], obj["id"]
+        return getattr(obj, self.date_field), obj.id
+
+    def make_cursor(self, obj, backwards=False):
+        key, pk = self._key(obj)
+        if hasattr(key, "isoformat"):
+            key = key.isoformat()
+        return encode_cursor([key, pk, int(backwards)])
+
+    def _seek(self, pub_date, pk, backwards):
+        # (date, id) < (pub_date, pk) (или > в обратном направлении),
+        # записанное так, чтобы первое условие было диапазоном по индексу
+        # (date, id), а OR — лишь фильтром.
+        date_field, id_field = self.order_fields
+        lookup = "gt" if backwards == self.descending else "lt"
+        return Q(**{f"{date_field}__{lookup}e": pub_date}) & (
+            Q(**{f"{date_field}__{lookup}": pub_date})
+            | Q(**{f"{id_field}__{lookup}": pk})
+        )
+
+    def page(self, cursor=None):
+        backwards = False
+        queryset = self.object_list
+        if cursor:
+            try:
+                raw_key, pk, backwards = decode_cursor(cursor)
+                key = self.parse_key(raw_key)
+                pk = int(pk)
+            except (InvalidCursor, TypeError, ValueError):
+                key = None
+            if key is None:
+                cursor = None
+                backwards = False
+            else:
+                queryset = queryset.filter(
+                    self._seek(key, pk, bool(backwards))
+                )
+        if backwards == self.descending:
+            ordering = self.order_fields
+        else:
+            ordering = tuple(f"-{field}" for field in self.order_fields)
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        if not rows:
+            return CursorPage(rows)
+        more_after = has_more if not backwards else bool(cursor)
+        more_before = bool(cursor) if not backwards else has_more
+        return CursorPage(
+            rows,
+            next_cursor=self.make_cursor(rows[-1]) if more_after else None,
+            previous_cursor=(
+                self.make_cursor(rows[0], True) if more_before else None
+            ),
+        )
+
+
+class UncountedPage(Page):
+    """Страница с номером, но без общего числа записей и страниц."""
+
+    is_counted = False
+
+    def __init__(self, object_list, number, paginator, has_next=False):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def __repr__(self):
+        return "<Page %s>" % self.number
+
+    def has_next(self):
+        return self._has_next
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class UncountedPaginator(Paginator):
+    """Паджинатор по номерам страниц без запроса COUNT.
+
+    Выбирает на одну запись больше, чем помещается на страницу: по ней
+    видно, есть ли следующая. Номера последней страницы нет, поэтому
+    навигация состоит только из переходов «назад» и «вперёд».
+    """
+
+    count = None
+    num_pages = None
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except (PageNotAnInteger, EmptyPage):
+            return self.page(1)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage("That page contains no results")
+        return UncountedPage(
+            rows[:self.per_page], number, self,
+            has_next=len(rows) > self.per_page,
+        )
+
+
+def page_window(number, num_pages, around=2):
+    """Номера страниц для навигации: первая, последняя и around соседей
+    текущей; None на месте пропущенного диапазона (многоточие).
+
+    Пропуск ровно одной страницы заменяется её номером: многоточие
+    шириной в одну ссылку ничего не экономит.
+    """
+    if not num_pages:
+        return []
+    shown = {1, num_pages}
+    shown.update(range(
+        max(1, number - around), min(num_pages, number + around) + 1
+    ))
+    window = []
+    previous = 0
+    for current in sorted(shown):
+        if current - previous == 2:
+            window.append(previous + 1)
+        elif current - previous > 2:
+            window.append(None)
+        window.append(current)
+        previous = current
+    return window
+
+
+def paginate(request, queryset, per_page=None):
+    """Возвращает пару (paginator, page) для ленты.
+
+    По умолчанию используется обычный Paginator с номерами страниц;
+    keyset-режим включается настройкой CURSOR_PAGINATION или наличием
+    параметра ?cursor= в запросе. При PAGINATION_COUNT = False номера
+    страниц остаются, но COUNT не выполняется (UncountedPaginator).
+    """
+    per_page = per_page or settings.PER_PAGE
+    cursor = request.GET.get(CURSOR_PARAM)
+    if cursor is not None or getattr(settings, "CURSOR_PAGINATION", False):
+        paginator = CursorPaginator(queryset, per_page)
+        return paginator, paginator.page(cursor)
+    if settings.PAGINATION_COUNT:
+        paginator = Paginator(queryset, per_page)
+    else:
+        paginator = UncountedPaginator(queryset, per_page)
+    return paginator, paginator.get_page(request.GET.get("page"))
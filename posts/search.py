@@ -0,0 +1,247 @@
+"""Полнотекстовый поиск по постам и комментариям к ним.
+
+Документ поста — его текст и тексты комментариев, приведённые к основам
+слов. Индекс обновляется сигналами при сохранении поста и комментария,
+а во вью с defer_tasks — фоновой задачей после коммита.
+На SQLite со сборкой FTS5 он хранится в виртуальной таблице FTS_TABLE и
+ранжируется по bm25, иначе — в обратном индексе SearchTerm, где вес
+основы равен числу её вхождений в документ.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+from itertools import groupby
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import connection
+from django.db.models import (Count, FloatField, IntegerField, OuterRef,
+                              Subquery, Sum, Value)
+from django.db.models.expressions import RawSQL
+
+from tasks.queue import task
+
+from .models import Comment, Post, SearchTerm
+
+FTS_TABLE = "posts_search"
+TOKEN_RE = re.compile(r"\w+")
+# Слово из текста поста весит больше, чем слово из комментария
+POST_WEIGHT = 2
+# Короче этого основа не обрезается: «кот» не должен стать «ко»
+MIN_STEM = 3
+MAX_TERM = 64
+
+# Окончания существительных, прилагательных и глаголов; отрезается одно,
+# самое длинное из подходящих.
+ENDINGS = sorted({
+    "иями", "ями", "ами", "ией", "иям", "ием", "иях",
+    "ого", "его", "ому", "ему", "ими", "ыми",
+    "ешь", "ете", "ишь", "ите", "ала", "ила", "ыла", "ена",
+    "ев", "ов", "ие", "ье", "ии", "ей", "ой", "ий", "ый", "ые", "ое",
+    "ее", "ая", "яя", "ую", "юю", "ою", "ею", "ям", "ем", "ам", "ом",
+    "им", "ым", "их", "ых", "ах", "ях", "ию", "ью", "ия", "ья",
+    "ть", "ет", "ит", "ут", "ют", "ат", "ят", "ал", "ил", "ло", "ли",
+    "ла", "ны", "но",
+    "а", "е", "и", "й", "о", "у", "ы", "ь", "ю", "я",
+    "ing", "ed", "es", "s",
+}, key=len, reverse=True)
+REFLEXIVE = ("ся", "сь")
+
+
+@lru_cache(maxsize=100000)
+def stem(word):
+    """Грубая основа слова: без возвратной частицы и окончания.
+
+    Слова в текстах часто повторяются, поэтому основы кешируются: при
+    перестройке индекса большой базы это большая часть времени.
+    """
+    word = word.lower().replace("ё", "е")
+    for suffix in REFLEXIVE:
+        if word.endswith(suffix) and len(word) - 2 >= MIN_STEM:
+            word = word[:-2]
+            break
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text):
+    """Основы всех слов текста в порядке появления."""
+    return [
+        stem(word)[:MAX_TERM] for word in TOKEN_RE.findall(text or "")
+        if len(word) > 1 or word.isdigit()
+    ]
+
+
+def fts_enabled():
+    """Хранится ли индекс в таблице FTS5.
+
+    Таблицу создаёт миграция, только если SQLite собран с FTS5. Ответ
+    запоминается на соединении, чтобы не читать схему при каждой записи
+    в индекс и каждом поиске; forget_fts сбрасывает его.
+    """
+    if settings.SEARCH_BACKEND == "python" or connection.vendor != "sqlite":
+        return False
+    if getattr(connection, "posts_fts_enabled", None) is None:
+        connection.posts_fts_enabled = (
+            FTS_TABLE in connection.introspection.table_names()
+        )
+    return connection.posts_fts_enabled
+
+
+def forget_fts(db):
+    """Сбрасывает ответ fts_enabled: новое соединение или migrate."""
+    db.posts_fts_enabled = None
+
+
+def _write(post_id, text, comments, SearchTerm, use_fts, replace=True):
+    post_terms = tokenize(text)
+    comment_terms = tokenize(" ".join(comments))
+    if use_fts:
+        with connection.cursor() as cursor:
+            if replace:
+                cursor.execute(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id]
+                )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, text, comments) "
+                "VALUES (%s, %s, %s)",
+                [post_id, " ".join(post_terms), " ".join(comment_terms)],
+            )
+        return
+    weights = Counter(comment_terms)
+    for term in post_terms:
+        weights[term] += POST_WEIGHT
+    if replace:
+        SearchTerm.objects.filter(post_id=post_id).delete()
+    SearchTerm.objects.bulk_create(
+        SearchTerm(term=term, post_id=post_id, weight=weight)
+        for term, weight in weights.items()
+    )
+
+
+@task(priority=10)
+def index_post(post_id):
+    """Переиндексирует пост вместе со всеми его комментариями."""
+    text = Post.objects.filter(pk=post_id).values_list(
+        "text", flat=True
+    ).first()
+    if text is None:
+        return
+    comments = Comment.objects.filter(post_id=post_id).values_list(
+        "text", flat=True
+    )
+    _write(post_id, text, comments, SearchTerm, fts_enabled())
+
+
+def remove_post(post_id):
+    """Убирает пост из индекса FTS5 (строки SearchTerm удалит каскад)."""
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id]
+            )
+
+
+def rebuild_index(apps=global_apps, posts=None):
+    """Строит индекс заново по всем постам; возвращает их число.
+
+    С posts (queryset постов) переиндексируются только они, остальной
+    индекс не трогается.
+    Принимает реестр приложений, чтобы работать и из миграций.
+    """
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    SearchTerm = apps.get_model("posts", "SearchTerm")
+    use_fts = fts_enabled()
+    rows = Post.objects.all()
+    comments = Comment.objects.filter(post__isnull=False)
+    terms = SearchTerm.objects.all()
+    sql, params = f"DELETE FROM {FTS_TABLE}", []
+    if posts is not None:
+        rows = posts
+        comments = comments.filter(post__in=posts)
+        terms = terms.filter(post__in=posts)
+        subquery, params = posts.values("pk").query.sql_with_params()
+        sql += f" WHERE rowid IN ({subquery})"
+    if use_fts:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+    else:
+        terms.delete()
+    # Посты и комментарии читаются двумя потоками, упорядоченными по id
+    # поста, и сливаются без отдельного запроса на каждый пост.
+    comments = groupby(
+        comments.order_by("post_id").values_list(
+            "post_id", "text"
+        ).iterator(),
+        key=lambda row: row[0],
+    )
+    pending = next(comments, None)
+    indexed = 0
+    rows = rows.order_by("id").values_list("id", "text")
+    for post_id, text in rows.iterator():
+        while pending is not None and pending[0] < post_id:
+            pending = next(comments, None)
+        texts = []
+        if pending is not None and pending[0] == post_id:
+            texts = [comment_text for _, comment_text in pending[1]]
+            pending = next(comments, None)
+        _write(post_id, text, texts, SearchTerm, use_fts, replace=False)
+        indexed += 1
+    return indexed
+
+
+def _match(terms):
+    # Каждая основа в кавычках: так FTS5 не примет её за оператор.
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def filter_matching(queryset, query):
+    """Посты queryset, содержащие все слова запроса, или None без слов."""
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return None
+    if fts_enabled():
+        # RawSQL в pk__in Django 2.2 берёт в двойные скобки, и SQLite
+        # считает такой подзапрос скалярным, поэтому условие через extra.
+        return queryset.extra(
+            where=[
+                f"posts_post.id IN (SELECT rowid FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s)"
+            ],
+            params=[_match(terms)],
+        )
+    matches = SearchTerm.objects.filter(term__in=terms).values("post")
+    return queryset.filter(pk__in=matches.annotate(
+        found=Count("term")
+    ).filter(found=len(terms)).values("post"))
+
+
+def search_posts(queryset, query):
+    """Посты queryset по запросу, от более релевантных к менее.
+
+    Релевантность доступна в атрибуте rank; порядок — (-rank, -id),
+    поэтому результат можно листать CursorPaginator по rank.
+    """
+    found = filter_matching(queryset, query)
+    terms = sorted(set(tokenize(query)))
+    if found is None:
+        found, rank = queryset.none(), Value(0, IntegerField())
+    elif fts_enabled():
+        # bm25 тем меньше, чем документ релевантнее; веса колонок
+        # соответствуют POST_WEIGHT для текста и 1 для комментариев.
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, %s, 1.0) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = posts_post.id",
+            [float(POST_WEIGHT), _match(terms)],
+            output_field=FloatField(),
+        )
+    else:
+        rank = Subquery(
+            SearchTerm.objects.filter(post=OuterRef("pk"), term__in=terms)
+            .values("post").annotate(total=Sum("weight")).values("total"),
+            output_field=IntegerField(),
+        )
+    return found.annotate(rank=rank).order_by("-rank", "-id")
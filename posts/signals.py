@@ -0,0 +1,157 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from .counters import change_comment_count, change_counter
+from .feed_cache import bump_generation
+from .feeds import backfill_feed, fan_out, prune_feed
+from .models import Comment, Follow, Group, Post
+from .page_cache import purge, purge_all
+from .search import forget_fts, index_post, remove_post
+from .trending import record_comment, record_follow
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_counter(instance.author_id, "posts_count", 1)
+        if settings.FOLLOW_FEED_MATERIALIZED:
+            fan_out.delay(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change_counter(instance.author_id, "posts_count", -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_comment_count(instance.post_id, 1)
+        record_comment(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_counter(instance.author_id, "followers_count", 1)
+        change_counter(instance.user_id, "following_count", 1)
+        record_follow(instance.author_id)
+        if settings.FOLLOW_FEED_MATERIALIZED:
+            backfill_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_counter(instance.author_id, "followers_count", -1)
+    change_counter(instance.user_id, "following_count", -1)
+    if settings.FOLLOW_FEED_MATERIALIZED:
+        prune_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_post.delay(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_removed(sender, instance, **kwargs):
+    remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comments_changed(sender, instance, raw=False, **kwargs):
+    # Комментарии входят в документ поста, поэтому индексируем пост.
+    if not raw:
+        index_post.delay(instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def feeds_changed(sender, **kwargs):
+    bump_generation()
+
+
+def post_page_scopes(post_id):
+    """Области кеша страниц, на которых виден пост."""
+    scopes = ["index", "trending", f"post:{post_id}"]
+    row = Post.objects.filter(pk=post_id).values_list(
+        "author__username", "group__slug"
+    ).first()
+    if row is not None:
+        username, slug = row
+        scopes.append(f"profile:{username}")
+        if slug:
+            scopes.append(f"group:{slug}")
+    return scopes
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_delete, sender=Post)
+def post_pages_before(sender, instance, raw=False, **kwargs):
+    # Прежние автор и группа нужны, чтобы сбросить и их страницы.
+    if instance.pk and not raw:
+        instance._page_scopes = post_page_scopes(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_pages_changed(sender, instance, **kwargs):
+    scopes = getattr(instance, "_page_scopes", [])
+    purge(*scopes, *post_page_scopes(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_pages_changed(sender, instance, **kwargs):
+    purge(*post_page_scopes(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_pages_changed(sender, instance, **kwargs):
+    # Счётчики подписок видны в профилях обоих пользователей, а подписка
+    # поднимает пост автора в рейтинге.
+    usernames = User.objects.filter(
+        pk__in=(instance.user_id, instance.author_id)
+    ).values_list("username", flat=True)
+    purge("trending", *(f"profile:{username}" for username in usernames))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_pages_changed(sender, **kwargs):
+    # Название группы выводится в карточках постов на всех страницах.
+    purge_all()
+
+
+@receiver(post_migrate)
+def database_reset(sender, using, **kwargs):
+    # После migrate или flush закешированные страницы не соответствуют БД,
+    # а таблица поиска могла появиться или исчезнуть.
+    forget_fts(connections[using])
+    bump_generation()
+    purge_all()
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    # Новое соединение может вести в другую базу (например, тестовую).
+    forget_fts(connection)
@@ -0,0 +1,20 @@
+from django import template
+from django.conf import settings
+
+from posts.pagination import page_window as make_window
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page, around=None):
+    """Номера страниц вокруг текущей; None — место для многоточия.
+
+    Для страниц без подсчёта записей (PAGINATION_COUNT = False) список
+    пуст: последняя страница неизвестна, остаются «назад» и «вперёд».
+    """
+    if not getattr(page, "is_counted", True):
+        return []
+    if around is None:
+        around = settings.PAGINATION_WINDOW
+    return make_window(page.number, page.paginator.num_pages, around)
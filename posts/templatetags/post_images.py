@@ -0,0 +1,18 @@
+from django import template
+
+from posts.thumbnails import cached_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image, size="card"):
+    """URL готовой миниатюры или пустая строка, пока её нет.
+
+    Тег только ищет миниатюру: генерацию ставит в очередь сохранение
+    поста, и шаблон до её окончания показывает оригинал картинки.
+    """
+    if not image:
+        return ""
+    thumbnail = cached_thumbnail(image, size)
+    return thumbnail.url if thumbnail else ""
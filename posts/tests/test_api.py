@@ -0,0 +1,125 @@
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ReadOnlyApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="ApiAuthor")
+        cls.reader = User.objects.create(username="ApiReader")
+        cls.group = Group.objects.create(
+            title="Api", description="Api group", slug="api_group",
+        )
+        for number in range(13):
+            cls.post = Post.objects.create(
+                text=f"Пост {number}", author=cls.author, group=cls.group,
+            )
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f"Comment {number}"
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.expected = list(
+            Post.objects.order_by("-pub_date", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def walk(self, client, url, queries=1):
+        """Идёт по ссылкам next и собирает id всех записей.
+
+        Каждая страница — один запрос к постам, плюс поиск группы или
+        сессия и пользователь.
+        """
+        ids = []
+        while url:
+            with self.assertNumQueries(queries):
+                data = client.get(url).json()
+            ids.extend(item["id"] for item in data["results"])
+            url = data["next"]
+        return ids
+
+    def test_post_lists_follow_cursor_links(self):
+        urls = (
+            (reverse("api:posts"), self.client, 1),
+            (reverse("api:group_posts", args=[self.group.slug]),
+             self.client, 2),
+            (reverse("api:follow_posts"), self.reader_client, 3),
+        )
+        for url, client, queries in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.walk(client, url, queries), self.expected
+                )
+
+    def test_post_fields_are_compact(self):
+        data = self.client.get(reverse("api:posts") + "?limit=1").json()
+        self.assertEqual(data["results"][0], {
+            "id": self.post.id,
+            "text": "Пост 12",
+            "pub_date": DjangoJSONEncoder().default(self.post.pub_date),
+            "author": "ApiAuthor",
+            "group": "api_group",
+            "image": None,
+            "comment_count": 3,
+        })
+        self.assertIsNone(data["previous"])
+
+    @override_settings(API_MAX_PAGE_SIZE=5)
+    def test_limit_is_bounded(self):
+        data = self.client.get(reverse("api:posts") + "?limit=1000").json()
+        self.assertEqual(len(data["results"]), 5)
+
+    def test_profile_and_post_detail(self):
+        data = self.client.get(
+            reverse("api:profile", args=[self.author.username])
+        ).json()
+        self.assertEqual(data["author"]["posts_count"], 13)
+        self.assertEqual(data["author"]["followers_count"], 1)
+        with self.assertNumQueries(1):
+            data = self.client.get(
+                reverse("api:post", args=[self.post.id])
+            ).json()
+        self.assertEqual(data["post"]["id"], self.post.id)
+        self.assertEqual(data["author"]["username"], "ApiAuthor")
+        comments = self.client.get(data["comments"]).json()
+        self.assertEqual(
+            [item["text"] for item in comments["results"]],
+            ["Comment 0", "Comment 1", "Comment 2"],
+        )
+
+    def test_ndjson_export_streams_all_rows(self):
+        response = self.client.get(reverse("api:posts") + "?format=ndjson")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)["id"] for line in lines], self.expected
+        )
+
+    def test_errors(self):
+        response = self.client.get(
+            reverse("api:group_posts", args=["missing"])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("detail", response.json())
+        response = self.client.get(reverse("api:follow_posts"))
+        self.assertEqual(response.status_code, 401)
+
+    def test_groups(self):
+        data = self.client.get(reverse("api:groups")).json()
+        self.assertEqual(data["results"], [{
+            "slug": "api_group", "title": "Api", "description": "Api group",
+        }])
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from django.test import TestCase
+
+from posts import benchmark
+from posts.models import Post, User
+
+
+@pytest.mark.benchmark
+class RouteBenchmarkTest(TestCase):
+    """Прогон замера на маленьком наборе данных.
+
+    Полноценный замер — management-команда bench_routes.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sample = benchmark.seed(
+            users=5, groups=2, posts=30, comments=20, follows=10,
+        )
+
+    def test_seed_is_deterministic(self):
+        self.assertEqual(Post.objects.count(), 30)
+        post = Post.objects.get(pk=self.sample["post_id"])
+        self.assertEqual(post.author.username, self.sample["username"])
+        self.assertEqual(post.comment_count, post.comments.count())
+
+    def test_report_covers_all_routes(self):
+        author = User.objects.get(username=self.sample["username"])
+        drivers = {
+            "anonymous": benchmark.ClientDriver(),
+            "author": benchmark.ClientDriver(author),
+        }
+        with self.assertLogs("django.request", "WARNING"):
+            report = benchmark.run(self.sample, drivers, requests=3, warmup=0)
+        names = {name for name, url in benchmark.iter_routes(self.sample)}
+        self.assertIn("signup", names)
+        self.assertEqual(len(report["routes"]), len(names) * 2)
+        self.assertEqual(report["total"]["requests"], len(names) * 2 * 3)
+        index = report["routes"]["index [anonymous]"]
+        self.assertEqual(index["status"], [200])
+        self.assertLessEqual(index["p50_ms"], index["p99_ms"])
+        self.assertIsInstance(index["queries"], int)
+        for key, summary in report["routes"].items():
+            with self.subTest(route=key):
+                expected = {"error500": 500, "error404": 404}.get(
+                    key.split()[0]
+                )
+                self.assertTrue(
+                    all(status < 400 or status == expected
+                        for status in summary["status"]),
+                    summary,
+                )
+        json.dumps(report, sort_keys=True)
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(samples, 50), 50)
+        self.assertEqual(benchmark.percentile(samples, 99), 99)
+        self.assertEqual(benchmark.percentile([7], 95), 7)
@@ -0,0 +1,105 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from posts import feed_cache
+from posts.models import Post, User
+
+
+class FeedCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_value_is_recomputed_after_generation_bump(self):
+        """Новое поколение делает закешированное значение устаревшим."""
+        key = feed_cache.make_key("test")
+        self.assertEqual(feed_cache.get_or_compute(key, self.compute), 1)
+        self.assertEqual(feed_cache.get_or_compute(key, self.compute), 1)
+        feed_cache.bump_generation()
+        self.assertEqual(feed_cache.get_or_compute(key, self.compute), 2)
+        self.assertEqual(
+            feed_cache.stats(), {"hit": 1, "stale": 0, "miss": 2}
+        )
+
+    def test_stale_value_served_while_other_process_recomputes(self):
+        """Пока пересчёт занят другим процессом, отдаётся прошлая версия."""
+        key = feed_cache.make_key("test")
+        feed_cache.get_or_compute(key, self.compute)
+        feed_cache.bump_generation()
+        cache.add(f"{key}:lock", "other", 60)
+        self.assertEqual(feed_cache.get_or_compute(key, self.compute), 1)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(feed_cache.stats()["stale"], 1)
+
+    def test_post_changes_bump_generation(self):
+        """Сохранение и удаление поста меняют поколение."""
+        author = User.objects.create(username="Author")
+        before = feed_cache.generation()
+        post = Post.objects.create(text="Post", author=author)
+        after_save = feed_cache.generation()
+        post.delete()
+        self.assertNotEqual(before, after_save)
+        self.assertNotEqual(after_save, feed_cache.generation())
+
+
+CHILD_SCRIPT = textwrap.dedent("""
+    import django
+    django.setup()
+    from posts import feed_cache
+    print(feed_cache.generation())
+    feed_cache.bump_generation()
+    key = feed_cache.make_key("shared")
+    feed_cache.get_or_compute(key, lambda: "from child")
+""")
+
+
+class SharedCacheBackendTest(TestCase):
+    """Два процесса видят общий файловый кеш и его инвалидацию."""
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, True)
+        caches_setting = {"default": {
+            "BACKEND": settings.CACHE_BACKENDS["file"],
+            "LOCATION": self.location,
+        }}
+        override = override_settings(CACHES=caches_setting)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(cache.clear)
+
+    def run_child(self):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE="yatube.settings",
+            YATUBE_CACHE_BACKEND="file",
+            YATUBE_CACHE_LOCATION=self.location,
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, check=True,
+            stdout=subprocess.PIPE, universal_newlines=True,
+        )
+        return result.stdout.strip()
+
+    def test_generation_and_values_shared_between_processes(self):
+        parent_generation = feed_cache.generation()
+        child_generation = self.run_child()
+        self.assertEqual(child_generation, parent_generation)
+        self.assertNotEqual(feed_cache.generation(), parent_generation)
+        value = feed_cache.get_or_compute(
+            feed_cache.make_key("shared"), self.fail
+        )
+        self.assertEqual(value, "from child")
@@ -0,0 +1,131 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.tests.test_query_plans import FULL_SCAN, TEMP_SORT, query_plan
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="Validated")
+        cls.reader = User.objects.create(username="ValidatedReader")
+        cls.group = Group.objects.create(
+            title="Validated", description="Validated", slug="validated",
+        )
+        for number in range(3):
+            cls.post = Post.objects.create(
+                text=f"Post {number}", author=cls.author, group=cls.group,
+            )
+        Comment.objects.create(post=cls.post, author=cls.reader, text="Hi")
+        cls.urls = (
+            reverse("index"),
+            reverse("group", kwargs={"slug": cls.group.slug}),
+            reverse("profile", args=[cls.author.username]),
+            reverse("post", args=[cls.author.username, cls.post.id]),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def revalidate(self, client, url):
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_unchanged_pages_return_304(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.revalidate(self.reader_client, url)
+                self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_only_on_feed_pages(self):
+        """Профиль и пост зависят от подписок, которые не меняют
+        поколение кеша лент, поэтому проверяются только по ETag."""
+        for url in self.urls[:2]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+                )
+                self.assertEqual(response.status_code, 304)
+        for url in self.urls[2:]:
+            with self.subTest(url=url):
+                self.assertFalse(
+                    self.client.get(url).has_header("Last-Modified")
+                )
+
+    def test_validator_is_single_indexed_query(self):
+        """304 стоит одного запроса, который идёт по индексам.
+
+        Главной хватает токена поколения, база для неё не нужна.
+        """
+        etag = self.client.get(self.urls[0])["ETag"]
+        with self.assertNumQueries(0):
+            self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+        for url in self.urls[1:]:
+            etag = self.client.get(url)["ETag"]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            with self.subTest(url=url):
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(len(queries), 1)
+                plan = query_plan(queries[0]["sql"])
+                self.assertFalse(
+                    [step for step in plan if FULL_SCAN.match(step)], plan
+                )
+                self.assertFalse(
+                    [step for step in plan if TEMP_SORT in step], plan
+                )
+
+    def test_changes_invalidate_validators(self):
+        post_url = self.urls[3]
+        etag = self.client.get(post_url)["ETag"]
+        Comment.objects.create(post=self.post, author=self.reader, text="New")
+        response = self.client.get(post_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.post.text = "Edited"
+        self.post.save()
+        response = self.client.get(post_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_changes_profile_validator(self):
+        profile_url = self.urls[2]
+        etag = self.reader_client.get(profile_url)["ETag"]
+        since = self.client.get(self.urls[0])["Last-Modified"]
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(
+            profile_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        # Подписка не меняет поколение: по одной дате профиль не сверяется.
+        response = self.client.get(
+            profile_url, HTTP_IF_MODIFIED_SINCE=since
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_validator_depends_on_user(self):
+        etag = self.client.get(self.urls[0])["ETag"]
+        response = self.reader_client.get(
+            self.urls[0], HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_pages_are_not_validated(self):
+        response = self.client.get(
+            reverse("group", kwargs={"slug": "missing"}),
+            HTTP_IF_NONE_MATCH="*",
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(CONDITIONAL_PAGES=False)
+    def test_validators_can_be_disabled(self):
+        response = self.client.get(self.urls[0])
+        self.assertFalse(response.has_header("ETag"))
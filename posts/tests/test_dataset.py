@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+from collections import Counter
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from posts import dataset
+from posts.models import Comment, Follow, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class DatasetGeneratorTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def generate(self, **kwargs):
+        options = dict(
+            users=30, groups=3, posts=300, comments=400, follows=200,
+            random_seed=5, batch_size=64,
+        )
+        options.update(kwargs)
+        return dataset.generate(**options)
+
+    def test_sizes_and_dates(self):
+        summary = self.generate()
+        self.assertEqual(summary["users"], 30)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 400)
+        self.assertEqual(Follow.objects.count(), summary["follows"])
+        self.assertFalse(Follow.objects.filter(user=F("author")).exists())
+        self.assertFalse(
+            Comment.objects.filter(created__lt=F("post__pub_date")).exists()
+        )
+        # Порядок id совпадает с порядком публикации.
+        dates = list(Post.objects.order_by("id").values_list(
+            "pub_date", flat=True
+        ))
+        self.assertEqual(dates, sorted(dates))
+        top = User.objects.get(username=summary["top_author"])
+        self.assertEqual(top.counters.posts_count, top.posts.count())
+
+    def test_existing_rows_are_not_refreshed(self):
+        """Очки и счётчики постов вне набора остаются как были."""
+        post = Post.objects.create(
+            text="Живой пост", author=User.objects.create(username="live"),
+        )
+        Post.objects.filter(pk=post.pk).update(
+            trending_score=3, comment_count=2
+        )
+        self.generate()
+        post.refresh_from_db()
+        self.assertEqual(post.trending_score, 3)
+        self.assertEqual(post.comment_count, 2)
+
+    def test_authors_follow_power_law(self):
+        self.generate()
+        per_author = sorted(Counter(
+            Post.objects.values_list("author_id", flat=True)
+        ).values(), reverse=True)
+        # Пятая часть авторов пишет больше половины постов.
+        self.assertGreater(sum(per_author[:6]), 150)
+
+    def test_same_seed_gives_same_dataset(self):
+        self.generate(prefix="a_")
+        self.generate(prefix="b_")
+
+        def shape(prefix):
+            return sorted(
+                (username[len(prefix):], count)
+                for username, count in User.objects.filter(
+                    username__startswith=prefix
+                ).values_list("username", "counters__posts_count")
+            )
+
+        self.assertEqual(shape("a_"), shape("b_"))
+
+    def test_placeholder_images(self):
+        self.generate(images=2, image_ratio=1.0, password="secret")
+        self.assertFalse(Post.objects.filter(image="").exists())
+        self.assertEqual(
+            len(set(Post.objects.values_list("image", flat=True))), 2
+        )
+        self.assertTrue(User.objects.first().check_password("secret"))
+
+    def test_command_refuses_existing_prefix(self):
+        options = dict(
+            users=5, posts=10, comments=5, follows=5, stdout=StringIO(),
+        )
+        call_command("generate_dataset", **options)
+        with self.assertRaises(CommandError):
+            call_command("generate_dataset", **options)
+        call_command("generate_dataset", replace=True, **options)
+        self.assertEqual(Post.objects.count(), 10)
@@ -0,0 +1,99 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.feeds import suggested_authors
+from posts.follow_graph import recommend
+from posts.models import Follow, FollowSuggestion, User
+
+
+class FollowRecommendationsTest(TestCase):
+    """reader читает a и b; a и b читают x, b — ещё y. similar читает
+    тех же a и b, а также z."""
+
+    def setUp(self):
+        self.users = {
+            name: User.objects.create_user(username=name)
+            for name in ("reader", "similar", "a", "b", "x", "y", "z")
+        }
+        for user, authors in {
+            "reader": "ab", "similar": "abz", "a": "x", "b": "xy",
+        }.items():
+            for author in authors:
+                self.follow(user, author)
+
+    def follow(self, user, author):
+        Follow.objects.create(
+            user=self.users[user], author=self.users[author]
+        )
+
+    def suggested(self, user="reader"):
+        return [
+            (suggestion.author.username, suggestion.mutual)
+            for suggestion in FollowSuggestion.objects.filter(
+                user=self.users[user]
+            ).select_related("author").order_by("-score", "author_id")
+        ]
+
+    def test_friends_of_friends_and_co_follows(self):
+        stats = recommend()
+        self.assertEqual((stats["users"], stats["follows"]), (7, 8))
+        self.assertEqual(
+            self.suggested(), [("x", 2), ("y", 1), ("z", 0)]
+        )
+
+    def test_hub_authors_do_not_make_readers_similar(self):
+        recommend(hub_limit=1)
+        self.assertEqual(self.suggested(), [("x", 2), ("y", 1)])
+
+    def test_top_and_recompute_replace_old_rows(self):
+        recommend(top=1)
+        self.assertEqual(self.suggested(), [("x", 2)])
+        Follow.objects.filter(user=self.users["reader"]).delete()
+        recommend()
+        self.assertEqual(self.suggested(), [])
+        self.assertTrue(self.suggested("similar"))
+
+    def test_empty_graph_clears_suggestions(self):
+        recommend()
+        Follow.objects.all().delete()
+        self.assertEqual(recommend()["users"], 0)
+        self.assertFalse(FollowSuggestion.objects.exists())
+
+    def test_followed_author_hidden_before_recompute(self):
+        recommend()
+        self.follow("reader", "x")
+        self.assertEqual(
+            [item.author.username
+             for item in suggested_authors(self.users["reader"])],
+            ["y", "z"],
+        )
+
+    def test_pages_show_suggestions(self):
+        recommend()
+        client = Client()
+        client.force_login(self.users["reader"])
+        for url in (
+            reverse("follow_index"),
+            reverse("profile", args=["a"]),
+        ):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertContains(response, "Кого почитать")
+                self.assertEqual(
+                    [item.author.username
+                     for item in response.context["suggestions"]],
+                    ["x", "y", "z"],
+                )
+        self.assertNotContains(
+            Client().get(reverse("profile", args=["a"])), "Кого почитать"
+        )
+
+    def test_profile_etag_changes_after_recompute(self):
+        client = Client()
+        client.force_login(self.users["reader"])
+        url = reverse("profile", args=["a"])
+        etag = client.get(url)["ETag"]
+        recommend()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Кого почитать")
@@ -1,6 +1,10 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import Comment, Group, Post, User
+from posts.counters import recount_counters
+from posts.models import Comment, Follow, Group, Post, User, UserCounter
 
 
 class GroupModelTest(TestCase):
@@ -139,3 +143,70 @@ class CommentModelTest(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(
                     comment._meta.get_field(value).help_text, expected)
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username="Author")
+        self.reader = User.objects.create(username="Reader")
+        self.post = Post.objects.create(text="Post", author=self.author)
+
+    def counters(self, user):
+        return UserCounter.objects.get(user=user)
+
+    def test_post_and_follow_counters(self):
+        """Сигналы поддерживают счётчики постов и подписок."""
+        Post.objects.create(text="Second", author=self.author)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.counters(self.author).posts_count, 2)
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+        follow.delete()
+        self.post.delete()
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.assertEqual(self.counters(self.author).followers_count, 0)
+        self.assertEqual(self.counters(self.reader).following_count, 0)
+
+    def test_comment_counter_survives_post_edit(self):
+        """Редактирование поста не сбрасывает счётчик комментариев."""
+        stale_post = Post.objects.get(pk=self.post.pk)
+        Comment.objects.create(post=self.post, author=self.reader, text="1")
+        Comment.objects.create(post=self.post, author=self.reader, text="2")
+        stale_post.text = "Edited"
+        stale_post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.post.text, "Edited")
+        self.post.comments.first().delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_new_post_with_explicit_pk_is_inserted(self):
+        """Новый пост с заданным pk вставляется, а не обновляется."""
+        post = Post(pk=12345, text="Explicit", author=self.author)
+        post.save()
+        self.assertTrue(Post.objects.filter(pk=12345).exists())
+        self.assertEqual(self.counters(self.author).posts_count, 2)
+
+    def test_recount_command_repairs_counters(self):
+        """recount_counters восстанавливает рассогласованные счётчики."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Comment.objects.create(post=self.post, author=self.reader, text="1")
+        UserCounter.objects.all().delete()
+        Post.objects.update(comment_count=7)
+        call_command("recount_counters", stdout=StringIO())
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_recount_limited_to_users(self):
+        """С users пересчитываются только их счётчики и посты."""
+        UserCounter.objects.update(posts_count=5)
+        Post.objects.update(comment_count=7)
+        recount_counters(users=User.objects.filter(pk=self.reader.pk))
+        self.assertEqual(self.counters(self.reader).posts_count, 0)
+        self.assertEqual(self.counters(self.author).posts_count, 5)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 7)
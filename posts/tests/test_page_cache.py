@@ -0,0 +1,118 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+HIT = 'page;desc="hit"'
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="Cached")
+        cls.reader = User.objects.create(username="CachedReader")
+        cls.group = Group.objects.create(
+            title="Cached", description="Cached", slug="cached",
+        )
+        cls.other_group = Group.objects.create(
+            title="Other", description="Other", slug="other",
+        )
+        cls.post = Post.objects.create(
+            text="Cached post", author=cls.author, group=cls.group,
+        )
+        cls.urls = {
+            "index": reverse("index"),
+            "group": reverse("group", kwargs={"slug": cls.group.slug}),
+            "other": reverse("group", kwargs={"slug": cls.other_group.slug}),
+            "profile": reverse("profile", args=[cls.author.username]),
+            "reader": reverse("profile", args=[cls.reader.username]),
+            "post": reverse("post", args=[cls.author.username, cls.post.id]),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def warm(self, *names):
+        for name in names:
+            self.client.get(self.urls[name])
+
+    def assertHits(self, names, hit=True):
+        for name in names:
+            with self.subTest(page=name, hit=hit):
+                response = self.client.get(self.urls[name])
+                self.assertEqual(
+                    HIT in response["Server-Timing"], hit
+                )
+
+    def test_anonymous_pages_are_cached_with_public_headers(self):
+        self.warm(*self.urls)
+        self.assertHits(self.urls)
+        response = self.client.get(self.urls["index"])
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=60", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.warm("index")
+        response = self.reader_client.get(self.urls["index"])
+        self.assertIn('page;desc="bypass"', response["Server-Timing"])
+        self.assertIn("private", response["Cache-Control"])
+        self.assertContains(response, self.reader.username)
+
+    def test_new_post_purges_its_pages_only(self):
+        self.warm(*self.urls)
+        Post.objects.create(
+            text="Fresh post", author=self.author, group=self.group
+        )
+        self.assertHits(("index", "group", "profile"), hit=False)
+        self.assertHits(("other", "reader"))
+        self.assertContains(self.client.get(self.urls["index"]), "Fresh")
+
+    def test_moved_post_purges_previous_group(self):
+        post = Post.objects.create(
+            text="Moving post", author=self.author, group=self.group
+        )
+        self.warm("group", "other")
+        post.group = self.other_group
+        post.save()
+        self.assertHits(("group", "other"), hit=False)
+        self.assertNotContains(
+            self.client.get(self.urls["group"]), "Moving post"
+        )
+
+    def test_comment_purges_post_page(self):
+        self.warm("post", "other")
+        Comment.objects.create(
+            post=self.post, author=self.reader, text="Fresh comment"
+        )
+        self.assertHits(("post",), hit=False)
+        self.assertHits(("other",))
+        self.assertContains(self.client.get(self.urls["post"]), "Fresh")
+
+    def test_follow_purges_both_profiles(self):
+        self.warm("profile", "reader", "post", "index")
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertHits(("profile", "reader", "post"), hit=False)
+        self.assertHits(("index",))
+
+    def test_group_change_purges_everything(self):
+        self.warm(*self.urls)
+        self.other_group.title = "Renamed"
+        self.other_group.save()
+        self.assertHits(self.urls, hit=False)
+
+    def test_missing_pages_are_not_cached(self):
+        url = reverse("group", kwargs={"slug": "missing"})
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn(HIT, response["Server-Timing"])
+
+    @override_settings(PAGE_CACHE=False)
+    def test_page_cache_can_be_disabled(self):
+        self.warm("index")
+        self.assertHits(("index",), hit=False)
@@ -1,9 +1,13 @@
 from datetime import datetime
 
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.models import Group, Post, User
+from posts.pagination import encode_cursor, page_window
 
 
 class PaginatorViewsTest(TestCase):
@@ -39,3 +43,132 @@ class PaginatorViewsTest(TestCase):
         response = self.client.get(reverse("index") + "?page=2")
         actual_len = len(response.context.get("page").object_list)
         self.assertEqual(actual_len, 3)
+
+
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="CursorUser")
+        cls.group = Group.objects.create(
+            title="Cursor title",
+            description="Cursor description",
+            slug="cursor_slug",
+        )
+        for number in range(13):
+            Post.objects.create(
+                text=f"Post {number}",
+                author=cls.author,
+                group=cls.group,
+            )
+        cls.expected = list(Post.objects.order_by("-pub_date", "-id"))
+
+    def test_cursor_pages_cover_feed_without_gaps(self):
+        """Переход по next-токенам обходит ленту без пропусков и повторов."""
+        response = self.client.get(reverse("index") + "?cursor=")
+        first_page = response.context.get("page")
+        self.assertEqual(list(first_page), self.expected[:10])
+        self.assertFalse(first_page.has_previous())
+        response = self.client.get(
+            reverse("index") + f"?cursor={first_page.next_cursor}"
+        )
+        second_page = response.context.get("page")
+        self.assertEqual(list(second_page), self.expected[10:])
+        self.assertFalse(second_page.has_next())
+        response = self.client.get(
+            reverse("index") + f"?cursor={second_page.previous_cursor}"
+        )
+        self.assertEqual(
+            list(response.context.get("page")), self.expected[:10]
+        )
+
+    def test_cursor_pagination_for_group_and_profile(self):
+        """Группа и профиль отдают страницы по токену."""
+        urls = (
+            reverse("group", kwargs={"slug": self.group.slug}),
+            reverse("profile", args=[self.author.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url + "?cursor=")
+                self.assertTrue(response.context.get("page").is_cursor)
+                self.assertContains(response, "?cursor=")
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный токен не ломает страницу, а открывает начало ленты."""
+        response = self.client.get(reverse("index") + "?cursor=broken!")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.context.get("page")), self.expected[:10]
+        )
+
+    def test_cursor_with_non_integer_id_returns_first_page(self):
+        """Токен с нечисловым id тоже считается испорченным."""
+        token = encode_cursor(["2020-01-01T00:00:00", "x", 0])
+        response = self.client.get(reverse("index") + f"?cursor={token}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.context.get("page")), self.expected[:10]
+        )
+
+
+class PageWindowTest(TestCase):
+    def test_window_around_current_page(self):
+        self.assertEqual(
+            page_window(50, 100, 2), [1, None, 48, 49, 50, 51, 52, None, 100]
+        )
+
+    def test_single_gap_is_filled_with_page_number(self):
+        self.assertEqual(page_window(4, 10, 1), [1, 2, 3, 4, 5, None, 10])
+        self.assertEqual(page_window(1, 3, 0), [1, 2, 3])
+
+    def test_no_pages(self):
+        self.assertEqual(page_window(1, 0), [])
+
+
+class WindowedPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="WindowUser")
+        Post.objects.bulk_create(
+            Post(text=f"Post {number}", author=cls.author)
+            for number in range(205)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_only_window_of_page_links_is_rendered(self):
+        """На 21 странице выводятся лишь первая, последняя и соседние."""
+        response = self.client.get(reverse("index") + "?page=10")
+        content = response.content.decode()
+        for number in (1, 8, 9, 11, 12, 21):
+            self.assertIn(f'href="?page={number}"', content)
+        for number in (2, 7, 13, 20):
+            self.assertNotIn(f'href="?page={number}"', content)
+        self.assertEqual(content.count("&hellip;"), 2)
+
+    @override_settings(PAGINATION_COUNT=False)
+    def test_uncounted_pages_skip_count_query(self):
+        """Без подсчёта записей нет COUNT и номеров, только переходы."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("index") + "?page=2")
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries)
+        )
+        page = response.context.get("page")
+        self.assertEqual(len(page.object_list), 10)
+        self.assertTrue(page.has_next())
+        self.assertContains(response, 'href="?page=1"')
+        self.assertContains(response, 'href="?page=3"')
+        self.assertNotContains(response, 'href="?page=4"')
+
+    @override_settings(PAGINATION_COUNT=False)
+    def test_uncounted_last_and_missing_pages(self):
+        response = self.client.get(reverse("index") + "?page=21")
+        page = response.context.get("page")
+        self.assertEqual(len(page.object_list), 5)
+        self.assertFalse(page.has_next())
+        response = self.client.get(reverse("index") + "?page=99")
+        self.assertEqual(response.context.get("page").number, 1)
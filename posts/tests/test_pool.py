@@ -0,0 +1,134 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from django.db import connection, connections
+from django.test import SimpleTestCase, TransactionTestCase
+
+from yatube.sqlite.pool import ConnectionPool, PoolTimeout, pool_checkout
+
+POOLED = "pooled"
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "pool.sqlite3")
+        self.pool = ConnectionPool(
+            lambda: sqlite3.connect(self.path, check_same_thread=False),
+            max_size=2, timeout=0.05, alias=POOLED,
+        )
+
+    def tearDown(self):
+        self.pool.close_all()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_connection_is_reused(self):
+        for _ in range(5):
+            self.pool.release(self.pool.acquire())
+        stats = self.pool.stats()
+        self.assertEqual(stats["checkouts"], 5)
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["idle"], 1)
+
+    def test_size_is_bounded(self):
+        first, second = self.pool.acquire(), self.pool.acquire()
+        self.assertEqual(self.pool.stats()["saturation"], 1)
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire()
+        self.assertEqual(self.pool.stats()["timeouts"], 1)
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(), first)
+        self.pool.release(first)
+        self.pool.release(second)
+
+    def test_waiting_thread_gets_released_connection(self):
+        self.pool.timeout = 5
+        held = [self.pool.acquire(), self.pool.acquire()]
+        received = []
+        waiter = threading.Thread(
+            target=lambda: received.append(self.pool.acquire())
+        )
+        waiter.start()
+        self.pool.release(held[0])
+        waiter.join(5)
+        self.assertEqual(received, held[:1])
+        self.assertEqual(self.pool.stats()["waits"], 1)
+
+    def test_broken_connection_is_replaced(self):
+        conn = self.pool.acquire()
+        conn.close()
+        self.pool.release(conn)
+        fresh = self.pool.acquire()
+        self.assertIsNot(fresh, conn)
+        fresh.execute("SELECT 1")
+        self.assertEqual(self.pool.stats()["discarded"], 1)
+
+    def test_release_rolls_back_open_transaction(self):
+        conn = self.pool.acquire()
+        conn.execute("CREATE TABLE item (id INTEGER)")
+        conn.execute("BEGIN")
+        conn.execute("INSERT INTO item VALUES (1)")
+        self.pool.release(conn)
+        conn = self.pool.acquire()
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(
+            conn.execute("SELECT COUNT(*) FROM item").fetchone(), (0,)
+        )
+
+    def test_checkout_signal(self):
+        events = []
+
+        def receiver(sender, **kwargs):
+            events.append(kwargs)
+
+        pool_checkout.connect(receiver)
+        try:
+            self.pool.acquire()
+        finally:
+            pool_checkout.disconnect(receiver)
+        self.assertEqual(events[0]["alias"], POOLED)
+        self.assertEqual(events[0]["saturation"], 0.5)
+
+
+class PooledDatabaseTest(TransactionTestCase):
+    """Алиас с POOL поверх файла базы: close() возвращает соединение."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        connections.databases[POOLED] = dict(
+            connection.settings_dict,
+            NAME=os.path.join(self.directory, "pooled.sqlite3"),
+            POOL={"MAX_SIZE": 2, "TIMEOUT": 1}, CONN_HEALTH_CHECKS=True,
+        )
+
+    def tearDown(self):
+        connections[POOLED].close()
+        connections[POOLED].pool().close_all()
+        del connections[POOLED]
+        del connections.databases[POOLED]
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_close_returns_connection_to_pool(self):
+        pooled = connections[POOLED]
+        pooled.ensure_connection()
+        raw = pooled.connection
+        pooled.close()
+        pooled.ensure_connection()
+        self.assertIs(pooled.connection, raw)
+        stats = pooled.pool().stats()
+        self.assertEqual((stats["created"], stats["checkouts"]), (1, 2))
+
+    def test_pragmas_applied_to_pooled_connection(self):
+        with connections[POOLED].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+
+    def test_unusable_connection_is_closed(self):
+        pooled = connections[POOLED]
+        pooled.ensure_connection()
+        pooled.connection.close()
+        pooled.close_if_unusable_or_obsolete()
+        self.assertIsNone(pooled.connection)
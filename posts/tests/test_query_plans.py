@@ -0,0 +1,117 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+# Полный проход по таблице без индекса и сортировка во временном B-дереве
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+$")
+TEMP_SORT = "TEMP B-TREE"
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class FeedQueryPlanTest(TestCase):
+    """Запросы лент идут по индексам, без полного прохода и сортировки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="Author")
+        cls.reader = User.objects.create(username="Reader")
+        cls.group = Group.objects.create(
+            title="Plans", description="Plans", slug="plans",
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(15):
+            cls.post = Post.objects.create(
+                text=f"Post {number}", author=cls.author, group=cls.group,
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text="Comment",
+            )
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def feed_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.reader_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith("SELECT") and "posts_" in query["sql"]
+        ]
+
+    def assertIndexedPlans(self, url, allow_sort=False):
+        for sql in self.feed_queries(url):
+            plan = query_plan(sql)
+            with self.subTest(url=url, sql=sql):
+                self.assertFalse(
+                    [step for step in plan if FULL_SCAN.match(step)], plan
+                )
+                if not allow_sort:
+                    self.assertFalse(
+                        [step for step in plan if TEMP_SORT in step], plan
+                    )
+
+    def test_feed_pages_use_indexes(self):
+        next_page = "?cursor=" + self.client.get(
+            reverse("index") + "?cursor="
+        ).context["page"].next_cursor
+        urls = (
+            reverse("index"),
+            reverse("index") + "?page=2",
+            reverse("index") + next_page,
+            reverse("group", kwargs={"slug": self.group.slug}),
+            reverse("group", kwargs={"slug": self.group.slug}) + "?cursor=",
+            reverse("profile", args=[self.author.username]),
+            reverse("post", args=[self.author.username, self.post.id]),
+            reverse("trending"),
+        )
+        for url in urls:
+            self.assertIndexedPlans(url)
+
+    @override_settings(COMMENTS_PER_PAGE=2)
+    def test_comment_pages_read_post_created_index(self):
+        for number in range(4):
+            Comment.objects.create(
+                post=self.post, author=self.reader, text=f"More {number}",
+            )
+        url = reverse(
+            "post_comments", args=[self.author.username, self.post.id]
+        )
+        next_page = "?cursor=" + self.client.get(
+            url + "?format=json"
+        ).json()["next_cursor"]
+        for page in ("", next_page, next_page + "&format=json"):
+            self.assertIndexedPlans(url + page)
+
+    @override_settings(FOLLOW_FEED_MATERIALIZED=True)
+    def test_materialized_follow_feed_reads_inbox_index(self):
+        for number in range(11):
+            Post.objects.create(
+                text=f"Fanned out {number}", author=self.author
+            )
+        url = reverse("follow_index")
+        next_page = "?cursor=" + self.reader_client.get(
+            url + "?cursor="
+        ).context["page"].next_cursor
+        for page in ("", "?cursor=", next_page):
+            self.assertIndexedPlans(url + page)
+
+    def test_follow_feed_read_path_has_no_full_scans(self):
+        # Без материализации лента собирается из постов нескольких
+        # авторов, и их слияние по дате требует сортировки; поэтому для
+        # больших подписок и существует FOLLOW_FEED_MATERIALIZED.
+        self.assertIndexedPlans(reverse("follow_index"), allow_sort=True)
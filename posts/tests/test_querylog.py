@@ -0,0 +1,80 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from yatube.querylog import QueryProblems, fingerprint, inspect_queries
+
+
+class QueryInspectorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="Inspected")
+        cls.group = Group.objects.create(
+            title="Inspected", description="Inspected", slug="inspected",
+        )
+        cls.post = Post.objects.create(
+            text="Проверка запросов", author=cls.author, group=cls.group,
+        )
+        for number in range(4):
+            reader = User.objects.create(username=f"Reader{number}")
+            Comment.objects.create(
+                post=cls.post, author=reader, text=f"Комментарий {number}",
+            )
+            Follow.objects.create(user=reader, author=cls.author)
+            Post.objects.create(text=f"Пост {number}", author=reader)
+        cls.reader = reader
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fingerprint_ignores_parameters(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s)  LIMIT 21'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 3'),
+        )
+
+    def test_detects_n_plus_one_with_origin(self):
+        with inspect_queries() as inspector:
+            authors = [
+                comment.author.username
+                for comment in Comment.objects.all()
+            ]
+        self.assertEqual(len(authors), 4)
+        duplicate, = inspector.duplicates()
+        self.assertEqual(duplicate["count"], 4)
+        self.assertIn("posts/tests/test_querylog.py", duplicate["origins"][0])
+
+    @override_settings(QUERY_INSPECTOR="raise")
+    def test_pages_have_no_repeated_queries(self):
+        client = Client()
+        client.force_login(self.reader)
+        urls = (
+            reverse("index"),
+            reverse("group", kwargs={"slug": self.group.slug}),
+            reverse("profile", args=[self.author.username]),
+            reverse("post", args=[self.author.username, self.post.id]),
+            reverse("follow_index"),
+            reverse("search") + "?q=пост",
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, 200)
+
+    @override_settings(QUERY_INSPECTOR="raise", SLOW_QUERY_MS=-1)
+    def test_raise_mode_fails_request(self):
+        with self.assertRaises(QueryProblems) as problem:
+            self.client.get(reverse("index"))
+        self.assertIn("Медленный запрос", str(problem.exception))
+
+    @override_settings(QUERY_INSPECTOR="log", DUPLICATE_QUERY_THRESHOLD=1)
+    def test_log_mode_reports_view(self):
+        with self.assertLogs("yatube.queries", "WARNING") as logs:
+            response = self.client.get(reverse("index"))
+        self.assertEqual(response.status_code, 200)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["kind"], "duplicate")
+        self.assertEqual(record["view"], "index")
@@ -0,0 +1,99 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube import replicas
+
+REPLICA = "replica"
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTest(TransactionTestCase):
+    """Второй файл SQLite — реплика, отстающая до вызова replicate()."""
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "replica.sqlite3")
+        connections.databases[REPLICA] = dict(
+            connection.settings_dict, NAME=self.path
+        )
+        self.author = User.objects.create_user(username="author")
+        Post.objects.create(text="Реплицированный пост", author=self.author)
+        self.replicate()
+        Post.objects.create(text="Свежий пост", author=self.author)
+        # Так запись отметила бы ReplicaMiddleware.
+        cache.set(replicas.LAST_WRITE_KEY, time.time())
+        self.profile = reverse("profile", args=["author"])
+
+    def tearDown(self):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        shutil.rmtree(self.directory, ignore_errors=True)
+        cache.clear()
+
+    def replicate(self):
+        """Копирует основную базу в файл реплики."""
+        connections[REPLICA].close()
+        connection.ensure_connection()
+        target = sqlite3.connect(self.path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+    def test_feed_reads_from_replica(self):
+        response = Client().get(self.profile)
+        self.assertContains(response, "Реплицированный пост")
+        self.assertNotContains(response, "Свежий пост")
+        # Страница с реплики не закеширована: после репликации видна запись.
+        self.replicate()
+        self.assertContains(Client().get(self.profile), "Свежий пост")
+
+    def test_replica_pages_cached_once_lag_has_passed(self):
+        cache.delete(replicas.LAST_WRITE_KEY)
+        self.assertNotContains(Client().get(self.profile), "Свежий пост")
+        self.replicate()
+        self.assertNotContains(Client().get(self.profile), "Свежий пост")
+
+    def test_writer_reads_own_writes(self):
+        client = Client()
+        client.force_login(self.author)
+        response = client.post(
+            reverse("new_post"), {"text": "Мой новый пост"}
+        )
+        sticky = response.cookies[settings.REPLICA_STICKY_COOKIE]
+        self.assertEqual(sticky["max-age"], 5)
+        self.assertEqual(Post.objects.using("default").count(), 3)
+        self.assertNotContains(Client().get(self.profile), "Мой новый пост")
+        self.assertContains(client.get(self.profile), "Мой новый пост")
+
+    def test_other_views_read_from_primary(self):
+        client = Client()
+        client.force_login(self.author)
+        post = Post.objects.get(text="Свежий пост")
+        response = client.get(reverse("post_edit", args=["author", post.id]))
+        self.assertContains(response, "Свежий пост")
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        os.remove(self.path)
+        with self.assertLogs("yatube.replicas", "WARNING"):
+            response = Client().get(self.profile)
+        self.assertContains(response, "Свежий пост")
+
+    def test_router(self):
+        router = replicas.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Post))
+        self.assertEqual(router.db_for_write(Post), "default")
+        self.assertFalse(router.allow_migrate(REPLICA, "posts"))
+        self.assertTrue(router.allow_migrate("default", "posts"))
@@ -0,0 +1,149 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, Group, Post, SearchTerm, User
+
+
+class TokenizeTest(TestCase):
+    def test_word_forms_share_stem(self):
+        self.assertEqual(
+            search.tokenize("Кот, коты и котами; КОТОВ!"),
+            ["кот", "кот", "кот", "кот"],
+        )
+        self.assertEqual(search.stem("собакой"), search.stem("собаки"))
+
+    def test_short_words_are_not_cut(self):
+        self.assertEqual(search.tokenize("я иду в дом"), ["иду", "дом"])
+
+
+class SearchViewTest(TestCase):
+    """Поиск на FTS5 (сборка SQLite в окружении тестов её содержит)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="Searcher")
+        cls.other = User.objects.create(username="Other")
+        cls.group = Group.objects.create(
+            title="Cats", description="Cats", slug="cats",
+        )
+        cls.cat = Post.objects.create(
+            text="Рыжий кот спит на окне", author=cls.author, group=cls.group,
+        )
+        cls.dog = Post.objects.create(
+            text="Собака лает на кота", author=cls.other,
+        )
+        cls.walk = Post.objects.create(
+            text="Прогулка в парке", author=cls.other,
+        )
+
+    def found(self, **params):
+        response = self.client.get(reverse("search"), params)
+        self.assertEqual(response.status_code, 200)
+        return [post.id for post in response.context["page"]]
+
+    def test_backend(self):
+        self.assertTrue(search.fts_enabled())
+
+    def test_finds_word_forms(self):
+        self.assertCountEqual(
+            self.found(q="котами"), [self.cat.id, self.dog.id]
+        )
+
+    def test_all_words_required(self):
+        self.assertEqual(self.found(q="кот окно"), [self.cat.id])
+        self.assertEqual(self.found(q="кот парк"), [])
+        self.assertEqual(self.found(q="!!!"), [])
+
+    def test_comments_are_indexed(self):
+        comment = Comment.objects.create(
+            post=self.walk, author=self.author, text="Отличные фотографии",
+        )
+        self.assertEqual(self.found(q="фотография"), [self.walk.id])
+        comment.delete()
+        self.assertEqual(self.found(q="фотография"), [])
+
+    def test_post_text_ranks_above_comments(self):
+        Comment.objects.create(
+            post=self.walk, author=self.author, text="Видели там кота",
+        )
+        Post.objects.create(text="Кот, кот и ещё кот", author=self.other)
+        results = self.found(q="кот")
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[-1], self.walk.id)
+
+    def test_group_and_author_filters(self):
+        self.assertEqual(self.found(q="кот", group="cats"), [self.cat.id])
+        self.assertEqual(self.found(q="кот", author="Other"), [self.dog.id])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.create(text="Прогулка", author=self.author)
+        post.text = "Прогулка с котом"
+        post.save()
+        self.assertIn(post.id, self.found(q="кот"))
+        post_id = post.id
+        post.delete()
+        self.assertNotIn(post_id, self.found(q="кот"))
+
+    def test_cursor_pagination(self):
+        for number in range(12):
+            Post.objects.create(text=f"Ещё кот {number}", author=self.other)
+        response = self.client.get(reverse("search"), {"q": "кот"})
+        page = response.context["page"]
+        self.assertEqual(len(page), 10)
+        self.assertContains(response, "?q=%D0%BA%D0%BE%D1%82&cursor=")
+        rest = self.client.get(
+            reverse("search"), {"q": "кот", "cursor": page.next_cursor}
+        ).context["page"]
+        self.assertEqual(len(rest), 4)
+        self.assertFalse(rest.has_next())
+        self.assertFalse({post.id for post in page} & {p.id for p in rest})
+
+    def test_admin_uses_index(self):
+        admin = User.objects.create_superuser("admin", "a@a.ru", "admin")
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse("admin:posts_post_changelist"), {"q": "котами"}
+        )
+        self.assertCountEqual(
+            [post.id for post in response.context["cl"].result_list],
+            [self.cat.id, self.dog.id],
+        )
+
+    def test_rebuild_index(self):
+        self.assertEqual(search.rebuild_index(), Post.objects.count())
+        self.assertEqual(self.found(q="лает"), [self.dog.id])
+
+    def test_rebuild_index_for_given_posts(self):
+        """Переиндексируются только переданные посты, без дублей."""
+        posts = Post.objects.filter(author=self.other)
+        self.assertEqual(search.rebuild_index(posts=posts), 2)
+        self.assertEqual(self.found(q="лает"), [self.dog.id])
+        self.assertCountEqual(
+            self.found(q="кот"), [self.cat.id, self.dog.id]
+        )
+
+
+@override_settings(SEARCH_BACKEND="python")
+class InvertedIndexSearchTest(SearchViewTest):
+    """Те же проверки на обратном индексе SearchTerm."""
+
+    def test_backend(self):
+        self.assertFalse(search.fts_enabled())
+        self.assertEqual(
+            SearchTerm.objects.get(post=self.cat, term="кот").weight,
+            search.POST_WEIGHT,
+        )
+
+
+class FtsEnabledTest(TestCase):
+    def test_schema_is_read_once_per_connection(self):
+        search.fts_enabled()
+        with self.assertNumQueries(0):
+            self.assertTrue(search.fts_enabled())
+        search.forget_fts(connection)
+        with self.assertNumQueries(1):
+            self.assertTrue(search.fts_enabled())
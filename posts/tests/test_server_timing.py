@@ -0,0 +1,79 @@
+import json
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, User
+
+METRIC = re.compile(r'(\w+)(?:;dur=([\d.]+))?(?:;desc="([^"]*)")?')
+
+
+def parse_server_timing(header):
+    return {
+        name: (duration, description)
+        for name, duration, description in (
+            METRIC.match(part.strip()).groups() for part in header.split(",")
+        )
+    }
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="Timed")
+        Post.objects.create(text="Timed post", author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_header_reports_sql_templates_and_cache(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("index"))
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertEqual(
+            metrics["db"][1], f"{len(queries)} queries"
+        )
+        self.assertGreater(float(metrics["tpl"][0]), 0)
+        self.assertGreaterEqual(
+            float(metrics["total"][0]), float(metrics["tpl"][0])
+        )
+        self.assertEqual(metrics["cache"][1], "hit=0 stale=0 miss=1")
+        self.assertEqual(metrics["page"][1], "miss")
+        response = self.client.get(reverse("index"))
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertEqual(metrics["page"][1], "hit")
+        self.assertEqual(metrics["cache"][1], "hit=0 stale=0 miss=0")
+
+    @override_settings(PAGE_CACHE=False)
+    def test_feed_cache_hit_without_page_cache(self):
+        self.client.get(reverse("index"))
+        response = self.client.get(reverse("index"))
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertEqual(metrics["page"][1], "bypass")
+        self.assertEqual(metrics["cache"][1], "hit=1 stale=0 miss=0")
+
+    def test_structured_log_line(self):
+        with self.assertLogs("yatube.timing", "INFO") as logs:
+            self.client.get(reverse("profile", args=[self.author.username]))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["url_name"], "profile")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["over_budget"], [])
+        self.assertGreater(record["sql_count"], 0)
+
+    @override_settings(PERFORMANCE_BUDGETS={"index": {"queries": 0}})
+    def test_request_over_budget_is_flagged(self):
+        with self.assertLogs("yatube.timing", "WARNING") as logs:
+            self.client.get(reverse("index"))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["over_budget"], ["queries"])
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_can_be_disabled(self):
+        response = self.client.get(reverse("index"))
+        self.assertFalse(response.has_header("Server-Timing"))
@@ -0,0 +1,152 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection, transaction
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, User
+from posts.views import new_post
+from yatube.sqlite import retry_on_lock
+
+
+class SqliteConnectionTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_new_connections(self):
+        self.assertEqual(
+            self.pragma("cache_size"), settings.SQLITE_PRAGMAS["cache_size"]
+        )
+        self.assertEqual(
+            self.pragma("busy_timeout"),
+            settings.SQLITE_PRAGMAS["busy_timeout"],
+        )
+        # У базы тестов в памяти журнал остаётся в памяти, а не WAL.
+        self.assertEqual(self.pragma("journal_mode"), "memory")
+
+
+class ImmediateTransactionTest(TransactionTestCase):
+    def test_atomic_takes_write_lock_at_begin(self):
+        with CaptureQueriesContext(connection) as captured:
+            with transaction.atomic():
+                Group.objects.create(title="Группа", slug="group")
+        self.assertEqual(captured[0]["sql"], "BEGIN IMMEDIATE")
+
+
+@override_settings(SQLITE_WRITE_RETRIES=2, SQLITE_WRITE_BACKOFF_MS=0)
+class RetryOnLockTest(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        self.request = RequestFactory().post("/new/")
+        self.calls = 0
+
+    def failing(self, errors):
+        def view(request):
+            self.calls += 1
+            if self.calls <= len(errors):
+                raise errors[self.calls - 1]
+            return HttpResponse("ok")
+        return retry_on_lock(view)
+
+    def test_locked_write_is_retried(self):
+        locked = OperationalError("database is locked")
+        view = self.failing([locked, locked])
+        with self.assertLogs("yatube.sqlite", "INFO") as logs:
+            response = view(self.request)
+        self.assertEqual(response.content, b"ok")
+        self.assertEqual(self.calls, 3)
+        self.assertIn("попытка 2", logs.output[-1])
+
+    def test_gives_up_after_retries(self):
+        locked = OperationalError("database is locked")
+        view = self.failing([locked] * 3)
+        with self.assertLogs("yatube.sqlite", "INFO"):
+            with self.assertRaises(OperationalError):
+                view(self.request)
+        self.assertEqual(self.calls, 3)
+
+    def test_other_errors_are_not_retried(self):
+        view = self.failing([OperationalError("no such table: posts_post")])
+        with self.assertRaises(OperationalError):
+            view(self.request)
+        self.assertEqual(self.calls, 1)
+
+    def test_safe_methods_run_without_transaction(self):
+        def view(request):
+            self.calls += 1
+            self.assertFalse(connection.in_atomic_block)
+            raise OperationalError("database is locked")
+
+        with self.assertRaises(OperationalError):
+            retry_on_lock(view)(RequestFactory().get("/new/"))
+        self.assertEqual(self.calls, 1)
+
+    def test_get_write_view_opts_into_transaction(self):
+        """Подписка пишет по GET и повторяется, как POST."""
+        def view(request):
+            self.calls += 1
+            self.assertTrue(connection.in_atomic_block)
+            if self.calls == 1:
+                raise OperationalError("database is locked")
+            return HttpResponse("ok")
+
+        view = retry_on_lock(writes_on_get=True)(view)
+        with self.assertLogs("yatube.sqlite", "INFO"):
+            response = view(RequestFactory().get("/author/follow/"))
+        self.assertEqual(response.content, b"ok")
+        self.assertEqual(self.calls, 2)
+
+    def test_started_upload_is_not_repeated(self):
+        """Повтор записал бы загруженный файл в хранилище второй раз."""
+        self.request = RequestFactory().post("/new/", {
+            "image": SimpleUploadedFile("image.gif", b"GIF89a"),
+        })
+        view = self.failing([OperationalError("database is locked")])
+        with self.assertRaises(OperationalError):
+            view(self.request)
+        self.assertEqual(self.calls, 1)
+
+    def test_invalid_form_rendered_after_commit(self):
+        request = RequestFactory().post(reverse("new_post"), {"text": ""})
+        request.user = User(username="author")
+        response = new_post(request)
+        self.assertIsInstance(response, TemplateResponse)
+        self.assertFalse(response.is_rendered)
+
+
+@pytest.mark.benchmark
+class ConcurrentWritersTest(SimpleTestCase):
+    """Писатели и читатели в потоках на файле SQLite (команда bench_sqlite)."""
+
+    def test_no_lock_errors_under_concurrent_writes(self):
+        output = os.path.join(tempfile.mkdtemp(), "bench_sqlite.json")
+        subprocess.run(
+            [
+                sys.executable, os.path.join(settings.BASE_DIR, "manage.py"),
+                "bench_sqlite", "--writers", "4", "--readers", "4",
+                "--requests", "8", "--posts", "50", "--output", output,
+            ],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        with open(output, encoding="utf-8") as report_file:
+            report = json.load(report_file)
+        os.remove(output)
+        self.assertEqual(report["environment"]["journal_mode"], "wal")
+        self.assertEqual(report["total"]["requests"], 64)
+        self.assertEqual(report["total"]["lock_errors"], 0)
+        self.assertEqual(report["total"]["errors"], 0)
+        self.assertEqual(report["writers"]["status"], [302])
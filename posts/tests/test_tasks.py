@@ -0,0 +1,142 @@
+from django.db import transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.search import search_posts
+from tasks import queue
+from tasks.models import Job
+from tasks.worker import Worker
+
+CALLS = []
+
+
+@queue.task
+def record(value):
+    CALLS.append(value)
+
+
+@queue.task(priority=5)
+def urgent():
+    CALLS.append("urgent")
+
+
+@queue.task(max_attempts=2)
+def broken():
+    raise ValueError("сломано")
+
+
+class DeferTasksTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_delay_runs_inline_outside_deferred_view(self):
+        record.delay(1)
+        self.assertEqual(CALLS, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_deferred_view_queues_each_call_once(self):
+        @queue.defer_tasks
+        def view():
+            record.delay(1)
+            record.delay(1)
+            urgent.delay()
+
+        view()
+        self.assertEqual(CALLS, [])
+        self.assertEqual(
+            sorted(Job.objects.values_list("name", "priority")),
+            [(record.name, 0), (urgent.name, 5)],
+        )
+
+    def test_jobs_are_dropped_with_rolled_back_view(self):
+        @queue.defer_tasks
+        def view():
+            record.delay(1)
+            raise ValueError
+
+        with self.assertRaises(ValueError), transaction.atomic():
+            view()
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_inline_in_deferred_view(self):
+        queue.defer_tasks(lambda: record.delay(1))()
+        self.assertEqual(CALLS, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_enqueue_skips_duplicate_waiting_job(self):
+        record.enqueue(1)
+        record.enqueue(1)
+        record.enqueue(2)
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(CALLS, [])
+
+    def test_new_post_indexed_by_worker(self):
+        author = User.objects.create_user(username="author")
+        client = Client()
+        client.force_login(author)
+        client.post(reverse("new_post"), {"text": "Отложенный кот"})
+        job = Job.objects.get()
+        self.assertEqual(job.name, "posts.search.index_post")
+        posts = Post.objects.all()
+        self.assertFalse(search_posts(posts, "кот").exists())
+        queue.run(job.name, job.payload)
+        self.assertTrue(search_posts(posts, "кот").exists())
+
+
+class ClaimTest(TestCase):
+    def test_higher_priority_first(self):
+        record.enqueue(1)
+        urgent.enqueue()
+        self.assertEqual(
+            [job.name for job in queue.claim("w1", 1, 60)], [urgent.name]
+        )
+
+    def test_claimed_job_hidden_until_visibility_timeout(self):
+        record.enqueue(1)
+        self.assertEqual(len(queue.claim("w1", 10, 60)), 1)
+        self.assertEqual(queue.claim("w2", 10, 60), [])
+
+    def test_expired_job_belongs_to_new_worker(self):
+        record.enqueue(1)
+        [lost] = queue.claim("w1", 10, -1)
+        [job] = queue.claim("w2", 10, 60)
+        self.assertEqual(job.attempts, 2)
+        queue.complete(lost)
+        self.assertTrue(Job.objects.exists())
+        queue.complete(job)
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(TASK_RETRY_DELAY=0)
+class WorkerTest(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_burst_runs_queue_by_priority(self):
+        for value in range(3):
+            record.enqueue(value)
+        urgent.enqueue()
+        stats = Worker(concurrency=1, poll_interval=0.01).run(burst=True)
+        self.assertEqual(stats, {"done": 4, "retried": 0, "failed": 0})
+        self.assertEqual(CALLS, ["urgent", 0, 1, 2])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_retried_then_kept(self):
+        broken.enqueue()
+        with self.assertLogs("yatube.tasks", "WARNING"):
+            stats = Worker(concurrency=2, poll_interval=0.01).run(burst=True)
+        self.assertEqual(stats, {"done": 0, "retried": 1, "failed": 1})
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIn("ValueError: сломано", job.error)
+
+    def test_process_pool(self):
+        broken.enqueue()
+        worker = Worker(concurrency=1, pool="process", poll_interval=0.01)
+        with self.assertLogs("yatube.tasks", "WARNING"):
+            stats = worker.run(burst=True)
+        self.assertEqual(stats["failed"], 1)
+        self.assertIn("ValueError: сломано", Job.objects.get().error)
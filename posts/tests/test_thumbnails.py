@@ -0,0 +1,69 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from posts import thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        author = User.objects.create(username="Author")
+        self.post = Post.objects.create(
+            text="Post",
+            author=author,
+            image=SimpleUploadedFile(
+                "small.gif", SMALL_GIF, content_type="image/gif"
+            ),
+        )
+        self.template = Template(
+            "{% load post_images %}{% post_thumbnail post.image %}"
+        )
+
+    def render(self):
+        return self.template.render(Context({"post": self.post}))
+
+    def test_thumbnail_missing_until_generated(self):
+        """Пока миниатюры нет, тег отдаёт пустую строку."""
+        self.assertIsNone(thumbnails.cached_thumbnail(self.post.image, "card"))
+        self.assertEqual(self.render(), "")
+        thumbnails.generate(self.post.image.name)
+        self.assertIsNotNone(
+            thumbnails.cached_thumbnail(self.post.image, "card")
+        )
+        self.assertIn("/media/cache/", self.render())
+
+    @override_settings(THUMBNAIL_ASYNC=False)
+    def test_synchronous_mode_generates_on_schedule(self):
+        thumbnails.schedule(self.post.image)
+        self.assertIsNotNone(
+            thumbnails.cached_thumbnail(self.post.image, "card")
+        )
+
+    def test_pregenerate_command_runs_in_process_pool(self):
+        output = StringIO()
+        call_command(
+            "pregenerate_thumbnails", processes=2, stdout=output
+        )
+        self.assertIn("Обработано картинок: 1 за", output.getvalue())
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import time
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from posts import benchmark
+from posts.models import Comment, Follow, Group, Post, User, UserCounter
+
+TABLES = (
+    (User, ("id", "username", "password", "date_joined")),
+    (Group, ("id", "slug", "title")),
+    (Post, ("id", "text", "pub_date", "author_id", "group_id", "image")),
+    (Comment, ("id", "post_id", "author_id", "text", "created")),
+    (Follow, ("id", "user_id", "author_id")),
+)
+
+
+def snapshot():
+    return {
+        model.__name__: list(model.objects.order_by("pk").values_list(*fields))
+        for model, fields in TABLES
+    }
+
+
+def clear():
+    Group.objects.all().delete()
+    User.objects.all().delete()
+
+
+class NdjsonTransferTest(TestCase):
+    def setUp(self):
+        benchmark.seed(
+            users=8, groups=2, posts=60, comments=90, follows=20,
+            random_seed=3,
+        )
+        self.path = os.path.join(tempfile.mkdtemp(), "dump.ndjson")
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_round_trip_preserves_ids_and_dates(self):
+        expected = snapshot()
+        counters = list(UserCounter.objects.order_by("pk").values_list())
+        call_command(
+            "export_ndjson", output=self.path, chunk_size=7,
+            stderr=StringIO(),
+        )
+        clear()
+        self.assertFalse(Post.objects.exists())
+        output = StringIO()
+        call_command(
+            "import_ndjson", self.path, batch_size=13, stdout=output
+        )
+        self.assertEqual(snapshot(), expected)
+        self.assertEqual(
+            list(UserCounter.objects.order_by("pk").values_list()), counters
+        )
+        self.assertIn("posts.post", output.getvalue())
+        self.assertIn("строк/с", output.getvalue())
+        # Новые записи получают id после загруженных.
+        post = Post.objects.create(
+            text="After import", author=User.objects.first()
+        )
+        self.assertGreater(post.id, expected["Post"][-1][0])
+
+    def test_export_of_selected_tables_to_stdout(self):
+        output = StringIO()
+        call_command(
+            "export_ndjson", models="posts.group", stdout=output,
+            stderr=StringIO(),
+        )
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), Group.objects.count())
+        self.assertTrue(all('"model":"posts.group"' in line for line in lines))
+
+    def test_ignore_conflicts_skips_existing_rows(self):
+        call_command("export_ndjson", output=self.path, stderr=StringIO())
+        expected = snapshot()
+        call_command(
+            "import_ndjson", self.path, ignore_conflicts=True,
+            stdout=StringIO(),
+        )
+        self.assertEqual(snapshot(), expected)
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(
+    not os.environ.get("YATUBE_TRANSFER_ROWS"),
+    reason="объём задаётся YATUBE_TRANSFER_ROWS, например 1000000",
+)
+class LargeTransferBenchmark(TransactionTestCase):
+    """Выгрузка и загрузка набора заданного объёма с замером скорости."""
+
+    def test_large_round_trip(self):
+        rows = int(os.environ["YATUBE_TRANSFER_ROWS"])
+        benchmark.seed(
+            users=max(rows // 100, 10), groups=20, posts=rows * 3 // 10,
+            comments=rows * 6 // 10, follows=rows // 10,
+            # Больше 500 строк в одном INSERT SQLite не принимает.
+            batch_size=500,
+        )
+        total = sum(model.objects.count() for model, _ in TABLES)
+        path = os.path.join(tempfile.mkdtemp(), "large.ndjson")
+        try:
+            started = time.perf_counter()
+            call_command(
+                "export_ndjson", output=path, chunk_size=5000,
+                stderr=StringIO(),
+            )
+            exported = time.perf_counter() - started
+            counts = {
+                model.__name__: model.objects.count() for model, _ in TABLES
+            }
+            clear()
+            started = time.perf_counter()
+            output = StringIO()
+            call_command(
+                "import_ndjson", path, batch_size=5000, skip_refresh=True,
+                stdout=output,
+            )
+            imported = time.perf_counter() - started
+        finally:
+            os.remove(path)
+        self.assertEqual(
+            {model.__name__: model.objects.count() for model, _ in TABLES},
+            counts,
+        )
+        print(
+            f"\n{total} строк: выгрузка {round(total / exported)} строк/с, "
+            f"загрузка {round(total / imported)} строк/с\n"
+            + output.getvalue()
+        )
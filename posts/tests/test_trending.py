@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Follow, Post, User
+
+WEIGHTS = {"comment": 1.0, "follow": 0.5}
+HOUR = 60 * 60
+
+
+@override_settings(TRENDING_WEIGHTS=WEIGHTS, TRENDING_HALF_LIFE=HOUR,
+                   TRENDING_MIN_SCORE=0.3)
+class TrendingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="author")
+        self.reader = User.objects.create_user(username="reader")
+        self.old = Post.objects.create(text="Старый пост", author=self.author)
+        self.new = Post.objects.create(text="Новый пост", author=self.author)
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(post=post, author=self.reader, text="!")
+
+    def score(self, post):
+        post.refresh_from_db()
+        return post.trending_score
+
+    def test_comment_adds_weight(self):
+        self.comment(self.old, 3)
+        self.assertEqual(self.score(self.old), 3.0)
+        self.assertEqual(self.score(self.new), 0)
+
+    def test_follow_lifts_latest_post_of_author(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.score(self.new), 0.5)
+        self.assertEqual(self.score(self.old), 0)
+
+    def test_editing_post_keeps_score(self):
+        self.comment(self.old)
+        self.old.text = "Исправленный пост"
+        self.old.save()
+        self.assertEqual(self.score(self.old), 1.0)
+
+    def test_decay_halves_and_drops_faded_scores(self):
+        self.comment(self.old, 4)
+        self.comment(self.new)
+        self.assertEqual(trending.decay(HOUR), 2)
+        self.assertEqual(self.score(self.old), 2.0)
+        self.assertEqual(self.score(self.new), 0.5)
+        trending.decay(HOUR)
+        self.assertEqual(self.score(self.new), 0)
+        self.assertEqual(trending.decay(HOUR), 1)
+
+    def test_rebuild_matches_incremental_scores(self):
+        self.comment(self.old, 2)
+        self.comment(self.new)
+        Comment.objects.filter(post=self.old).update(
+            created=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(trending.rebuild_scores(), 2)
+        self.assertAlmostEqual(self.score(self.old), 1.0, places=3)
+        self.assertAlmostEqual(self.score(self.new), 1.0, places=3)
+
+    def test_rebuild_for_given_posts_keeps_other_scores(self):
+        """Вклад подписки в другие посты при частичном пересчёте цел."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.comment(self.old)
+        Post.objects.filter(pk=self.old.pk).update(trending_score=5)
+        posts = Post.objects.filter(pk=self.old.pk)
+        self.assertEqual(trending.rebuild_scores(posts=posts), 1)
+        self.assertAlmostEqual(self.score(self.old), 1.0, places=3)
+        self.assertEqual(self.score(self.new), 0.5)
+
+    def test_page_orders_by_score(self):
+        self.comment(self.old, 2)
+        self.comment(self.new)
+        response = Client().get(reverse("trending"))
+        self.assertEqual(
+            list(response.context["posts"]), [self.old, self.new]
+        )
+        # Кеш страницы сбрасывается новым комментарием.
+        self.comment(self.new, 2)
+        response = Client().get(reverse("trending"))
+        self.assertEqual(
+            list(response.context["posts"]), [self.new, self.old]
+        )
+
+    @override_settings(PAGE_CACHE=False)
+    def test_page_queries_do_not_grow_with_posts(self):
+        self.comment(self.old)
+        with self.assertNumQueries(1):
+            Client().get(reverse("trending"))
+        for number in range(30):
+            post = Post.objects.create(text=f"Пост {number}",
+                                       author=self.author)
+            self.comment(post)
+        with self.assertNumQueries(1):
+            response = Client().get(reverse("trending"))
+        self.assertEqual(len(response.context["posts"]), 30)
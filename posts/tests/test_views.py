@@ -1,12 +1,28 @@
+import shutil
+import tempfile
 from datetime import datetime
 
 from django import forms
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Comment, Follow, Group, Post, User
+from posts.feeds import trim_followers_feeds
+from posts.models import Comment, FeedEntry, Follow, Group, Post, User
+from tasks.models import Job
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 class StaticViewsTests(TestCase):
@@ -80,6 +96,10 @@ class PostsPagesTests(TestCase):
             text="Test comment"
         )
 
+    def setUp(self):
+        # Откат транзакции теста не сбрасывает поколение кеша лент
+        cache.clear()
+
     # Проверяем используемые шаблоны
     def test_urls_uses_correct_template(self):
         """URL-адрес использует соответствующий шаблон."""
@@ -137,8 +157,14 @@ class PostsPagesTests(TestCase):
         self.assertListEqual(list(actual_response), list(expected))
 
     def test_index_cache(self):
-        """Кэш для Posts на странице index функционирует корректно"""
+        """Кэш для Posts на странице index сбрасывается при новом посте"""
         response_with_1_post = self.client.get(reverse("index") + "?page=1")
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(reverse("index") + "?page=1")
+        self.assertHTMLEqual(
+            str(response_with_1_post.content),
+            str(cached_response.content)
+        )
         Post.objects.create(
                 text="Second Post",
                 pub_date=datetime.now(),
@@ -147,16 +173,11 @@ class PostsPagesTests(TestCase):
                 image=PostsPagesTests.uploaded,
             )
         response_with_2_posts = self.client.get(reverse("index") + "?page=1")
-        self.assertHTMLEqual(
-            str(response_with_1_post.content),
-            str(response_with_2_posts.content)
-        )
-        cache.clear()
-        response_with_2_posts = self.client.get(reverse("index") + "?page=1")
         self.assertHTMLNotEqual(
             str(response_with_1_post.content),
             str(response_with_2_posts.content)
         )
+        self.assertContains(response_with_2_posts, "Second Post")
 
     def test_newpost_created_only_one_group(self):
         """Новый пост создаётся в конкретной группе и нигде больше."""
@@ -255,3 +276,201 @@ class PostsPagesTests(TestCase):
         self.authorized_follower.get(expected_url_unfollow)
         expected_follows = Follow.objects.filter(author=self.following)
         self.assertEqual(expected_follows.count(), 0)
+
+
+@override_settings(COMMENTS_PER_PAGE=5)
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username="Commented")
+        cls.post = Post.objects.create(text="Viral post", author=cls.author)
+        for number in range(12):
+            reader = User.objects.create(username=f"Commenter{number}")
+            Comment.objects.create(
+                post=cls.post, author=reader, text=f"Comment {number}"
+            )
+        cls.expected = list(cls.post.comments.order_by("created", "id"))
+        cls.comments_url = reverse(
+            "post_comments", args=[cls.author.username, cls.post.id]
+        )
+
+    def test_post_view_shows_first_comment_page(self):
+        """Пост показывает первые комментарии и кнопку подгрузки."""
+        response = self.client.get(
+            reverse("post", args=[self.author.username, self.post.id])
+        )
+        comments = response.context.get("comment_page")
+        self.assertEqual(list(comments), self.expected[:5])
+        self.assertContains(response, f"{self.comments_url}?cursor=")
+
+    def test_fragments_load_all_comments_with_fixed_queries(self):
+        """Фрагменты обходят все комментарии, авторы — в том же запросе."""
+        loaded = []
+        url = self.comments_url
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertLessEqual(len(queries), 2)
+            page = response.context.get("comment_page")
+            loaded.extend(page)
+            url = (
+                f"{self.comments_url}?cursor={page.next_cursor}"
+                if page.has_next() else None
+            )
+        self.assertEqual(loaded, self.expected)
+        self.assertTemplateUsed(response, "includes/comment_list.html")
+        self.assertNotContains(response, "Показать ещё")
+
+    def test_json_comment_page(self):
+        response = self.client.get(self.comments_url + "?format=json")
+        data = response.json()
+        self.assertEqual(
+            [comment["id"] for comment in data["comments"]],
+            [comment.id for comment in self.expected[:5]],
+        )
+        self.assertEqual(data["comments"][0]["author"], "Commenter0")
+        response = self.client.get(data["next"] + "&format=json")
+        self.assertEqual(
+            [comment["id"] for comment in response.json()["comments"]],
+            [comment.id for comment in self.expected[5:10]],
+        )
+
+    def test_unknown_post_returns_404(self):
+        url = reverse("post_comments", args=[self.author.username, 0])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class FeedQueryBudgetTest(TestCase):
+    """Число запросов на страницу ленты не зависит от числа карточек,
+    в том числе карточек с картинками без готовых миниатюр."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username="Reader")
+        cls.group = Group.objects.create(
+            title="Budget group",
+            description="Budget description",
+            slug="budget_group",
+        )
+        for number in range(12):
+            author = User.objects.create(username=f"Author{number}")
+            Follow.objects.create(user=cls.reader, author=author)
+            post = Post.objects.create(
+                text=f"Post {number}", author=author, group=cls.group,
+                image=SimpleUploadedFile(
+                    f"budget_{number}.gif", SMALL_GIF,
+                    content_type="image/gif",
+                ),
+            )
+            Comment.objects.create(
+                author=cls.reader, post=post, text="Comment"
+            )
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def count_queries(self, url, per_page):
+        cache.clear()
+        with override_settings(PER_PAGE=per_page):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.reader_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_feed_pages_have_fixed_query_budget(self):
+        urls = (
+            reverse("index"),
+            reverse("group", kwargs={"slug": self.group.slug}),
+            reverse("follow_index"),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                small_page = self.count_queries(url, 2)
+                full_page = self.count_queries(url, 10)
+                self.assertEqual(small_page, full_page)
+                # Плюс один запрос к хранилищу миниатюр на всю страницу.
+                self.assertLessEqual(full_page, 6 + 1)
+        # Чтение ленты ничего не пишет: миниатюры ставит в очередь
+        # сохранение поста.
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(FOLLOW_FEED_MATERIALIZED=True, FOLLOW_FEED_FANOUT_LIMIT=1)
+class MaterializedFollowFeedTest(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create(username="Reader")
+        self.other_reader = User.objects.create(username="OtherReader")
+        self.author = User.objects.create(username="Author")
+        self.popular = User.objects.create(username="Popular")
+        self.old_post = Post.objects.create(text="Old", author=self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed(self):
+        response = self.reader_client.get(reverse("follow_index"))
+        return list(response.context.get("page"))
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        """Подписка заполняет ленту, новые посты раскладываются по ней."""
+        self.reader_client.get(
+            reverse("profile_follow", args=[self.author.username])
+        )
+        self.assertEqual(self.feed(), [self.old_post])
+        new_post = Post.objects.create(text="New", author=self.author)
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+        self.assertEqual(
+            self.reader.feed_entries.filter(post=new_post).count(), 1
+        )
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=10000, FOLLOW_FEED_LENGTH=1)
+    def test_fan_out_to_many_followers_trims_feeds(self):
+        """Больше 500 подписчиков: пост раскладывается, ленты обрезаются."""
+        User.objects.bulk_create(
+            User(username=f"follower_{number}") for number in range(600)
+        )
+        Follow.objects.bulk_create(
+            Follow(user=user, author=self.author)
+            for user in User.objects.filter(username__startswith="follower_")
+        )
+        Post.objects.create(text="First", author=self.author)
+        latest = Post.objects.create(text="Second", author=self.author)
+        self.assertEqual(FeedEntry.objects.count(), 600)
+        self.assertEqual(latest.feed_entries.count(), 600)
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=10)
+    def test_trim_followers_feeds_touches_only_overflowing_feeds(self):
+        """Обрезаются только ленты длиннее length."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other_reader, author=self.author)
+        posts = [
+            Post.objects.create(text=f"Post {number}", author=self.author)
+            for number in range(3)
+        ]
+        self.other_reader.feed_entries.exclude(post=posts[-1]).delete()
+        self.assertEqual(trim_followers_feeds(self.author.id, 2), 2)
+        self.assertEqual(self.feed(), posts[:0:-1])
+        self.assertEqual(self.other_reader.feed_entries.count(), 1)
+
+    def test_unfollow_prunes_feed(self):
+        """Отписка удаляет посты автора из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.reader_client.get(
+            reverse("profile_unfollow", args=[self.author.username])
+        )
+        self.assertEqual(self.feed(), [])
+        self.assertFalse(self.reader.feed_entries.exists())
+
+    def test_popular_author_is_read_on_demand(self):
+        """Посты популярного автора не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.popular)
+        Follow.objects.create(user=self.other_reader, author=self.popular)
+        post = Post.objects.create(text="Popular", author=self.popular)
+        self.assertFalse(post.feed_entries.exists())
+        self.assertEqual(self.feed(), [post])
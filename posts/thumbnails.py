@@ -0,0 +1,104 @@
+"""Предварительная генерация миниатюр картинок постов.
+
+Миниатюры всех размеров из POST_THUMBNAIL_SIZES создаёт задача очереди
+(tasks) после сохранения поста, а шаблоны только ищут готовый файл в
+key-value хранилище sorl.thumbnail и не ресайзят картинку внутри
+запроса. Миниатюры постов, созданных до появления очереди, создаёт
+manage.py pregenerate_thumbnails.
+
+Записи хранилища для всей страницы ленты prefetch загружает одним
+запросом: иначе каждая карточка без миниатюры в кеше делала бы свой
+SELECT.
+"""
+from django.conf import settings
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from tasks.queue import task
+
+
+class LookupBackend(ThumbnailBackend):
+    """Бэкенд sorl, который умеет только искать готовую миниатюру."""
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """ImageFile миниатюры (без обращения к хранилищам)."""
+        source = ImageFile(file_)
+        # Имя файла миниатюры зависит от опций, поэтому дополняем их так
+        # же, как это делает ThumbnailBackend.get_thumbnail.
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_cached_thumbnail(self, file_, geometry_string, **options):
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options)
+        )
+
+
+lookup_backend = LookupBackend()
+
+
+def cached_thumbnail(image, size):
+    """Готовая миниатюра размера size или None, если её ещё нет."""
+    geometry, options = settings.POST_THUMBNAIL_SIZES[size]
+    return lookup_backend.get_cached_thumbnail(image, geometry, **options)
+
+
+def prefetch(posts, size="card"):
+    """Загружает в кеш записи хранилища о миниатюрах постов.
+
+    Не больше одного запроса на всю страницу; отсутствующие миниатюры
+    кешируются как отсутствующие, так же как при поиске sorl.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, cached_db_kvstore.KVStore):
+        return
+    geometry, options = settings.POST_THUMBNAIL_SIZES[size]
+    keys = {
+        add_prefix(lookup_backend.thumbnail_file(
+            post.image, geometry, **options
+        ).key)
+        for post in posts if post.image
+    }
+    missing = keys - set(kvstore.cache.get_many(keys))
+    if not missing:
+        return
+    found = dict(
+        KVStore.objects.filter(key__in=missing).values_list("key", "value")
+    )
+    empty = cached_db_kvstore.EMPTY_VALUE
+    kvstore.cache.set_many(
+        {key: found.get(key, empty) for key in missing},
+        thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT,
+    )
+
+
+@task
+def generate(image_name):
+    """Создаёт миниатюры всех настроенных размеров для одной картинки."""
+    for geometry, options in settings.POST_THUMBNAIL_SIZES.values():
+        get_thumbnail(image_name, geometry, **options)
+    return image_name
+
+
+def schedule(image):
+    """Ставит генерацию миниатюр в очередь фоновых задач."""
+    if not image:
+        return
+    if settings.THUMBNAIL_ASYNC:
+        generate.enqueue(image.name)
+    else:
+        generate(image.name)
@@ -0,0 +1,187 @@
+"""Потоковые выгрузка и загрузка данных в формате NDJSON.
+
+Каждая строка — одна запись: {"model": "posts.post", "id": 1, ...} с
+полями таблицы (внешние ключи — как author_id). Таблицы выгружаются в
+порядке зависимостей через iterator() порциями, так что память не
+растёт с объёмом базы. Загрузка читает файл построчно и вставляет
+записи bulk_create пачками, каждая пачка в своей транзакции; id и даты
+(в том числе auto_now_add) сохраняются как в файле.
+
+bulk_create не отправляет сигналы, поэтому после загрузки счётчики,
+поисковый индекс, очки рейтинга «В тренде», материализованные ленты и
+кеши пересчитываются целиком (refresh_derived).
+"""
+import json
+import time
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .counters import recount_counters
+from .feed_cache import bump_generation
+from .feeds import backfill_feed
+from .page_cache import purge_all
+from .search import rebuild_index
+from .trending import rebuild_scores
+
+# Порядок важен: записи ссылаются только на уже загруженные таблицы.
+MODELS = (
+    settings.AUTH_USER_MODEL.lower(),
+    "posts.group",
+    "posts.post",
+    "posts.comment",
+    "posts.follow",
+)
+
+
+def _fields(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _encode(value):
+    # isoformat с микросекундами: DjangoJSONEncoder округляет их до
+    # миллисекунд, и даты бы не совпали после загрузки.
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} не сериализуется в JSON")
+
+
+def export_rows(labels=MODELS, chunk_size=2000):
+    """Генератор строк NDJSON со всеми записями таблиц labels."""
+    for label in labels:
+        model = apps.get_model(label)
+        rows = model._default_manager.order_by("pk").values(*_fields(model))
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield json.dumps(
+                {"model": label, **row}, default=_encode,
+                ensure_ascii=False, separators=(",", ":"),
+            ) + "\n"
+
+
+def _parsers(model):
+    parsers = {}
+    for field in model._meta.concrete_fields:
+        if isinstance(field, models.DateTimeField):
+            parsers[field.attname] = parse_datetime
+        elif isinstance(field, models.DateField):
+            parsers[field.attname] = parse_date
+    return parsers
+
+
+@contextmanager
+def preserved_dates(model):
+    """Отключает auto_now/auto_now_add, чтобы даты брались из файла."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False)
+        or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """Загружает строки NDJSON пачками и считает скорость по таблицам."""
+
+    def __init__(self, batch_size=1000, ignore_conflicts=False):
+        self.batch_size = batch_size
+        self.ignore_conflicts = ignore_conflicts
+        self.stats = {}
+        self.models = []
+        self._model = None
+        self._label = None
+        self._batch = []
+
+    def _flush(self):
+        if not self._batch:
+            return
+        started = time.perf_counter()
+        with preserved_dates(self._model), transaction.atomic():
+            self._model._default_manager.bulk_create(
+                self._batch, ignore_conflicts=self.ignore_conflicts
+            )
+        stats = self.stats[self._label]
+        stats["rows"] += len(self._batch)
+        stats["seconds"] += time.perf_counter() - started
+        self._batch = []
+
+    def _switch(self, label):
+        self._flush()
+        self._label = label
+        self._model = apps.get_model(label)
+        self._columns = set(_fields(self._model))
+        self._parsers = _parsers(self._model)
+        self.stats.setdefault(label, {"rows": 0, "seconds": 0.0})
+        if self._model not in self.models:
+            self.models.append(self._model)
+
+    def add(self, record):
+        label = record.pop("model")
+        if label != self._label:
+            self._switch(label)
+        for name, parse in self._parsers.items():
+            if record.get(name) is not None:
+                record[name] = parse(record[name])
+        self._batch.append(self._model(**{
+            name: value for name, value in record.items()
+            if name in self._columns
+        }))
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def load(self, lines):
+        for line in lines:
+            if line.strip():
+                self.add(json.loads(line))
+        self._flush()
+        self.reset_sequences()
+        return self.stats
+
+    def reset_sequences(self):
+        """Сдвигает счётчики id за загруженные значения (как loaddata)."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), self.models
+        )
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def refresh_derived(batch_size=1000, users=None):
+    """Пересчитывает всё, что при обычной записи поддерживают сигналы.
+
+    С users (queryset пользователей) пересчитываются только их счётчики,
+    посты и ленты: так можно обновить набор, целиком принадлежащий этим
+    пользователям, не трогая остальную базу.
+    """
+    Follow = apps.get_model("posts", "Follow")
+    Post = apps.get_model("posts", "Post")
+    posts, follows = None, Follow.objects.all()
+    if users is not None:
+        posts = Post.objects.filter(author__in=users)
+        follows = follows.filter(user__in=users)
+    recount_counters(batch_size=batch_size, users=users)
+    rebuild_index(posts=posts)
+    rebuild_scores(batch_size=batch_size, posts=posts)
+    if settings.FOLLOW_FEED_MATERIALIZED:
+        follows = follows.values_list("user", "author")
+        for user, author in follows.iterator():
+            backfill_feed(user, author)
+    bump_generation()
+    purge_all()
+
+
+def rate(stats):
+    """Строк в секунду; 0, если время не измерено."""
+    return round(stats["rows"] / stats["seconds"]) if stats["seconds"] else 0
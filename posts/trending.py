@@ -0,0 +1,103 @@
+"""Рейтинг «В тренде»: активность вокруг поста, затухающая со временем.
+
+Очки поста хранятся в Post.trending_score под индексом. Новый
+комментарий добавляет посту TRENDING_WEIGHTS["comment"], новая подписка
+на автора — TRENDING_WEIGHTS["follow"] его последнему посту. Это один
+UPDATE trending_score = trending_score + вес, без пересчёта по таблицам.
+
+Затухание — пакетный проход decay() (manage.py decay_trending раз в
+TRENDING_DECAY_INTERVAL секунд): все ненулевые очки умножаются на
+0.5 ** (интервал / TRENDING_HALF_LIFE), а упавшие ниже
+TRENDING_MIN_SCORE обнуляются, так что пост выпадает и из рейтинга, и
+из следующих проходов. Страница /trending/ читает первые TRENDING_SIZE
+постов по индексу, и её время не зависит от числа постов.
+"""
+import math
+from datetime import timedelta
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db.models import F, Subquery
+from django.utils import timezone
+
+from .feeds import feed_queryset
+from .models import Post
+
+
+def _bump(posts, event):
+    posts.update(
+        trending_score=F("trending_score") + settings.TRENDING_WEIGHTS[event]
+    )
+
+
+def record_comment(post_id):
+    _bump(Post.objects.filter(pk=post_id), "comment")
+
+
+def record_follow(author_id):
+    latest = Post.objects.filter(author_id=author_id).order_by(
+        "-pub_date", "-id"
+    ).values("pk")[:1]
+    _bump(Post.objects.filter(pk=Subquery(latest)), "follow")
+
+
+def decay_factor(seconds):
+    return 0.5 ** (seconds / settings.TRENDING_HALF_LIFE)
+
+
+def decay(seconds=None):
+    """Затухание очков за seconds секунд; возвращает число постов."""
+    if seconds is None:
+        seconds = settings.TRENDING_DECAY_INTERVAL
+    scored = Post.objects.filter(trending_score__gt=0)
+    decayed = scored.update(
+        trending_score=F("trending_score") * decay_factor(seconds)
+    )
+    scored.filter(trending_score__lt=settings.TRENDING_MIN_SCORE).update(
+        trending_score=0
+    )
+    return decayed
+
+
+def rebuild_scores(apps=global_apps, now=None, batch_size=1000,
+                   posts=None):
+    """Считает очки заново по датам комментариев; возвращает число постов.
+
+    Даты подписок не хранятся, поэтому их вклад при пересчёте теряется.
+    С posts (queryset постов) пересчитываются и обнуляются только они.
+    Принимает реестр приложений, чтобы работать и из миграций.
+    """
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    now = now or timezone.now()
+    comments = Comment.objects.filter(post__isnull=False)
+    if posts is None:
+        posts = Post.objects.all()
+    else:
+        comments = comments.filter(post__in=posts)
+    weight = settings.TRENDING_WEIGHTS["comment"]
+    # Комментарий старше horizon дал бы меньше TRENDING_MIN_SCORE.
+    horizon = settings.TRENDING_HALF_LIFE * max(
+        math.log2(weight / settings.TRENDING_MIN_SCORE), 0
+    )
+    comments = comments.filter(
+        created__gt=now - timedelta(seconds=horizon)
+    ).values_list("post_id", "created")
+    scores = {}
+    for post_id, created in comments.iterator():
+        age = (now - created).total_seconds()
+        scores[post_id] = scores.get(post_id, 0) + weight * decay_factor(age)
+    scored = [
+        Post(pk=pk, trending_score=score) for pk, score in scores.items()
+        if score >= settings.TRENDING_MIN_SCORE
+    ]
+    posts.filter(trending_score__gt=0).update(trending_score=0)
+    Post.objects.bulk_update(scored, ["trending_score"], batch_size)
+    return len(scored)
+
+
+def trending_queryset():
+    """Посты рейтинга по убыванию очков (индекс post_trending_idx)."""
+    return feed_queryset(trending_score__gt=0).order_by(
+        "-trending_score", "-id"
+    )
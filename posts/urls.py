@@ -8,6 +8,8 @@ urlpatterns = [
     path("group/<slug:slug>/", views.group_posts, name="group"),
     path("new/", views.new_post, name="new_post"),
     path("follow/", views.follow_index, name="follow_index"),
+    path("search/", views.search, name="search"),
+    path("trending/", views.trending, name="trending"),
     path(
         "<str:username>/follow/",
         views.profile_follow,
@@ -25,6 +27,11 @@ urlpatterns = [
         views.post_edit,
         name="post_edit"
     ),
+    path(
+        "<str:username>/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments"
+    ),
     path(
         "<str:username>/<int:post_id>/comment/",
         views.add_comment,
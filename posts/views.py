@@ -1,22 +1,37 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.response import TemplateResponse
 from django.urls import reverse
 
+from tasks.queue import defer_tasks
+from yatube.replicas import read_from_replica
+from yatube.sqlite import retry_on_lock
+
+from . import thumbnails
+from .conditional import (conditional_page, group_state, index_state,
+                          post_state, profile_state)
+from .feed_cache import cached_paginate
+from .feeds import feed_queryset, follow_feed_queryset, suggested_authors
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .models import Follow, Group, Post, UserCounter
+from .page_cache import cache_anonymous_page
+from .pagination import CURSOR_PARAM, CursorPaginator, paginate
+from .search import search_posts
+from .trending import trending_queryset
 
 User = get_user_model()
-per_page = settings.PER_PAGE
 
 
+@read_from_replica
+@conditional_page(index_state)
+@cache_anonymous_page("index")
 def index(request):
-    post_list = Post.objects.select_related("group")
-    paginator = Paginator(post_list, per_page)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    post_list = feed_queryset()
+    paginator, page = cached_paginate(request, post_list, "index")
+    thumbnails.prefetch(page)
     context = {
         "page": page,
         "post_list": post_list,
@@ -25,12 +40,16 @@ def index(request):
     return render(request, "index.html", context)
 
 
+@read_from_replica
+@conditional_page(group_state)
+@cache_anonymous_page("group:{slug}")
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    group_list = group.posts.all()
-    paginator = Paginator(group_list, per_page)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    group_list = feed_queryset(group=group)
+    paginator, page = cached_paginate(
+        request, group_list, f"group:{group.pk}"
+    )
+    thumbnails.prefetch(page)
     context = {
         "group": group,
         "title": group.title,
@@ -42,63 +61,181 @@ def group_posts(request, slug):
     return render(request, "group.html", context)
 
 
+@read_from_replica
+@cache_anonymous_page("trending")
+def trending(request):
+    # Первые TRENDING_SIZE постов по индексу очков, без COUNT и OFFSET.
+    posts = list(trending_queryset()[:settings.TRENDING_SIZE])
+    thumbnails.prefetch(posts)
+    return render(request, "trending.html", {"posts": posts})
+
+
+def search(request):
+    query = request.GET.get("q", "").strip()
+    group = request.GET.get("group", "")
+    author = request.GET.get("author", "").strip()
+    filters = {}
+    if group:
+        filters["group__slug"] = group
+    if author:
+        filters["author__username"] = author
+    results = search_posts(feed_queryset(**filters), query)
+    # Результаты упорядочены по релевантности, её и берём ключом курсора.
+    paginator = CursorPaginator(
+        results, settings.PER_PAGE, date_field="rank", parse_key=float
+    )
+    page = paginator.page(request.GET.get(CURSOR_PARAM))
+    thumbnails.prefetch(page)
+    page_query = request.GET.copy()
+    page_query.pop(CURSOR_PARAM, None)
+    context = {
+        "query": query,
+        "group": group,
+        "author": author,
+        "groups": Group.objects.all(),
+        "page": page,
+        "paginator": paginator,
+        "page_query": page_query.urlencode(),
+    }
+    return render(request, "search.html", context)
+
+
 @login_required
+@retry_on_lock
+@defer_tasks
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         form.instance.author = request.user
-        form.save()
+        post = form.save()
+        thumbnails.schedule(post.image)
         return redirect("index")
-    return render(request, "new_post.html", {"form": form})
+    return TemplateResponse(request, "new_post.html", {"form": form})
 
 
+@read_from_replica
+@conditional_page(profile_state, last_modified=False)
+@cache_anonymous_page("profile:{username}")
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    user_posts = author.posts.all()
-    paginator = Paginator(user_posts, 11)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    count = Post.objects.filter(author=author).select_related("author").count()
+    author = get_object_or_404(
+        User.objects.select_related("counters"), username=username
+    )
+    user_posts = feed_queryset(author=author)
+    paginator, page = cached_paginate(
+        request, user_posts, f"profile:{author.pk}", 11
+    )
+    thumbnails.prefetch(page)
+    counters = UserCounter.of(author)
     following = False
+    suggestions = ()
     if request.user.is_authenticated:
+        suggestions = suggested_authors(request.user)
         following = Follow.objects.filter(
             user=request.user,
             author=author,
         ).exists()
-    followers = Follow.objects.filter(author=author).count()
-    follows = Follow.objects.filter(user=author).count()
     is_user = True
     if request.user == author:
         is_user = False
     context = {
         "page": page,
         "author": author,
-        "count": count,
+        "count": counters.posts_count,
         "paginator": paginator,
         "following": following,
-        "follows": follows,
-        "followers": followers,
+        "follows": counters.following_count,
+        "followers": counters.followers_count,
         "is_user": is_user,
+        "suggestions": suggestions,
     }
     return render(request, "profile.html", context)
 
 
+@read_from_replica
+@conditional_page(post_state, last_modified=False)
+@cache_anonymous_page("post:{post_id}", "profile:{username}")
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
+    post = get_object_or_404(
+        feed_queryset().select_related("author__counters"),
+        author__username=username,
+        id=post_id,
+    )
     author = post.author
-    posts_count = post.author.posts.count()
+    counters = UserCounter.of(author)
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = post.comments.select_related("author")
     context = {
         "post": post,
         "author": author,
-        "count": posts_count,
+        "count": counters.posts_count,
+        "follows": counters.following_count,
+        "followers": counters.followers_count,
         "form": form,
         "comments": comments,
+        "comment_page": comment_page(
+            comments, request.GET.get(CURSOR_PARAM)
+        ),
     }
     return render(request, "post.html", context)
 
 
+def comment_page(comments, cursor=None):
+    """Страница комментариев от старых к новым по ключу (created, id)."""
+    paginator = CursorPaginator(
+        comments,
+        settings.COMMENTS_PER_PAGE,
+        date_field="created",
+        descending=False,
+    )
+    return paginator.page(cursor)
+
+
+@read_from_replica
+def post_comments(request, username, post_id):
+    """Следующая страница комментариев для подгрузки без перезагрузки.
+
+    Отдаёт HTML-фрагмент со списком и кнопкой «Показать ещё» или JSON
+    при ?format=json.
+    """
+    post = get_object_or_404(
+        Post.objects.select_related("author"),
+        author__username=username,
+        id=post_id,
+    )
+    comments = comment_page(
+        post.comments.select_related("author"),
+        request.GET.get(CURSOR_PARAM),
+    )
+    if request.GET.get("format") != "json":
+        return render(
+            request,
+            "includes/comment_list.html",
+            {"post": post, "comment_page": comments},
+        )
+    next_url = None
+    if comments.has_next():
+        next_url = "{}?{}={}".format(
+            reverse("post_comments", args=[username, post_id]),
+            CURSOR_PARAM,
+            comments.next_cursor,
+        )
+    return JsonResponse({
+        "comments": [
+            {
+                "id": comment.id,
+                "author": comment.author.username,
+                "text": comment.text,
+                "created": comment.created.isoformat(),
+            }
+            for comment in comments
+        ],
+        "next_cursor": comments.next_cursor,
+        "next": next_url,
+    })
+
+
+@retry_on_lock
+@defer_tasks
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, id=post_id, author__username=username)
     if request.user != post.author:
@@ -111,25 +248,31 @@ def post_edit(request, username, post_id):
     if form.is_valid():
         post = form.save(commit=False)
         post.save()
+        if "image" in form.changed_data:
+            thumbnails.schedule(post.image)
         return redirect(reverse("post", args=[post.author.username, post.id]))
     context = {
         "form": form,
         "post": post,
         "is_edit": True,
     }
-    return render(request, "post_edit.html", context)
+    return TemplateResponse(request, "post_edit.html", context)
 
 
 @login_required
+@retry_on_lock
+@defer_tasks
 def add_comment(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
+    post = get_object_or_404(
+        feed_queryset(), id=post_id, author__username=username
+    )
     form = CommentForm(request.POST or None)
     context = {
         "post": post,
         "form": form,
     }
     if not form.is_valid():
-        return render(request, "post.html", context)
+        return TemplateResponse(request, "post.html", context)
     comment = form.save(commit=False)
     comment.author = request.user
     comment.post = post
@@ -138,19 +281,21 @@ def add_comment(request, username, post_id):
 
 
 @login_required
+@read_from_replica
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    post_list = follow_feed_queryset(request.user)
+    paginator, page = paginate(request, post_list, 10)
+    thumbnails.prefetch(page)
     context = {
         "page": page,
         "paginator": paginator,
+        "suggestions": suggested_authors(request.user),
     }
     return render(request, "follow.html", context)
 
 
 @login_required
+@retry_on_lock(writes_on_get=True)
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
@@ -159,6 +304,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@retry_on_lock(writes_on_get=True)
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
@@ -0,0 +1,56 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.worker import POOLS, Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Воркер очереди фоновых задач: забирает задачи из таблицы "
+        "tasks_job и выполняет их в пуле потоков или процессов. SIGINT и "
+        "SIGTERM останавливают воркер после выполнения начатых задач."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int,
+            default=settings.TASK_WORKER_CONCURRENCY,
+        )
+        parser.add_argument(
+            "--pool", choices=POOLS, default=settings.TASK_WORKER_POOL,
+        )
+        parser.add_argument(
+            "--visibility-timeout", type=float,
+            default=settings.TASK_VISIBILITY_TIMEOUT,
+            help="Секунды, после которых задачу упавшего воркера "
+                 "забирает другой",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float,
+            default=settings.TASK_POLL_INTERVAL,
+        )
+        parser.add_argument(
+            "--burst", action="store_true",
+            help="Выйти, когда в очереди не останется готовых задач",
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options["concurrency"],
+            pool=options["pool"],
+            visibility_timeout=options["visibility_timeout"],
+            poll_interval=options["poll_interval"],
+        )
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: worker.stop())
+        self.stdout.write(
+            f"Воркер {worker.name}: {options['pool']} x "
+            f"{options['concurrency']}"
+        )
+        stats = worker.run(burst=options["burst"])
+        self.stdout.write(
+            "Выполнено {done}, отложено на повтор {retried}, "
+            "с ошибкой {failed}".format(**stats)
+        )
@@ -0,0 +1,58 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Вызов фоновой задачи в очереди; выполненные задачи удаляются.
+
+    Взятая воркером задача остаётся в статусе queued: worker и run_at
+    (момент, после которого её может забрать другой воркер) показывают,
+    что она выполняется.
+    """
+    QUEUED = "queued"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "В очереди"),
+        (FAILED, "Ошибка"),
+    )
+
+    name = models.CharField(max_length=200, verbose_name="Задача")
+    # JSON: {"args": [...], "kwargs": {...}}
+    payload = models.TextField(verbose_name="Аргументы")
+    priority = models.SmallIntegerField(default=0, verbose_name="Приоритет")
+    status = models.CharField(
+        max_length=16, choices=STATUSES, default=QUEUED,
+        verbose_name="Статус",
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Выполнить не раньше",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Попыток",
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3, verbose_name="Наибольшее число попыток",
+    )
+    worker = models.CharField(
+        max_length=100, blank=True, verbose_name="Воркер",
+    )
+    error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name="Поставлена",
+    )
+
+    class Meta:
+        verbose_name = "Задача"
+        verbose_name_plural = "Задачи"
+        # Порядок выборки воркером: статус, затем приоритет и время
+        indexes = [
+            models.Index(
+                fields=["status", "-priority", "run_at"],
+                name="job_queue_idx",
+            ),
+            # Поиск такой же ждущей задачи перед постановкой (enqueue)
+            models.Index(fields=["name", "status"], name="job_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
@@ -0,0 +1,180 @@
+"""Очередь фоновых задач в таблице базы (модель Job), без брокера.
+
+Функция с декоратором @task по-прежнему вызывается напрямую, а
+func.delay(...) откладывает вызов — но только внутри вью с декоратором
+defer_tasks. Вне таких вью (тесты, админка, команды) и при TASKS_EAGER
+delay выполняет задачу сразу, как до появления очереди. func.enqueue(...)
+ставит задачу в очередь всегда, если такая же ещё не ждёт воркера, —
+например, из читающего вью, которому незачем ждать результата.
+
+Отложенные вызовы вью копятся в памяти и записываются одним INSERT в
+конце вью, в той же транзакции, что и её данные (retry_on_lock): воркер
+увидит задачи только после коммита, а при откате и повторе вью они
+пропадут вместе с транзакцией. Одинаковые вызовы за запрос ставятся один
+раз.
+
+Воркер (manage.py run_tasks) забирает задачи по убыванию приоритета.
+Взятая задача остаётся в очереди, но невидима для других воркеров
+TASK_VISIBILITY_TIMEOUT секунд: если воркер упал, её заберёт другой.
+Поэтому задача может выполниться больше одного раза и должна быть
+идемпотентной. После ошибки повтор откладывается на
+TASK_RETRY_DELAY * 2**(n - 1) секунд, где n — номер попытки; после
+max_attempts попыток задача остаётся в таблице со статусом failed.
+"""
+import json
+import threading
+from datetime import timedelta
+from functools import partial, update_wrapper, wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+_local = threading.local()
+
+
+class Task:
+    """Функция, вызов которой можно отложить в очередь (delay)."""
+
+    def __init__(self, func, priority=0, max_attempts=3):
+        update_wrapper(self, func)
+        self.func = func
+        # По этому пути воркер находит задачу (import_string), поэтому
+        # задачи объявляются на уровне модуля.
+        self.name = f"{func.__module__}.{func.__qualname__}"
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Ставит вызов в очередь; вне defer_tasks выполняет его сразу.
+
+        Аргументы должны сериализоваться в JSON.
+        """
+        jobs = getattr(_local, "jobs", None)
+        if jobs is None or settings.TASKS_EAGER:
+            self(*args, **kwargs)
+            return
+        job = self._job(args, kwargs)
+        jobs.setdefault((job.name, job.payload), job)
+
+    def enqueue(self, *args, **kwargs):
+        """Ставит вызов в очередь и вне defer_tasks (кроме TASKS_EAGER)."""
+        if settings.TASKS_EAGER:
+            self(*args, **kwargs)
+            return
+        job = self._job(args, kwargs)
+        jobs = getattr(_local, "jobs", None)
+        if jobs is not None:
+            jobs.setdefault((job.name, job.payload), job)
+            return
+        waiting = Job.objects.filter(
+            name=job.name, payload=job.payload, status=Job.QUEUED,
+            worker="",
+        )
+        if not waiting.exists():
+            job.save()
+
+    def _job(self, args, kwargs):
+        payload = json.dumps(
+            {"args": args, "kwargs": kwargs}, cls=DjangoJSONEncoder,
+            sort_keys=True,
+        )
+        return Job(
+            name=self.name, payload=payload, priority=self.priority,
+            max_attempts=self.max_attempts,
+        )
+
+
+def task(func=None, *, priority=0, max_attempts=3):
+    """Декоратор задачи: @task или @task(priority=10, max_attempts=5).
+
+    Воркер выполняет задачи с большим priority раньше.
+    """
+    if func is None:
+        return partial(task, priority=priority, max_attempts=max_attempts)
+    return Task(func, priority, max_attempts)
+
+
+def defer_tasks(view):
+    """Декоратор вью: задачи, поставленные через delay, уходят в очередь.
+
+    Ставится под retry_on_lock, чтобы задачи записывались в транзакции
+    вью и повторялись вместе с ней.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if getattr(_local, "jobs", None) is not None:
+            return view(*args, **kwargs)
+        _local.jobs = jobs = {}
+        try:
+            response = view(*args, **kwargs)
+        finally:
+            _local.jobs = None
+        if jobs:
+            Job.objects.bulk_create(jobs.values())
+        return response
+    return wrapper
+
+
+def claim(worker, limit, visibility_timeout):
+    """Забирает для воркера до limit задач, готовых к выполнению."""
+    now = timezone.now()
+    hidden_until = now + timedelta(seconds=visibility_timeout)
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    with transaction.atomic():
+        # SQLite сериализует эту транзакцию BEGIN IMMEDIATE, базы с
+        # SELECT ... FOR UPDATE SKIP LOCKED раздают воркерам разные строки.
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=skip_locked)
+            .filter(status=Job.QUEUED, run_at__lte=now)
+            .order_by("-priority", "run_at", "id")[:limit]
+        )
+        if jobs:
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                worker=worker, run_at=hidden_until,
+                attempts=F("attempts") + 1,
+            )
+    for job in jobs:
+        job.worker = worker
+        job.run_at = hidden_until
+        job.attempts += 1
+    return jobs
+
+
+def run(name, payload):
+    """Выполняет задачу по имени и аргументам из строки очереди."""
+    arguments = json.loads(payload)
+    return import_string(name)(*arguments["args"], **arguments["kwargs"])
+
+
+def _owned(job):
+    # Задачу, которую после TASK_VISIBILITY_TIMEOUT забрал другой воркер,
+    # этот воркер уже не трогает: у неё другие worker или attempts.
+    return Job.objects.filter(
+        pk=job.pk, worker=job.worker, attempts=job.attempts
+    )
+
+
+def complete(job):
+    """Удаляет выполненную задачу из очереди."""
+    _owned(job).delete()
+
+
+def fail(job, error):
+    """Откладывает повтор задачи; True, если попытки кончились."""
+    exhausted = job.attempts >= job.max_attempts
+    if exhausted:
+        changes = {"status": Job.FAILED}
+    else:
+        delay = settings.TASK_RETRY_DELAY * 2 ** (job.attempts - 1)
+        changes = {"run_at": timezone.now() + timedelta(seconds=delay)}
+    _owned(job).update(worker="", error=error, **changes)
+    return exhausted
@@ -0,0 +1,109 @@
+"""Воркер очереди задач: забирает задачи из Job и выполняет их в пуле.
+
+Главный поток воркера забирает столько задач, сколько в пуле свободных
+мест, и записывает результат: удаляет выполненную задачу или
+откладывает повтор упавшей. Сами задачи выполняются в пуле потоков или
+процессов. Процессы запускаются заново (spawn), а не копией воркера,
+чтобы не унаследовать его открытые соединения с базой.
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import traceback
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+import django
+from django.db import connections
+
+from . import queue
+
+logger = logging.getLogger("yatube.tasks")
+
+POOLS = ("thread", "process")
+
+
+def _execute(name, payload):
+    try:
+        return queue.run(name, payload)
+    finally:
+        # Соединения потока или процесса пула закрываются (или
+        # возвращаются в пул соединений) после каждой задачи.
+        connections.close_all()
+
+
+class Worker:
+    def __init__(self, concurrency=4, pool="thread", visibility_timeout=300,
+                 poll_interval=1.0, name=None):
+        if pool not in POOLS:
+            raise ValueError(f"Неизвестный пул {pool!r}")
+        self.concurrency = concurrency
+        self.pool = pool
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stats = {"done": 0, "retried": 0, "failed": 0}
+        self._stopping = threading.Event()
+
+    def stop(self):
+        """Перестаёт забирать задачи; начатые будут доведены до конца."""
+        self._stopping.set()
+
+    def _executor(self):
+        if self.pool == "process":
+            return ProcessPoolExecutor(
+                self.concurrency,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        return ThreadPoolExecutor(self.concurrency, thread_name_prefix="tasks")
+
+    def run(self, burst=False):
+        """Выполняет задачи до stop(); burst — пока очередь не опустеет."""
+        running = {}
+        with self._executor() as executor:
+            while not self._stopping.is_set():
+                free = self.concurrency - len(running)
+                jobs = []
+                if free:
+                    jobs = queue.claim(
+                        self.name, free, self.visibility_timeout
+                    )
+                for job in jobs:
+                    running[
+                        executor.submit(_execute, job.name, job.payload)
+                    ] = job
+                if not running:
+                    if burst:
+                        break
+                    self._stopping.wait(self.poll_interval)
+                    continue
+                done, _ = wait(
+                    running, self.poll_interval, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    self._finish(running.pop(future), future)
+            for future, job in running.items():
+                self._finish(job, future)
+        connections.close_all()
+        return self.stats
+
+    def _finish(self, job, future):
+        error = future.exception()
+        if error is None:
+            queue.complete(job)
+            self.stats["done"] += 1
+            logger.debug("%s выполнена", job)
+            return
+        trace = "".join(traceback.format_exception(
+            type(error), error, error.__traceback__
+        ))
+        exhausted = queue.fail(job, trace)
+        self.stats["failed" if exhausted else "retried"] += 1
+        logger.log(
+            logging.ERROR if exhausted else logging.WARNING,
+            "%s: попытка %d из %d не удалась: %r",
+            job, job.attempts, job.max_attempts, error,
+        )
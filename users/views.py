@@ -1,9 +1,14 @@
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views.generic import CreateView
 
+from tasks.queue import defer_tasks
+from yatube.sqlite import retry_on_lock
+
 from .forms import CreationForm
 
 
+@method_decorator([retry_on_lock, defer_tasks], name="dispatch")
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy("signup")
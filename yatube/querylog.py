@@ -0,0 +1,183 @@
+"""Журнал медленных SQL-запросов и поиск повторяющихся (N+1).
+
+Включается настройкой QUERY_INSPECTOR: "log" пишет находки в логгер
+yatube.queries, "raise" превращает их в исключение QueryProblems, так
+что в тестах они становятся ошибкой. Для каждого запроса запоминается,
+откуда он пришёл: строка кода проекта и тег шаблона, при отрисовке
+которого он выполнился.
+
+Запросы сравниваются по структуре: текст SQL без параметров, со
+свёрнутыми списками IN и числами. Если одна структура встречается за
+запрос DUPLICATE_QUERY_THRESHOLD раз и больше, это почти всегда
+обращение к связанному объекту в цикле шаблона.
+"""
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("yatube.queries")
+
+_IN_LIST = re.compile(r"%s(?:, %s)+")
+_NUMBER = re.compile(r"\b\d+\b")
+_SPACES = re.compile(r"\s+")
+# Обёртки execute из yatube: их строки источником запроса не считаются
+_WRAPPERS = {
+    os.path.join(os.path.dirname(__file__), name)
+    for name in ("querylog.py", "timing.py")
+}
+
+
+class QueryProblems(AssertionError):
+    """Медленные или повторяющиеся запросы в режиме "raise"."""
+
+
+def fingerprint(sql):
+    """Структура запроса: одинакова для N+1 с разными параметрами."""
+    sql = _SPACES.sub(" ", sql).strip()
+    sql = _IN_LIST.sub("%s, ...", sql)
+    return _NUMBER.sub("?", sql)
+
+
+def _is_project_file(filename):
+    if "site-packages" in filename or filename in _WRAPPERS:
+        return False
+    return filename.startswith(str(settings.BASE_DIR))
+
+
+def origin():
+    """Строка кода проекта и тег шаблона, из которых выполнен запрос."""
+    source = template = None
+    frame = sys._getframe(1)
+    while frame is not None and (source is None or template is None):
+        code = frame.f_code
+        if template is None and code.co_name == "render_annotated":
+            node = frame.f_locals.get("self")
+            node_origin = getattr(node, "origin", None)
+            token = getattr(node, "token", None)
+            if node_origin is not None and token is not None:
+                template = f"{node_origin.template_name}:{token.lineno}"
+        if source is None and _is_project_file(code.co_filename):
+            path = os.path.relpath(code.co_filename, settings.BASE_DIR)
+            source = f"{path}:{frame.f_lineno}"
+        frame = frame.f_back
+    return source, template
+
+
+class QueryInspector:
+    """Обёртка execute: собирает запросы с их временем и источником."""
+
+    def __init__(self, slow_ms=None, duplicate_threshold=None):
+        self.slow_ms = (
+            settings.SLOW_QUERY_MS if slow_ms is None else slow_ms
+        )
+        self.duplicate_threshold = (
+            settings.DUPLICATE_QUERY_THRESHOLD
+            if duplicate_threshold is None else duplicate_threshold
+        )
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            source, template = origin()
+            self.queries.append({
+                "sql": sql,
+                "ms": round(duration, 2),
+                "source": source,
+                "template": template,
+            })
+
+    @contextmanager
+    def wrap(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def slow(self):
+        if self.slow_ms is None:
+            return []
+        return [query for query in self.queries if query["ms"] > self.slow_ms]
+
+    def duplicates(self):
+        """Группы запросов одной структуры, начиная с самой большой."""
+        groups = defaultdict(list)
+        for query in self.queries:
+            groups[fingerprint(query["sql"])].append(query)
+        found = [
+            {
+                "fingerprint": key,
+                "count": len(queries),
+                "origins": sorted({
+                    f"{query['source']} {query['template'] or ''}".strip()
+                    for query in queries
+                }),
+            }
+            for key, queries in groups.items()
+            if len(queries) >= self.duplicate_threshold
+        ]
+        return sorted(found, key=lambda group: -group["count"])
+
+    def report(self):
+        lines = []
+        for query in self.slow():
+            lines.append(
+                f"Медленный запрос {query['ms']} мс из {query['source']} "
+                f"{query['template'] or ''}: {query['sql']}"
+            )
+        for group in self.duplicates():
+            lines.append(
+                f"{group['count']} одинаковых запросов из "
+                f"{', '.join(group['origins'])}: {group['fingerprint']}"
+            )
+        return "\n".join(lines)
+
+
+@contextmanager
+def inspect_queries(**kwargs):
+    """Собирает запросы блока кода, например в тесте."""
+    inspector = QueryInspector(**kwargs)
+    with inspector.wrap():
+        yield inspector
+
+
+class QueryInspectorMiddleware:
+    """Проверяет запросы каждого HTTP-запроса при QUERY_INSPECTOR."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = settings.QUERY_INSPECTOR
+        if mode not in ("log", "raise"):
+            return self.get_response(request)
+        with inspect_queries() as inspector:
+            response = self.get_response(request)
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match is not None else None
+        for query in inspector.slow():
+            logger.warning(json.dumps(
+                dict(query, kind="slow", view=view, path=request.path),
+                ensure_ascii=False, sort_keys=True,
+            ))
+        for group in inspector.duplicates():
+            logger.warning(json.dumps(
+                dict(group, kind="duplicate", view=view, path=request.path),
+                ensure_ascii=False, sort_keys=True,
+            ))
+        if mode == "raise":
+            report = inspector.report()
+            if report:
+                raise QueryProblems(f"{request.path} ({view}):\n{report}")
+        return response
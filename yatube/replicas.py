@@ -0,0 +1,117 @@
+"""Чтение лент с реплик, запись — в основную базу.
+
+ReplicaRouter отправляет всю запись в "default", а чтение — в одну из
+реплик DATABASE_REPLICAS, но только внутри вью, помеченных
+read_from_replica (ленты, профиль, пост). Остальные вью читают с
+основной базы, как и сессии и кеш в таблице: им нужна свежая запись.
+
+Реплика может отставать. Чтобы пользователь сразу видел свой пост или
+подписку, ReplicaMiddleware после запроса, который что-то записал,
+ставит cookie REPLICA_STICKY_COOKIE на REPLICA_LAG_SECONDS — столько же,
+сколько допускается отставание, — и всё это время его запросы читают с
+основной базы. Время последней записи хранится в общем кеше: пока оно не
+старше REPLICA_LAG_SECONDS, страницы, прочитанные с реплики, не кладутся
+в кеши лент и страниц (may_lag), иначе устаревшая копия пережила бы
+инвалидацию.
+"""
+import logging
+import random
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError
+
+logger = logging.getLogger("yatube.replicas")
+
+LAST_WRITE_KEY = "replica:last_write"
+# Приложения, которые всегда читают с основной базы; запись в них (в том
+# числе постановка фоновой задачи) не переключает читателя на неё
+PRIMARY_ONLY_APPS = {"sessions", "django_cache", "tasks"}
+
+_local = threading.local()
+
+
+def current_replica():
+    """Алиас реплики, с которой читает текущий поток, или None."""
+    return getattr(_local, "alias", None)
+
+
+def may_lag():
+    """Читаем с реплики, которая может ещё не видеть последнюю запись."""
+    if current_replica() is None:
+        return False
+    last_write = cache.get(LAST_WRITE_KEY)
+    return (last_write is not None
+            and time.time() - last_write < settings.REPLICA_LAG_SECONDS)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (getattr(_local, "wrote", False)
+                or model._meta.app_label in PRIMARY_ONLY_APPS):
+            return None
+        return current_replica()
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in PRIMARY_ONLY_APPS:
+            _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, объекты из них связываются.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def read_from_replica(view):
+    """Декоратор вью: чтение со случайной реплики.
+
+    Пользователь с cookie недавней записи читает с основной базы. Если
+    реплика недоступна, вью повторяется на основной базе.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (not settings.DATABASE_REPLICAS
+                or settings.REPLICA_STICKY_COOKIE in request.COOKIES
+                or getattr(_local, "wrote", False)):
+            return view(request, *args, **kwargs)
+        _local.alias = random.choice(settings.DATABASE_REPLICAS)
+        try:
+            return view(request, *args, **kwargs)
+        except OperationalError:
+            logger.warning(
+                "Реплика %s недоступна, читаем с основной базы",
+                _local.alias, exc_info=True,
+            )
+            _local.alias = None
+            return view(request, *args, **kwargs)
+        finally:
+            _local.alias = None
+    return wrapper
+
+
+class ReplicaMiddleware:
+    """Cookie чтения с основной базы после запроса с записью."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.wrote = False
+        try:
+            response = self.get_response(request)
+            wrote = _local.wrote
+        finally:
+            _local.wrote = False
+        if wrote and settings.DATABASE_REPLICAS:
+            cache.set(LAST_WRITE_KEY, time.time(), None)
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE, "1",
+                max_age=settings.REPLICA_LAG_SECONDS, httponly=True,
+            )
+        return response
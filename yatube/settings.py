@@ -14,6 +14,101 @@ import os
 
 # Настройка количества выводимых записей паджинатора
 PER_PAGE = 10
+# Комментариев на странице поста; остальные подгружаются по кнопке
+COMMENTS_PER_PAGE = 20
+# Keyset-паджинация лент по (pub_date, id) вместо номеров страниц
+CURSOR_PAGINATION = False
+# Сколько номеров страниц показывать по обе стороны от текущей
+PAGINATION_WINDOW = 2
+# False — не считать записи ленты (COUNT): только «назад» и «вперёд»
+PAGINATION_COUNT = True
+
+# Материализованная лента подписок: новые посты раскладываются по лентам
+# подписчиков при публикации. Посты авторов, у которых подписчиков больше
+# FOLLOW_FEED_FANOUT_LIMIT, читаются напрямую при открытии ленты.
+FOLLOW_FEED_MATERIALIZED = False
+FOLLOW_FEED_LENGTH = 500
+FOLLOW_FEED_FANOUT_LIMIT = 10000
+
+# Кеш страниц лент (секунды); сбрасывается при изменении постов
+FEED_CACHE_TIMEOUT = 300
+FEED_CACHE_LOCK_TIMEOUT = 10
+
+# Кеш готовых страниц лент и постов для анонимных читателей (секунды);
+# max-age — сколько их может держать браузер или обратный прокси
+PAGE_CACHE = True
+PAGE_CACHE_TIMEOUT = 300
+PAGE_CACHE_MAX_AGE = 60
+
+# JSON API: наибольший ?limit= страницы и размер порции чтения из базы
+# при потоковой выгрузке ?format=ndjson
+API_MAX_PAGE_SIZE = 100
+API_EXPORT_CHUNK_SIZE = 2000
+
+# Отвечать 304 Not Modified на условные GET лент и страниц постов
+CONDITIONAL_PAGES = True
+
+# Размеры миниатюр картинок постов: имя -> (геометрия, опции sorl)
+POST_THUMBNAIL_SIZES = {
+    "card": ("960x339", {"crop": "center", "upscale": True}),
+}
+# Генерировать миниатюры в очереди фоновых задач, а не внутри запроса
+THUMBNAIL_ASYNC = True
+
+# Очередь фоновых задач (приложение tasks, manage.py run_tasks).
+# YATUBE_TASKS_EAGER=1 выполняет задачи сразу в запросе — без воркера.
+TASKS_EAGER = os.environ.get("YATUBE_TASKS_EAGER") == "1"
+TASK_WORKER_CONCURRENCY = 4
+# "thread" или "process"
+TASK_WORKER_POOL = "thread"
+# Через сколько секунд задачу упавшего воркера забирает другой
+TASK_VISIBILITY_TIMEOUT = 300
+# Задержка первого повтора упавшей задачи (секунды), дальше удваивается
+TASK_RETRY_DELAY = 10
+TASK_POLL_INTERVAL = 1.0
+
+# Рейтинг «В тренде» (posts/trending.py): очки за события, период
+# полураспада очков и шаг пакетного затухания decay_trending (секунды);
+# очки ниже TRENDING_MIN_SCORE обнуляются
+TRENDING_WEIGHTS = {"comment": 1.0, "follow": 0.5}
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_DECAY_INTERVAL = 10 * 60
+TRENDING_MIN_SCORE = 0.01
+# Сколько постов показывает /trending/
+TRENDING_SIZE = 30
+
+# Рекомендации «Кого почитать» (posts/follow_graph.py, manage.py
+# recommend_follows): сколько хранить на читателя и показывать, веса
+# «друзей друзей» и совместных подписок. Авторы с подписчиками больше
+# FOLLOW_SUGGESTION_HUB_LIMIT не участвуют в сходстве читателей
+FOLLOW_SUGGESTIONS_STORED = 20
+FOLLOW_SUGGESTIONS_SHOWN = 5
+FOLLOW_SUGGESTION_WEIGHTS = {"friends": 1.0, "cofollow": 0.5}
+FOLLOW_SUGGESTION_HUB_LIMIT = 1000
+
+# Индекс полнотекстового поиска: "auto" — таблица FTS5, если SQLite
+# собран с ней, "python" — всегда обратный индекс SearchTerm
+SEARCH_BACKEND = "auto"
+
+# Замер запросов (yatube/timing.py): заголовок Server-Timing и бюджеты
+# по URL name — максимум SQL-запросов и миллисекунд на запрос. Запросы
+# сверх бюджета пишутся в логгер yatube.timing с уровнем WARNING.
+SERVER_TIMING_HEADER = True
+PERFORMANCE_BUDGETS = {
+    "index": {"queries": 8, "ms": 300},
+    "profile": {"queries": 10, "ms": 300},
+    "post": {"queries": 15, "ms": 300},
+    "follow_index": {"queries": 10, "ms": 300},
+    "trending": {"queries": 8, "ms": 300},
+}
+
+# Журнал медленных и повторяющихся SQL-запросов (yatube/querylog.py):
+# "off", "log" — в логгер yatube.queries, "raise" — исключение, которое
+# в тестах становится ошибкой.
+QUERY_INSPECTOR = os.environ.get("YATUBE_QUERY_INSPECTOR", "off")
+SLOW_QUERY_MS = 100
+# Столько запросов одной структуры за HTTP-запрос считаются N+1
+DUPLICATE_QUERY_THRESHOLD = 3
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -44,6 +139,7 @@ INSTALLED_APPS = [
     'about',
     'users',
     'posts',
+    'tasks',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -54,6 +150,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.timing.ServerTimingMiddleware',
+    'yatube.querylog.QueryInspectorMiddleware',
+    'yatube.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,7 +167,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.timing.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -89,13 +188,59 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# CONN_MAX_AGE — сколько секунд соединение живёт в своём потоке между
+# запросами; POOL — общий пул соединений процесса (yatube/sqlite/pool.py):
+# не больше MAX_SIZE соединений, ожидание свободного до TIMEOUT секунд,
+# MAX_SIZE = 0 выключает пул. CONN_HEALTH_CHECKS проверяет соединение
+# перед повторным использованием.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.environ.get("YATUBE_DB_CONN_MAX_AGE", 0)),
+        'CONN_HEALTH_CHECKS': True,
+        'POOL': {
+            "MAX_SIZE": int(os.environ.get("YATUBE_DB_POOL_SIZE", 10)),
+            "TIMEOUT": 10,
+        },
     }
 }
 
+# PRAGMA для каждого соединения с SQLite (движок yatube.sqlite). WAL пускает
+# читателей параллельно с писателем; cache_size в КиБ (отрицательное
+# число), mmap_size в байтах, busy_timeout — сколько мс ждать блокировку.
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -20000,
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,
+    "temp_store": "memory",
+}
+# Начинать транзакции с BEGIN IMMEDIATE: блокировка записи берётся сразу
+SQLITE_IMMEDIATE_TRANSACTIONS = True
+# Реплики только для чтения (yatube/replicas.py): YATUBE_DB_REPLICAS —
+# пути к копиям файла SQLite через запятую, они становятся алиасами
+# replica1, replica2... С них читают ленты, профиль и страница поста.
+for number, path in enumerate(
+    filter(None, os.environ.get("YATUBE_DB_REPLICAS", "").split(",")), 1
+):
+    DATABASES[f"replica{number}"] = dict(
+        DATABASES["default"], NAME=path, TEST={"MIRROR": "default"}
+    )
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["yatube.replicas.ReplicaRouter"]
+# Допустимое отставание реплик (секунды): столько после своей записи
+# пользователь читает с основной базы и столько же страницы, прочитанные
+# с реплики, не попадают в кеш
+REPLICA_LAG_SECONDS = 5
+REPLICA_STICKY_COOKIE = "yatube_primary"
+
+# Повторы пишущих view при "database is locked" и начальная задержка (мс),
+# удваивающаяся с каждой попыткой
+SQLITE_WRITE_RETRIES = 5
+SQLITE_WRITE_BACKOFF_MS = 20
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -149,8 +294,74 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# Кеш выбирается переменными окружения YATUBE_CACHE_BACKEND и
+# YATUBE_CACHE_LOCATION. locmem живёт внутри одного процесса, поэтому при
+# нескольких воркерах gunicorn нужен общий бэкенд: file и db (таблица в
+# той же SQLite, создаётся командой createcachetable) работают без
+# внешних сервисов, redis требует пакет django-redis, memcached —
+# python-memcached. Поколение кеша лент хранится в том же бэкенде, так что
+# инвалидация в одном процессе видна всем остальным.
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "db": "django.core.cache.backends.db.DatabaseCache",
+    "redis": "django_redis.cache.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.MemcachedCache",
+}
+CACHE_LOCATIONS = {
+    "locmem": "",
+    "file": os.path.join(BASE_DIR, "cache"),
+    "db": "yatube_cache",
+    "redis": "redis://127.0.0.1:6379/1",
+    "memcached": "127.0.0.1:11211",
+}
+CACHE_BACKEND = os.environ.get("YATUBE_CACHE_BACKEND", "locmem")
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get(
+            "YATUBE_CACHE_LOCATION", CACHE_LOCATIONS[CACHE_BACKEND]
+        ),
     }
 }
+# Алиас из CACHES, в котором хранятся страницы лент и их поколение
+FEED_CACHE_ALIAS = "default"
+# Алиас из CACHES для страниц анонимных читателей и версий их областей
+PAGE_CACHE_ALIAS = "default"
+
+# Строки замера запросов пишутся в консоль; YATUBE_TIMING_LOG_LEVEL=INFO
+# выводит все запросы, по умолчанию — только превысившие бюджет.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "timing": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "yatube.timing": {
+            "handlers": ["timing"],
+            "level": os.environ.get("YATUBE_TIMING_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+        "yatube.queries": {
+            "handlers": ["timing"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+        "yatube.sqlite": {
+            "handlers": ["timing"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+        "yatube.replicas": {
+            "handlers": ["timing"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+        "yatube.tasks": {
+            "handlers": ["timing"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
@@ -0,0 +1,103 @@
+"""Настройка SQLite для нескольких воркеров и повтор записи при блокировке.
+
+Движок yatube.sqlite (base.py) — обычный бэкенд sqlite3 Django с двумя
+отличиями. Каждое новое соединение получает PRAGMA из SQLITE_PRAGMAS:
+в режиме WAL читатели не ждут писателя, а писатель — читателей;
+synchronous=NORMAL в WAL не теряет целостность базы при сбое процесса,
+cache_size и mmap_size держат горячие страницы в памяти, а busy_timeout
+заставляет ждать блокировку, а не сразу падать. Транзакции начинаются с
+BEGIN IMMEDIATE: блокировка записи берётся в начале, пока транзакция
+ничего не прочитала. Отложенная транзакция, которая сначала читает, а
+потом пишет, получает "database is locked" без всякого ожидания, если
+другой писатель успел закоммитить после её чтения.
+
+Декоратор retry_on_lock выполняет пишущие запросы к view в транзакции
+и, если блокировку так и не удалось получить за busy_timeout,
+откатывает её и повторяет view целиком с экспоненциальной задержкой.
+
+bulk_insert вставляет объекты из итератора пачками: явный batch_size
+bulk_create в Django 2.2 не сверяет с пределом бэкенда, и SQLite не
+принимает больше 500 строк в одном составном INSERT.
+"""
+import logging
+import random
+import time
+from functools import partial, wraps
+from itertools import islice
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+logger = logging.getLogger("yatube.sqlite")
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+def is_locked(error):
+    """Ошибка блокировки SQLite, после которой запись стоит повторить."""
+    return "database is locked" in str(error)
+
+
+def retry_on_lock(view=None, *, writes_on_get=False):
+    """Выполняет небезопасный запрос к view в транзакции и повторяет его
+    при блокировке базы.
+
+    GET и HEAD ничего не пишут и выполняются без транзакции: иначе они
+    держали бы блокировку записи BEGIN IMMEDIATE. Формы view отдают
+    TemplateResponse, который отрисовывается уже после коммита. View,
+    которые пишут и по GET (подписка по ссылке), оборачиваются через
+    @retry_on_lock(writes_on_get=True).
+
+    Задержка перед попыткой n — SQLITE_WRITE_BACKOFF_MS * 2**n со
+    случайным разбросом, чтобы воркеры не просыпались одновременно.
+    После SQLITE_WRITE_RETRIES повторов ошибка пробрасывается дальше.
+    Запрос с загруженными файлами повторяется, только если блокировка
+    случилась до начала view: файлы пишутся в хранилище вне транзакции,
+    и повтор оставил бы их копию.
+    """
+    if view is None:
+        return partial(retry_on_lock, writes_on_get=writes_on_get)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS and not writes_on_get:
+            return view(request, *args, **kwargs)
+        attempt = 0
+        while True:
+            started = False
+            try:
+                with transaction.atomic():
+                    started = True
+                    return view(request, *args, **kwargs)
+            except OperationalError as error:
+                if (not is_locked(error)
+                        or attempt >= settings.SQLITE_WRITE_RETRIES
+                        or started and request.FILES):
+                    raise
+            delay = settings.SQLITE_WRITE_BACKOFF_MS * 2 ** attempt / 1000
+            attempt += 1
+            logger.info(
+                "%s: база заблокирована, попытка %d через %.0f мс",
+                request.path, attempt, delay * 1000,
+            )
+            time.sleep(delay * random.uniform(0.5, 1.5))
+    return wrapper
+
+
+def bulk_insert(model, objs, batch_size=1000, ignore_conflicts=False):
+    """bulk_create из итератора пачками по batch_size объектов.
+
+    batch_size ограничивает только число объектов в памяти: каждую пачку
+    bulk_create сам делит на INSERT по пределу бэкенда и выполняет в
+    транзакции. Возвращает число объектов.
+    """
+    objs = iter(objs)
+    inserted = 0
+    while True:
+        batch = list(islice(objs, batch_size))
+        if not batch:
+            return inserted
+        model._default_manager.bulk_create(
+            batch, ignore_conflicts=ignore_conflicts
+        )
+        inserted += len(batch)
@@ -0,0 +1,69 @@
+from functools import partial
+
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+from .pool import get_pool, is_healthy
+
+# Для базы в памяти WAL и mmap не имеют смысла
+FILE_ONLY_PRAGMAS = {"journal_mode", "mmap_size"}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """sqlite3 с PRAGMA из SQLITE_PRAGMAS и транзакциями BEGIN IMMEDIATE.
+
+    Ключ POOL алиаса включает общий пул соединений (pool.py), а
+    CONN_HEALTH_CHECKS — проверку соединения перед повторным
+    использованием: в пуле и в начале и конце запроса при CONN_MAX_AGE.
+    """
+
+    _pool = None
+
+    def pool(self):
+        """Пул алиаса или None, если он выключен или база в памяти."""
+        options = self.settings_dict.get("POOL") or {}
+        if not options.get("MAX_SIZE") or self.is_in_memory_db():
+            return None
+        return get_pool(
+            self.alias, self.settings_dict["NAME"],
+            partial(self._open, self.get_connection_params()), options,
+            self.settings_dict.get("CONN_HEALTH_CHECKS", False),
+        )
+
+    def _open(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        in_memory = self.is_in_memory_db()
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            if in_memory and name in FILE_ONLY_PRAGMAS:
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def get_new_connection(self, conn_params):
+        self._pool = self.pool()
+        if self._pool is None:
+            return self._open(conn_params)
+        return self._pool.acquire()
+
+    def _close(self):
+        pool, self._pool = self._pool, None
+        if pool is None or self.connection is None:
+            return super()._close()
+        pool.release(self.connection)
+
+    def is_usable(self):
+        return is_healthy(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        if (self.connection is not None
+                and self.settings_dict.get("CONN_HEALTH_CHECKS")
+                and not self.in_atomic_block
+                and not self.is_usable()):
+            self.close()
+
+    def _start_transaction_under_autocommit(self):
+        if settings.SQLITE_IMMEDIATE_TRANSACTIONS:
+            self.cursor().execute("BEGIN IMMEDIATE")
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,172 @@
+"""Ограниченный пул соединений с SQLite для многопоточных WSGI-серверов.
+
+Соединения Django живут в потоке, и при CONN_MAX_AGE = 0 каждое
+закрывается в конце запроса, а следующее открывается заново. Пул
+сохраняет закрытое соединение и отдаёт его следующему потоку, который
+подключается к той же базе, а число соединений не превышает MAX_SIZE:
+лишние потоки ждут освобождения не дольше TIMEOUT секунд. Настройка —
+ключ POOL алиаса в DATABASES.
+
+При каждой выдаче отправляется сигнал pool_checkout с временем
+ожидания и заполненностью пула; его собирает yatube/timing.py.
+"""
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+from django.dispatch import Signal
+
+# wait — секунды ожидания свободного соединения, saturation — доля
+# занятых соединений от MAX_SIZE после выдачи.
+pool_checkout = Signal(providing_args=["alias", "wait", "saturation"])
+
+
+class PoolTimeout(OperationalError):
+    """Свободное соединение не появилось за TIMEOUT секунд."""
+
+
+def is_healthy(conn):
+    try:
+        conn.execute("SELECT 1").fetchone()
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def _close(conn):
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_size=10, timeout=10.0,
+                 health_check=True, alias=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check = health_check
+        self.alias = alias
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            "checkouts": 0, "created": 0, "discarded": 0, "waits": 0,
+            "timeouts": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0,
+            "peak_in_use": 0,
+        }
+
+    def acquire(self):
+        """Свободное соединение, новое или PoolTimeout."""
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        waited = False
+        with self._condition:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"Все {self.max_size} соединений пула заняты "
+                        f"дольше {self.timeout} с"
+                    )
+                waited = True
+                self._condition.wait(remaining)
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self._size += 1
+            self._in_use += 1
+            self._stats["peak_in_use"] = max(
+                self._stats["peak_in_use"], self._in_use
+            )
+        discarded = created = False
+        try:
+            if (conn is not None and self.health_check
+                    and not is_healthy(conn)):
+                _close(conn)
+                conn, discarded = None, True
+            if conn is None:
+                conn, created = self.connect(), True
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+        wait = time.perf_counter() - started
+        with self._condition:
+            stats = self._stats
+            stats["checkouts"] += 1
+            stats["created"] += created
+            stats["discarded"] += discarded
+            stats["waits"] += waited
+            stats["wait_seconds"] += wait
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+            saturation = self._in_use / self.max_size
+        pool_checkout.send(
+            sender=self.__class__, alias=self.alias, wait=wait,
+            saturation=saturation,
+        )
+        return conn
+
+    def release(self, conn):
+        """Возвращает соединение; незавершённая транзакция откатывается."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            _close(conn)
+            conn = None
+        with self._condition:
+            self._in_use -= 1
+            if conn is None:
+                self._size -= 1
+                self._stats["discarded"] += 1
+            else:
+                self._idle.append(conn)
+            self._condition.notify()
+
+    def close_all(self):
+        """Закрывает свободные соединения; занятые закроются при release."""
+        with self._condition:
+            while self._idle:
+                self._idle.pop().close()
+                self._size -= 1
+
+    def stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats.update(
+                size=self._size, idle=len(self._idle), in_use=self._in_use,
+                max_size=self.max_size,
+                saturation=round(self._in_use / self.max_size, 3),
+            )
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, name, connect, options, health_check=True):
+    """Пул алиаса; при смене файла базы (тесты) создаётся новый."""
+    with _pools_lock:
+        pool = _pools.get((alias, name))
+        if pool is None:
+            pool = _pools[alias, name] = ConnectionPool(
+                connect, max_size=options["MAX_SIZE"],
+                timeout=options.get("TIMEOUT", 10.0),
+                health_check=health_check, alias=alias,
+            )
+        return pool
+
+
+def all_stats():
+    """Метрики всех пулов процесса: алиас -> словарь stats()."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {alias: pool.stats() for (alias, _), pool in pools}
@@ -0,0 +1,202 @@
+"""Замер производительности каждого запроса.
+
+ServerTimingMiddleware считает время запроса, число и время SQL-запросов,
+время отрисовки шаблонов, обращения к кешу лент, исход кеша страниц и
+ожидание соединения из пула с его заполненностью.
+Итог отдаётся заголовком Server-Timing (его показывают инструменты
+разработчика браузера) и одной JSON-строкой в логгер yatube.timing.
+Запросы, которые вышли за бюджет PERFORMANCE_BUDGETS своего URL name,
+пишутся в лог с уровнем WARNING.
+
+Время шаблонов включает SQL-запросы, которые выполняются при отрисовке
+(ленивые querysets в шаблоне), поэтому метрики пересекаются.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.dispatch import receiver
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+from posts.feed_cache import OUTCOMES, feed_cache_accessed
+from posts.page_cache import page_cache_accessed
+from yatube.sqlite.pool import pool_checkout
+
+logger = logging.getLogger("yatube.timing")
+
+_local = threading.local()
+
+
+class RequestTiming:
+    """Метрики одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache = Counter()
+        self.page_cache = None
+        self.pool_wait = None
+        self.pool_saturation = None
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.sql_count += 1
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    """Метрики текущего запроса или None вне ServerTimingMiddleware."""
+    return getattr(_local, "timing", None)
+
+
+@receiver(feed_cache_accessed)
+def count_cache_access(sender, outcome, **kwargs):
+    timing = current()
+    if timing is not None:
+        timing.cache[outcome] += 1
+
+
+@receiver(page_cache_accessed)
+def record_page_cache(sender, outcome, **kwargs):
+    timing = current()
+    if timing is not None:
+        timing.page_cache = outcome
+
+
+@receiver(pool_checkout)
+def record_pool_checkout(sender, wait, saturation, **kwargs):
+    timing = current()
+    if timing is not None:
+        timing.pool_wait = (timing.pool_wait or 0.0) + wait
+        timing.pool_saturation = max(timing.pool_saturation or 0, saturation)
+
+
+class Template(django_backend.Template):
+    """Шаблон, время отрисовки которого попадает в метрики запроса."""
+
+    def render(self, context=None, request=None):
+        timing = current()
+        if timing is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timing.template_time += time.perf_counter() - started
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Стандартный бэкенд шаблонов с замером времени отрисовки.
+
+    Замеряются только шаблоны верхнего уровня: include внутри них
+    выполняются тем же вызовом render и дважды не считаются.
+    """
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class ServerTimingMiddleware:
+    """Заголовок Server-Timing, строка лога и проверка бюджетов."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        _local.timing = timing
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.timing = None
+        total = timing.total
+        match = getattr(request, "resolver_match", None)
+        url_name = match.url_name if match is not None else None
+        over_budget = self.check_budget(url_name, timing, total)
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = self.header(timing, total)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "url_name": url_name,
+            "status": response.status_code,
+            "total_ms": _ms(total),
+            "sql_count": timing.sql_count,
+            "sql_ms": _ms(timing.sql_time),
+            "template_ms": _ms(timing.template_time),
+            "cache": {outcome: timing.cache[outcome] for outcome in OUTCOMES},
+            "page_cache": timing.page_cache,
+            "pool_wait_ms": (
+                None if timing.pool_wait is None else _ms(timing.pool_wait)
+            ),
+            "pool_saturation": timing.pool_saturation,
+            "over_budget": over_budget,
+        }
+        logger.log(
+            logging.WARNING if over_budget else logging.INFO,
+            json.dumps(record, ensure_ascii=False, sort_keys=True),
+        )
+        return response
+
+    @staticmethod
+    def check_budget(url_name, timing, total):
+        """Список превышенных лимитов: "queries" и/или "ms"."""
+        budget = settings.PERFORMANCE_BUDGETS.get(url_name)
+        if not budget:
+            return []
+        exceeded = []
+        if "queries" in budget and timing.sql_count > budget["queries"]:
+            exceeded.append("queries")
+        if "ms" in budget and total * 1000 > budget["ms"]:
+            exceeded.append("ms")
+        return exceeded
+
+    @staticmethod
+    def header(timing, total):
+        cache = " ".join(
+            f"{outcome}={timing.cache[outcome]}" for outcome in OUTCOMES
+        )
+        metrics = [
+            f"total;dur={_ms(total)}",
+            f'db;dur={_ms(timing.sql_time)};desc="{timing.sql_count} queries"',
+            f"tpl;dur={_ms(timing.template_time)}",
+            f'cache;desc="{cache}"',
+        ]
+        if timing.page_cache is not None:
+            metrics.append(f'page;desc="{timing.page_cache}"')
+        if timing.pool_wait is not None:
+            metrics.append(
+                f"pool;dur={_ms(timing.pool_wait)};"
+                f'desc="saturation {timing.pool_saturation:.2f}"'
+            )
+        return ", ".join(metrics)